@@ -1,9 +1,27 @@
-import re
-from typing import Any, Dict, List, Optional
+import asyncio
+import time
+from collections.abc import Mapping
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from app.assignment_engine import AssignmentEngine
+from app.availability_index import drone_availability, pilot_availability
+from app.batch_planner import BatchPlanner, plan_status_updates
+from app.booking_index import booking_index
 from app.conflict_detector import ConflictDetector
-from app.sheets_client import SheetsClient
+from app.fleet_index import drone_index, pilot_index
+from app.metrics import QUERY_SECONDS, STAGE_SECONDS, Stopwatch, observe, timed
+from app.query_parser import QueryParser
+from app.records import as_mission
+from app.response_cache import ResponseCache
+from app.scoring import ScoringModel, top_k
+from app.sheets_client import BaseSheetsClient
+from app.snapshot_cache import SheetTable
+from app.urgent_reassignment import UrgentReassigner
+from app.write_behind import cell_key
+
+# (sheets client method name, kwargs) for a write the agent wants performed
+Write = Tuple[str, Dict[str, Any]]
 
 
 class CoordinatorAgent:
@@ -15,104 +33,335 @@ class CoordinatorAgent:
     - missions sheet
     """
 
-    def __init__(self, sheets_client: SheetsClient):
+    # Ranked candidates listed per query ("top 3 pilots ..." overrides)
+    TOP_K = 5
+
+    # Closest conflicting pairs reported when no clean pair exists
+    NEAR_MISSES = 3
+
+    # Conflicts listed in the audit chat message (full list is in "data")
+    AUDIT_PREVIEW = 20
+
+    # Tables each intent reads; only these are fetched per query.
+    INTENT_TABLES = {
+        "show_available_pilots": ("pilots", "missions"),
+        "show_available_drones": ("drones", "missions"),
+        "show_free_pilots": ("pilots", "missions"),
+        "show_free_drones": ("drones", "missions"),
+        "update_pilot_status": ("pilots",),
+        "update_drone_status": ("drones",),
+        "assign_mission": ("pilots", "drones", "missions"),
+        "urgent_assign_mission": ("pilots", "drones", "missions"),
+        "assign_all_missions": ("pilots", "drones", "missions"),
+        "audit_conflicts": ("pilots", "drones", "missions"),
+    }
+
+    # Intents that never write; their responses are cached per data version
+    READ_ONLY_INTENTS = {
+        "show_available_pilots",
+        "show_available_drones",
+        "show_free_pilots",
+        "show_free_drones",
+        "audit_conflicts",
+    }
+
+    def __init__(self, sheets_client: BaseSheetsClient, scoring_weights: Optional[Dict[str, float]] = None):
+        """
+        scoring_weights -> overrides for scoring.DEFAULT_WEIGHTS (candidate ranking)
+        """
         self.sheets = sheets_client
+        self.scoring = ScoringModel(scoring_weights)
         self.conflict_detector = ConflictDetector()
-        self.assignment_engine = AssignmentEngine()
+        self.assignment_engine = AssignmentEngine(self.scoring)
+        self.batch_planner = BatchPlanner()
+        self.reassigner = UrgentReassigner()
+        self.parser = QueryParser()
+        self.response_cache = ResponseCache()
 
     # ---------------------------------------------------
     # MAIN ENTRY POINT
     # ---------------------------------------------------
     def handle_query(self, user_query: str) -> Dict[str, Any]:
         q = (user_query or "").strip()
+        return self.run_intent(self._timed_detect_intent(q), q)
+
+    async def ahandle_query(self, user_query: str) -> Dict[str, Any]:
+        """
+        Async entry point (FastAPI). With a sync client (LocalSheetsClient,
+        SheetsClient) the whole query runs in a worker thread. With an async client
+        only the sheet I/O is awaited on the event loop; vocabulary learning, the
+        handler (matching, audits, batch planning) and the client's parsing run in
+        worker threads, so one query's CPU work doesn't stall the others.
+        """
+        q = (user_query or "").strip()
+        return await self.arun_intent(self._timed_detect_intent(q), q)
+
+    def run_intent(self, intent: str, q: str = "") -> Dict[str, Any]:
+        with timed(QUERY_SECONDS, intent=intent):
+            # Fetch only the sheets this intent needs, in parallel
+            # (vocabulary learning on new snapshots counts as fetch)
+            with self._stage(intent, "fetch"):
+                tables = self.sheets.load_tables(self.INTENT_TABLES.get(intent, ()))
+                self.parser.learn(tables)
+
+            with self._stage(intent, "handler"):
+                response, write = self._cached_route(intent, q, tables)
+            if write:
+                method, kwargs = write
+                with self._stage(intent, "write"):
+                    result = getattr(self.sheets, method)(**kwargs)
+                self._record_write(response, result)
+            return response
+
+    async def arun_intent(self, intent: str, q: str = "") -> Dict[str, Any]:
+        if not getattr(self.sheets, "is_async", False):
+            return await asyncio.to_thread(self.run_intent, intent, q)
+
+        with timed(QUERY_SECONDS, intent=intent):
+            with self._stage(intent, "fetch"):
+                tables = await self.sheets.load_tables(self.INTENT_TABLES.get(intent, ()))
+                await asyncio.to_thread(self.parser.learn, tables)
+
+            with self._stage(intent, "handler"):
+                response, write = await asyncio.to_thread(self._cached_route, intent, q, tables)
+            if write:
+                method, kwargs = write
+                with self._stage(intent, "write"):
+                    result = await getattr(self.sheets, method)(**kwargs)
+                self._record_write(response, result)
+            return response
 
-        pilots = self.sheets.get_pilot_data()
-        drones = self.sheets.get_drone_data()
-
-        if not isinstance(pilots, list) or not isinstance(drones, list):
-            return {"status": "error", "message": "Sheets returned invalid data format."}
+    # ---------------------------------------------------
+    # INSTRUMENTATION (app/metrics.py)
+    # ---------------------------------------------------
+    def _stage(self, intent: str, stage: str):
+        return timed(STAGE_SECONDS, stage, intent=intent, stage=stage)
 
+    def _timed_detect_intent(self, q: str) -> str:
+        # intent is only known afterwards, so time it by hand
+        start = time.perf_counter()
         intent = self._detect_intent(q)
+        observe(STAGE_SECONDS, time.perf_counter() - start, "parse", intent=intent, stage="parse")
+        return intent
+
+    # ---------------------------------------------------
+    # BATCH (one snapshot, one backend write)
+    # ---------------------------------------------------
+    def run_batch(self, queries: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Runs queries in order against one snapshot of every sheet they need.
+        Writes are patched into that snapshot as they happen (later queries see
+        them) and sent at the end as one batched backend write.
+
+        Yields {"index", "query", "intent", "response"} per query as soon as it
+        is answered, then {"flush": {"updates": n, "result": backend result}}.
+        """
+        queries, intents = self._batch_intents(queries)
+        with self._stage("batch", "fetch"):
+            tables = self.sheets.load_tables(self._batch_tables(intents))
+            self.parser.learn(tables)
+
+        updates: List[Dict[str, Any]] = []
+        yield from self._batch_responses(queries, intents, tables, updates)
+
+        updates = self._coalesce_updates(updates)
+        try:
+            with self._stage("batch", "write"):
+                result = self.sheets.write_batch(updates) if updates else None
+        except Exception as e:
+            self._batch_write_failed(updates)
+            result = {"error": str(e)}
+        yield {"flush": {"updates": len(updates), "result": result}}
+
+    async def arun_batch(self, queries: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        if not getattr(self.sheets, "is_async", False):
+            # sync client: advance the batch in a worker thread, one answer at a time
+            items = self.run_batch(queries)
+            while True:
+                item = await asyncio.to_thread(next, items, None)
+                if item is None:
+                    return
+                yield item
+
+        queries, intents = self._batch_intents(queries)
+        with self._stage("batch", "fetch"):
+            tables = await self.sheets.load_tables(self._batch_tables(intents))
+            await asyncio.to_thread(self.parser.learn, tables)
+
+        # handlers run in a worker thread, one answer at a time
+        updates: List[Dict[str, Any]] = []
+        items = self._batch_responses(queries, intents, tables, updates)
+        while True:
+            item = await asyncio.to_thread(next, items, None)
+            if item is None:
+                break
+            yield item
+
+        updates = self._coalesce_updates(updates)
+        try:
+            with self._stage("batch", "write"):
+                result = await self.sheets.write_batch(updates) if updates else None
+        except Exception as e:
+            self._batch_write_failed(updates)
+            result = {"error": str(e)}
+        yield {"flush": {"updates": len(updates), "result": result}}
+
+    def _batch_intents(self, queries: List[str]) -> Tuple[List[str], List[str]]:
+        queries = [(q or "").strip() for q in queries]
+        return queries, [self._timed_detect_intent(q) for q in queries]
+
+    def _batch_tables(self, intents: List[str]) -> List[str]:
+        return list(dict.fromkeys(t for intent in intents for t in self.INTENT_TABLES.get(intent, ())))
+
+    def _batch_responses(self, queries, intents, tables, updates: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for index, (q, intent) in enumerate(zip(queries, intents)):
+            try:
+                with self._stage(intent, "handler"):
+                    response, write = self._cached_route(intent, q, tables)
+            except Exception as e:
+                # one bad query must not cut the stream short
+                response, write = {"status": "error", "message": f"❌ {e}"}, None
+
+            if write:
+                method, kwargs = write
+                cell_updates = self.sheets.updates_for(method, kwargs)
+                self._patch_tables(tables, cell_updates)
+                updates.extend(cell_updates)
+                self._record_write(response, {"status": "pending", "updates": len(cell_updates)})
+
+            yield {"index": index, "query": q, "intent": intent, "response": response}
+
+    def _patch_tables(self, tables: Dict[str, Any], updates: List[Dict[str, Any]]):
+        """
+        Applies batch writes locally: to the client's snapshot cache, and to the
+        batch's own tables if they aren't that snapshot (cache disabled / replaced).
+        """
+        self.sheets.patch_snapshot(updates)
+        by_sheet = {self.sheets.TABLE_SHEETS[name]: rows for name, rows in tables.items()}
+        for u in updates:
+            rows = by_sheet.get(u["sheet"])
+            if rows is None:
+                continue
+            row = self._find_row(rows, u["keyColumn"], str(u["keyValue"]))
+            if row is None or row.get(u["updateColumn"]) == u["updateValue"]:
+                continue
+            if isinstance(rows, SheetTable):
+                rows.patch(u["keyColumn"], u["keyValue"], u["updateColumn"], u["updateValue"])
+            else:
+                row[u["updateColumn"]] = u["updateValue"]
+
+    def _coalesce_updates(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # several writes to one cell in a batch -> only the last is sent
+        merged: Dict[Tuple, Dict[str, Any]] = {}
+        for u in updates:
+            key = cell_key(u)
+            merged.pop(key, None)
+            merged[key] = u
+        return list(merged.values())
+
+    def _batch_write_failed(self, updates: List[Dict[str, Any]]):
+        # the snapshot holds writes the backend never got: refetch those sheets
+        for sheet in {u["sheet"] for u in updates}:
+            self.sheets.invalidate(sheet)
+
+    def _cached_route(self, intent: str, q: str, tables: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Write]]:
+        """
+        _route with a response cache for read-only intents.
+
+        Key = intent + parsed slots + (sheet, version) of every table read + today
+        (scores depend on it). Any write patches a sheet and bumps its version, so
+        stale responses are never served. Plain lists (snapshot cache disabled)
+        carry no version and are not cached.
+        """
+        key = self._response_key(intent, q, tables)
+        if key is None:
+            return self._route(intent, q, tables)
+
+        cached = self.response_cache.get(key)
+        if cached is None:
+            cached, _ = self._route(intent, q, tables)
+            if cached.get("status") != "success":
+                return cached, None
+            self.response_cache.put(key, cached)
+        # shallow copy so callers can add keys without touching the cached entry
+        return dict(cached), None
+
+    def _response_key(self, intent: str, q: str, tables: Dict[str, Any]) -> Optional[Tuple]:
+        if intent not in self.READ_ONLY_INTENTS:
+            return None
+        if not all(isinstance(rows, SheetTable) for rows in tables.values()):
+            return None
+        versions = tuple(sorted((name, rows.name, rows.version) for name, rows in tables.items()))
+        return intent, self.parser.parse(q), versions, self.scoring.today()
+
+    def _route(self, intent: str, q: str, tables: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Write]]:
+        """
+        Runs the intent handler against already-loaded tables.
+        Returns (response, write) where write = (sheets method name, kwargs) or None;
+        the caller performs the write so the same logic serves sync and async clients.
+        """
+        if any(not isinstance(rows, list) for rows in tables.values()):
+            return {"status": "error", "message": "Sheets returned invalid data format."}, None
 
         if intent == "show_available_pilots":
-            return self._show_available_pilots(q, pilots)
+            return self._show_available_pilots(q, tables["pilots"], tables["missions"]), None
 
         if intent == "show_available_drones":
-            return self._show_available_drones(q, drones)
+            return self._show_available_drones(q, tables["drones"], tables["missions"]), None
+
+        if intent == "show_free_pilots":
+            return self._show_free_resources(q, "pilot", tables["pilots"], tables["missions"]), None
+
+        if intent == "show_free_drones":
+            return self._show_free_resources(q, "drone", tables["drones"], tables["missions"]), None
 
         if intent == "update_pilot_status":
-            return self._update_pilot_status(q, pilots)
+            return self._update_pilot_status(q, tables["pilots"])
 
         if intent == "update_drone_status":
-            return self._update_drone_status(q, drones)
+            return self._update_drone_status(q, tables["drones"])
 
         if intent == "assign_mission":
-            return self._assign_mission(q, pilots, drones, urgent=False)
+            return self._assign_mission(q, tables["pilots"], tables["drones"], tables["missions"], urgent=False)
 
         if intent == "urgent_assign_mission":
-            return self._assign_mission(q, pilots, drones, urgent=True)
+            return self._assign_mission(q, tables["pilots"], tables["drones"], tables["missions"], urgent=True)
+
+        if intent == "assign_all_missions":
+            return self._assign_all_missions(tables["pilots"], tables["drones"], tables["missions"])
+
+        if intent == "audit_conflicts":
+            return self._audit_conflicts(tables["pilots"], tables["drones"], tables["missions"]), None
 
         return {
             "status": "unknown",
-            "message": "❌ Sorry, I didn't understand. Try: show pilots/drones, update pilot/drone, assign mission M001."
-        }
+            "message": "❌ Sorry, I didn't understand. Try: show pilots/drones, update pilot/drone, assign mission M001, assign all open missions, audit conflicts, pilots free from 2026-02-10 to 2026-02-12."
+        }, None
+
+    def _record_write(self, response: Dict[str, Any], result: Any):
+        # Handlers that report the backend result leave a "result" placeholder
+        if "result" in response:
+            response["result"] = result
 
     # ---------------------------------------------------
     # INTENT DETECTION
     # ---------------------------------------------------
     def _detect_intent(self, query: str) -> str:
-        q = query.lower()
-
-        if "urgent" in q and "mission" in q:
-            return "urgent_assign_mission"
-
-        if "assign" in q and "mission" in q:
-            return "assign_mission"
-
-        if "show" in q and "pilot" in q:
-            return "show_available_pilots"
-
-        if "show" in q and "drone" in q:
-            return "show_available_drones"
-
-        if "available pilots" in q:
-            return "show_available_pilots"
-
-        if "available drones" in q:
-            return "show_available_drones"
-
-        if "update" in q and "pilot" in q:
-            return "update_pilot_status"
-
-        if "update" in q and "drone" in q:
-            return "update_drone_status"
-
-        return "unknown"
+        return self.parser.parse(query).intent
 
     # ---------------------------------------------------
     # SHOW PILOTS
     # ---------------------------------------------------
-    def _show_available_pilots(self, query: str, pilots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _show_available_pilots(self, query: str, pilots: List[Dict[str, Any]], missions: List[Dict[str, Any]]) -> Dict[str, Any]:
         location = self._extract_location(query)
         required_certs = self._extract_required_certs(query)
 
-        available = []
-
-        for p in pilots:
-            status = str(p.get("status", "")).lower()
-            loc = str(p.get("location", "")).lower()
-            certs = self._parse_list(p.get("certifications", ""))
-
-            if status not in ["available", "active", "free"]:
-                continue
-
-            if location and location.lower() not in loc:
-                continue
-
-            if required_certs and not self._has_all(required_certs, certs):
-                continue
-
-            available.append(p)
+        positions = pilot_index(pilots).match(
+            statuses=["available", "active", "free"],
+            location=location,
+            tags=required_certs,
+        )
+        available = [pilots[pos] for pos in positions]
 
         if not available:
             return {
@@ -120,163 +369,253 @@ class CoordinatorAgent:
                 "message": f"❌ No available pilots found for {location or 'all locations'}."
             }
 
+        bookings = booking_index(missions)
+        top = top_k(pilots, positions, lambda p: self.scoring.score_pilot(p, None, bookings), self._extract_top_k(query))
+
         msg = "✅ Available Pilots:\n"
         for p in available:
             msg += f"- {p.get('name')} | {p.get('location')} | {p.get('status')} | certs={p.get('certifications')}\n"
+        msg += self._top_k_message(top, "name")
 
-        return {"status": "success", "message": msg, "data": available}
+        return {
+            "status": "success",
+            "message": msg,
+            "data": [dict(row) for row in available],
+            "top_k": self._ranked_pilots(top, None, bookings),
+        }
 
     # ---------------------------------------------------
     # SHOW DRONES
     # ---------------------------------------------------
-    def _show_available_drones(self, query: str, drones: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _show_available_drones(self, query: str, drones: List[Dict[str, Any]], missions: List[Dict[str, Any]]) -> Dict[str, Any]:
         capability = self._extract_capability(query)
         location = self._extract_location(query)
 
-        available = []
+        positions = drone_index(drones).match(
+            statuses=["available", "ready", "free"],
+            exclude_status="maintenance",
+            location=location,
+            tag_substring=capability,
+        )
+        available = [drones[pos] for pos in positions]
 
-        for d in drones:
-            status = str(d.get("status", "")).lower()
-            caps = str(d.get("capabilities", "")).lower()
-            loc = str(d.get("location", "")).lower()
+        if not available:
+            return {
+                "status": "success",
+                "message": f"❌ No available drones found for {capability or 'all capabilities'}."
+            }
 
-            if status not in ["available", "ready", "free"]:
-                continue
+        bookings = booking_index(missions)
+        top = top_k(drones, positions, lambda d: self.scoring.score_drone(d, None, bookings), self._extract_top_k(query))
 
-            if "maintenance" in status:
-                continue
+        msg = "✅ Available Drones:\n"
+        for d in available:
+            msg += f"- {d.get('drone_id')} | {d.get('model')} | caps={d.get('capabilities')} | {d.get('status')}\n"
+        msg += self._top_k_message(top, "drone_id")
 
-            if location and location.lower() not in loc:
-                continue
+        return {
+            "status": "success",
+            "message": msg,
+            "data": [dict(row) for row in available],
+            "top_k": self._ranked_drones(top, None, bookings),
+        }
 
-            if capability and capability.lower() not in caps:
-                continue
+    # ---------------------------------------------------
+    # WHO IS FREE BETWEEN DATES
+    # ---------------------------------------------------
+    def _show_free_resources(
+        self,
+        query: str,
+        role: str,
+        rows: List[Dict[str, Any]],
+        missions: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        start, end = self._extract_date_range(query)
+        location = self._extract_location(query)
+        bookings = booking_index(missions)
 
-            available.append(d)
+        if role == "pilot":
+            label, key_column = "Pilots", "name"
+            positions = pilot_index(rows).match(location=location, tags=self._extract_required_certs(query))
+            availability = pilot_availability(rows)
+        else:
+            label, key_column = "Drones", "drone_id"
+            positions = drone_index(rows).match(location=location, tag_substring=self._extract_capability(query))
+            availability = drone_availability(rows)
 
-        if not available:
+        free = availability.free(positions, start, end, bookings=bookings)
+        window = f"{start} to {end}" if end != start else f"{start}"
+
+        if not free:
             return {
                 "status": "success",
-                "message": f"❌ No available drones found for {capability or 'all capabilities'}."
+                "message": f"❌ No {label.lower()} free {window} in {location or 'all locations'}.",
+                "data": [],
             }
 
-        msg = "✅ Available Drones:\n"
-        for d in available:
-            msg += f"- {d.get('drone_id')} | {d.get('model')} | caps={d.get('capabilities')} | {d.get('status')}\n"
+        msg = f"✅ {label} free {window}:\n"
+        for pos in free:
+            row = rows[pos]
+            msg += f"- {row.get(key_column)} | {row.get('location')} | {row.get('status')}\n"
+
+        # matched the filters but busy in the window, and why
+        free_set = set(free)
+        busy = {
+            str(rows[pos].get(key_column)): availability.busy_reasons(pos, start, end, bookings)
+            for pos in positions
+            if pos not in free_set
+        }
 
-        return {"status": "success", "message": msg, "data": available}
+        return {
+            "status": "success",
+            "message": msg,
+            "data": [dict(rows[pos]) for pos in free],
+            "busy": busy,
+        }
 
     # ---------------------------------------------------
     # UPDATE PILOT STATUS
     # ---------------------------------------------------
-    def _update_pilot_status(self, query: str, pilots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _update_pilot_status(self, query: str, pilots: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[Write]]:
         pilot_name = self._extract_pilot_name(query)
         status = self._extract_status(query)
 
         if not pilot_name or not status:
-            return {"status": "error", "message": "Example: Update pilot Ravi to On Leave"}
+            return {"status": "error", "message": "Example: Update pilot Ravi to On Leave"}, None
 
-        pilot_exists = any(str(p.get("name", "")).lower() == pilot_name.lower() for p in pilots)
+        pilot_exists = self._find_row(pilots, "name", pilot_name) is not None
         if not pilot_exists:
-            return {"status": "error", "message": f"Pilot not found: {pilot_name}"}
+            return {"status": "error", "message": f"Pilot not found: {pilot_name}"}, None
 
-        result = self.sheets.update_pilot_status(pilot_name, status)
+        write = ("update_pilot_status", {"pilot_name": pilot_name, "status": status})
 
-        return {"status": "success", "message": f"✅ Pilot {pilot_name} updated to {status}", "result": result}
+        return {"status": "success", "message": f"✅ Pilot {pilot_name} updated to {status}", "result": None}, write
 
     # ---------------------------------------------------
     # UPDATE DRONE STATUS
     # ---------------------------------------------------
-    def _update_drone_status(self, query: str, drones: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _update_drone_status(self, query: str, drones: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Optional[Write]]:
         drone_id = self._extract_drone_id(query)
         status = self._extract_status(query)
 
         if not drone_id or not status:
-            return {"status": "error", "message": "Example: Update drone D001 to Maintenance"}
+            return {"status": "error", "message": "Example: Update drone D001 to Maintenance"}, None
 
-        drone_exists = any(str(d.get("drone_id", "")).lower() == drone_id.lower() for d in drones)
+        drone_exists = self._find_row(drones, "drone_id", drone_id) is not None
         if not drone_exists:
-            return {"status": "error", "message": f"Drone not found: {drone_id}"}
+            return {"status": "error", "message": f"Drone not found: {drone_id}"}, None
 
-        result = self.sheets.update_drone_status(drone_id, status)
+        write = ("update_drone_status", {"drone_id": drone_id, "status": status})
 
-        return {"status": "success", "message": f"✅ Drone {drone_id} updated to {status}", "result": result}
+        return {"status": "success", "message": f"✅ Drone {drone_id} updated to {status}", "result": None}, write
 
     # ---------------------------------------------------
     # ASSIGN MISSION (MAIN REQUIREMENT)
     # ---------------------------------------------------
-    def _assign_mission(self, query: str, pilots: List[Dict[str, Any]], drones: List[Dict[str, Any]], urgent: bool):
-        missions = self.sheets.get_mission_data()
-
+    def _assign_mission(
+        self,
+        query: str,
+        pilots: List[Dict[str, Any]],
+        drones: List[Dict[str, Any]],
+        missions: List[Dict[str, Any]],
+        urgent: bool,
+    ) -> Tuple[Dict[str, Any], Optional[Write]]:
         mission_id = self._extract_mission_id(query)
         if not mission_id:
-            return {"status": "error", "message": "Mission ID missing. Example: assign mission M001"}
+            return {"status": "error", "message": "Mission ID missing. Example: assign mission M001"}, None
 
         # Find mission row
-        mission = None
-        for m in missions:
-            if str(m.get("mission_id", "")).strip().lower() == mission_id.lower():
-                mission = m
-                break
+        mission = self._find_row(missions, "mission_id", mission_id)
 
         if not mission:
-            return {"status": "error", "message": f"Mission not found: {mission_id}"}
+            return {"status": "error", "message": f"Mission not found: {mission_id}"}, None
 
-        mission_status = str(mission.get("status", "")).lower()
+        mission = as_mission(mission)
+        mission_status = mission.status_key
         if mission_status in ["assigned", "completed"]:
-            return {"status": "error", "message": f"❌ Mission {mission_id} already {mission_status}"}
+            return {"status": "error", "message": f"❌ Mission {mission_id} already {mission_status}"}, None
 
         location = mission.get("location")
-        required_certs = self._parse_list(mission.get("required_certs", ""))
+        required_certs = list(mission.required_cert_list)
         required_capability = mission.get("required_capability")
         project_name = mission.get("project") or mission_id
 
-        # Match pilot + drone
-        match = self.assignment_engine.find_best_match(
+        # Conflict checks (mission dates + certs) prune the candidate search
+        project_req = {
+            "mission_id": mission_id,
+            "location": location,
+            "start_date": mission.get("start_date"),
+            "end_date": mission.get("end_date"),
+            "required_certs": required_certs,
+        }
+        bookings = booking_index(missions)
+        detector = self.conflict_detector
+
+        # conflict checks run inside the search; "match" is reported without them
+        intent = "urgent_assign_mission" if urgent else "assign_mission"
+        conflicts = Stopwatch()
+        start = time.perf_counter()
+        search = self.assignment_engine.search_match(
             pilots=pilots,
             drones=drones,
             location=location,
             urgent=urgent,
             required_certs=required_certs,
             required_capability=required_capability,
+            pilot_check=conflicts.wrap(lambda p: detector.pilot_conflicts(p, project_name, project_req, bookings)),
+            drone_check=conflicts.wrap(lambda d: detector.drone_conflicts(d, project_name, project_req, bookings)),
+            pair_check=conflicts.wrap(detector.pair_conflicts),
+            top_k=self.NEAR_MISSES,
+            mission=mission,
+            bookings=bookings,
         )
+        elapsed = time.perf_counter() - start
+        observe(STAGE_SECONDS, elapsed - conflicts.seconds, "match", intent=intent, stage="match")
+        observe(STAGE_SECONDS, conflicts.seconds, "conflicts", intent=intent, stage="conflicts")
+        match = search["match"]
+        near_misses = search["near_misses"]
+
+        # Ranked alternatives so dispatchers can pick without another query
+        k = self._extract_top_k(query)
+        candidates = {
+            "pilots": self._ranked_pilots(search["pilots"].top(k), mission, bookings),
+            "drones": self._ranked_drones(search["drones"].top(k), mission, bookings),
+        }
 
-        if not match:
-            return {"status": "error", "message": f"❌ No match found for mission {mission_id}"}
-
-        pilot = match["pilot"]
-        drone = match["drone"]
+        if not match and urgent and self._blocked_by_bookings(near_misses, project_name, project_req):
+            # Nobody free: try pulling busy resources (with backfill) instead
+            with self._stage(intent, "reassign"):
+                reassignment = self._urgent_reassignment(mission, pilots, drones, missions, bookings)
+            if reassignment is not None:
+                return reassignment
 
-        # Conflict detection using mission dates + certs
-        conflicts = self.conflict_detector.check_conflicts(
-            pilot=pilot,
-            drone=drone,
-            project=project_name,
-            project_req={
-                "location": location,
-                "start_date": mission.get("start_date"),
-                "end_date": mission.get("end_date"),
-                "required_certs": required_certs,
-            }
-        )
+        if not match and not near_misses:
+            return {"status": "error", "message": f"❌ No match found for mission {mission_id}"}, None
 
-        if conflicts:
+        if not match:
+            msg = f"⚠️ No conflict-free pilot/drone pair for mission {mission_id}. Closest options:\n"
+            for n in near_misses:
+                msg += f"- Pilot {n['pilot'].get('name')} + Drone {n['drone'].get('drone_id')}:\n"
+                msg += "".join(f"    - {c}\n" for c in n["conflicts"])
             return {
                 "status": "conflict",
-                "message": f"⚠️ Conflicts found for mission {mission_id}:\n- " + "\n- ".join(conflicts),
-                "match": match
-            }
+                "message": msg,
+                "match": self._serialize_match(near_misses[0]),
+                "near_misses": [self._serialize_match(n) for n in near_misses],
+                "candidates": candidates,
+            }, None
 
-        # Write assignment into missions sheet
-        self.sheets.update_mission_assignment(
-            mission_id=mission_id,
-            pilot_name=pilot.get("name"),
-            drone_id=drone.get("drone_id"),
-        )
+        pilot = match["pilot"]
+        drone = match["drone"]
 
-        # Update pilot + drone status
-        self.sheets.update_pilot_status(pilot.get("name"), f"Assigned({mission_id})")
-        self.sheets.update_drone_status(drone.get("drone_id"), f"Assigned({mission_id})")
+        # Write assignment into missions sheet + pilot/drone status (one batched request)
+        write = ("assign_mission", {
+            "mission_id": mission_id,
+            "pilot_name": pilot.get("name"),
+            "drone_id": drone.get("drone_id"),
+            "pilot_status": f"Assigned({mission_id})",
+            "drone_status": f"Assigned({mission_id})",
+        })
 
         urgent_tag = "🚨 URGENT" if urgent else "✅"
 
@@ -292,72 +631,234 @@ class CoordinatorAgent:
                 f"Dates: {mission.get('start_date')} to {mission.get('end_date')}\n"
                 f"Reason: {match.get('reason')}"
             ),
-            "match": match
+            "match": self._serialize_match(match),
+            "candidates": candidates,
+        }, write
+
+    # ---------------------------------------------------
+    # URGENT REASSIGNMENT (CASCADE)
+    # ---------------------------------------------------
+    def _blocked_by_bookings(self, near_misses, project: str, project_req: Dict[str, Any]) -> bool:
+        """
+        True if the closest pairs fail only on other missions' dates, which pulling
+        resources can fix. Any cert / location / maintenance conflict is reported
+        as a near miss instead.
+        """
+        detector = self.conflict_detector
+        return all(
+            not (
+                detector.pilot_conflicts(n["pilot"], project, project_req, check_bookings=False)
+                + detector.drone_conflicts(n["drone"], project, project_req, check_bookings=False)
+                + detector.pair_conflicts(n["pilot"], n["drone"])
+            )
+            for n in near_misses
+        )
+
+    def _urgent_reassignment(self, mission, pilots, drones, missions, bookings) -> Optional[Tuple[Dict[str, Any], Optional[Write]]]:
+        """
+        Least-disruptive plan that frees a pilot and a drone for an urgent mission
+        by pulling them off overlapping missions and backfilling those.
+        Only complete plans (every displaced mission covered) are written.
+        """
+        mission_id = mission.get("mission_id")
+        pilot_plan = self.reassigner.plan("pilot", pilots, missions, mission, bookings)
+        drone_plan = self.reassigner.plan("drone", drones, missions, mission, bookings)
+        if pilot_plan is None or drone_plan is None:
+            return None
+
+        pilot = pilot_plan["resource"]
+        drone = drone_plan["resource"]
+        moves = (
+            [f"Pilot {b['to']} covers {b['mission_id']} (was {b['from']})" for b in pilot_plan["backfills"]]
+            + [f"Drone {b['to']} covers {b['mission_id']} (was {b['from']})" for b in drone_plan["backfills"]]
+        )
+        unfilled = pilot_plan["unfilled"] + drone_plan["unfilled"]
+        data = {
+            "pilot": dict(pilot),
+            "drone": dict(drone),
+            "moves": moves,
+            "unfilled": unfilled,
+            "cost": pilot_plan["cost"] + drone_plan["cost"],
+            "timed_out": pilot_plan["timed_out"] or drone_plan["timed_out"],
+        }
+
+        if unfilled:
+            msg = (
+                f"⚠️ Mission {mission_id} can only be staffed by leaving {', '.join(unfilled)} uncovered.\n"
+                f"Proposed: pilot {pilot.get('name')}, drone {drone.get('drone_id')}\n"
+            )
+            msg += "".join(f"- {m}\n" for m in moves)
+            return {"status": "conflict", "message": msg, "data": data}, None
+
+        # target mission + every backfilled mission, one batched write
+        entries = {mission_id: {
+            "mission_id": mission_id,
+            "pilot_name": pilot.get("name"),
+            "drone_id": drone.get("drone_id"),
+            "pilot_status": f"Assigned({mission_id})",
+            "drone_status": f"Assigned({mission_id})",
+        }}
+        for plan, name_field, status_field in ((pilot_plan, "pilot_name", "pilot_status"), (drone_plan, "drone_id", "drone_status")):
+            for b in plan["backfills"]:
+                row = self._find_row(missions, "mission_id", b["mission_id"]) or {}
+                entry = entries.setdefault(b["mission_id"], {
+                    "mission_id": b["mission_id"],
+                    "pilot_name": row.get("assigned_pilot"),
+                    "drone_id": row.get("assigned_drone"),
+                })
+                entry[name_field] = b["to"]
+                entry[status_field] = f"Assigned({b['mission_id']})"
+
+        msg = (
+            f"🚨 URGENT Mission Assigned{' by reassignment' if moves else ''}!\n"
+            f"Mission ID: {mission_id}\n"
+            f"Pilot: {pilot.get('name')}\n"
+            f"Drone: {drone.get('drone_id')}\n"
+        )
+        msg += "".join(f"- {m}\n" for m in moves) if moves else "- No other missions affected\n"
+
+        write = ("assign_missions", {"assignments": list(entries.values())})
+        return {"status": "success", "message": msg, "data": data, "result": None}, write
+
+    # ---------------------------------------------------
+    # ASSIGN ALL OPEN MISSIONS (BATCH)
+    # ---------------------------------------------------
+    def _assign_all_missions(
+        self,
+        pilots: List[Dict[str, Any]],
+        drones: List[Dict[str, Any]],
+        missions: List[Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], Optional[Write]]:
+        with self._stage("assign_all_missions", "match"):
+            plan = self.batch_planner.plan(pilots, drones, missions)
+        assignments = plan["assignments"]
+        unassigned = plan["unassigned"]
+
+        if not assignments and not unassigned:
+            return {"status": "success", "message": "✅ No open missions to assign."}, None
+
+        msg = f"✅ Planned {len(assignments)} assignment(s), {len(unassigned)} mission(s) left open.\n"
+        for a in assignments:
+            msg += f"- {a['mission_id']}: pilot {a['pilot'].get('name')} | drone {a['drone'].get('drone_id')}\n"
+        for u in unassigned:
+            msg += f"- {u['mission_id']}: ❌ {u['reason']}\n"
+
+        data = {
+            "assignments": [
+                {"mission_id": a["mission_id"], "pilot": a["pilot"].get("name"), "drone": a["drone"].get("drone_id"), "cost": a["cost"]}
+                for a in assignments
+            ],
+            "unassigned": unassigned,
         }
 
+        if not assignments:
+            return {"status": "error", "message": msg, "data": data}, None
+
+        # One batched write for the whole plan
+        pilot_status, drone_status = plan_status_updates(assignments)
+        write = ("assign_missions", {"assignments": [
+            {
+                "mission_id": a["mission_id"],
+                "pilot_name": a["pilot"].get("name"),
+                "drone_id": a["drone"].get("drone_id"),
+                "pilot_status": pilot_status[str(a["pilot"].get("name"))],
+                "drone_status": drone_status[str(a["drone"].get("drone_id"))],
+            }
+            for a in assignments
+        ]})
+
+        return {"status": "success", "message": msg, "data": data, "result": None}, write
+
+    # ---------------------------------------------------
+    # FLEET-WIDE CONFLICT AUDIT
+    # ---------------------------------------------------
+    def _audit_conflicts(
+        self,
+        pilots: List[Dict[str, Any]],
+        drones: List[Dict[str, Any]],
+        missions: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        with self._stage("audit_conflicts", "conflicts"):
+            report = self.conflict_detector.audit(pilots, drones, missions)
+        conflicts = report["conflicts"]
+
+        if not conflicts:
+            return {"status": "success", "message": "✅ No conflicts found across the fleet.", "data": report}
+
+        msg = f"⚠️ {len(conflicts)} conflict(s) found: " + ", ".join(f"{k}={v}" for k, v in sorted(report["summary"].items())) + "\n"
+        for c in conflicts[: self.AUDIT_PREVIEW]:
+            msg += f"- {c['mission_id']}: {c['detail']}\n"
+        if len(conflicts) > self.AUDIT_PREVIEW:
+            msg += f"... and {len(conflicts) - self.AUDIT_PREVIEW} more\n"
+
+        return {"status": "conflict", "message": msg, "data": report}
+
     # ---------------------------------------------------
     # HELPERS
     # ---------------------------------------------------
+    # Slots come from the single-pass parser (cached, so these don't re-scan the query)
     def _extract_location(self, query: str) -> Optional[str]:
-        m = re.search(r"\bin\s+([A-Za-z]+)\b", query, flags=re.IGNORECASE)
-        return m.group(1) if m else None
+        return self.parser.parse(query).location
 
     def _extract_mission_id(self, query: str) -> Optional[str]:
-        m = re.search(r"\bM\d+\b", query, flags=re.IGNORECASE)
-        return m.group(0) if m else None
+        return self.parser.parse(query).mission_id
 
     def _extract_pilot_name(self, query: str) -> Optional[str]:
-        m = re.search(r"\bpilot\s+([A-Za-z]+)\b", query, flags=re.IGNORECASE)
-        return m.group(1) if m else None
+        return self.parser.parse(query).pilot_name
 
     def _extract_drone_id(self, query: str) -> Optional[str]:
-        m = re.search(r"\bdrone\s+([A-Za-z0-9]+)\b", query, flags=re.IGNORECASE)
-        return m.group(1) if m else None
+        return self.parser.parse(query).drone_id
 
     def _extract_capability(self, query: str) -> Optional[str]:
-        q = query.lower()
-        for cap in ["thermal", "lidar", "rgb", "camera"]:
-            if cap in q:
-                return cap
-        return None
+        return self.parser.parse(query).capability
 
     def _extract_required_certs(self, query: str) -> List[str]:
-        q = query.lower()
-        certs = []
-        if "dgca" in q:
-            certs.append("DGCA")
-        if "bvlos" in q:
-            certs.append("BVLOS")
-        if "night" in q:
-            certs.append("Night Ops")
-        return certs
+        return list(self.parser.parse(query).certs)
+
+    def _extract_date_range(self, query: str) -> Optional[Tuple[date, date]]:
+        """
+        "from 2026-02-10 to 2026-02-12" -> (start, end); a single date -> that day.
+        """
+        parsed = self.parser.parse(query)
+        return (parsed.start, parsed.end) if parsed.start else None
+
+    def _extract_top_k(self, query: str) -> int:
+        top_k = self.parser.parse(query).top_k
+        return max(1, top_k) if top_k else self.TOP_K
 
     def _extract_status(self, query: str) -> Optional[str]:
-        q = query.lower()
-        if "on leave" in q:
-            return "On Leave"
-        if "maintenance" in q:
-            return "Maintenance"
-        if "available" in q:
-            return "Available"
-        if "busy" in q:
-            return "Busy"
-        if "inactive" in q:
-            return "Inactive"
-        if "assigned" in q:
-            return "Assigned"
+        return self.parser.parse(query).status
+
+    def _find_row(self, rows: List[Dict[str, Any]], column: str, value: str) -> Optional[Dict[str, Any]]:
+        """
+        Case-insensitive key lookup; O(1) on cached snapshots (SheetTable key index).
+        """
+        if isinstance(rows, SheetTable):
+            pos = rows.find(column, value)
+            return rows[pos] if pos is not None else None
+
+        for row in rows:
+            if str(row.get(column, "")).strip().lower() == value.strip().lower():
+                return row
         return None
 
-    def _parse_list(self, value: Any) -> List[str]:
-        if not value:
-            return []
-        if isinstance(value, list):
-            return [str(x).strip() for x in value if str(x).strip()]
-        return [x.strip() for x in str(value).split(",") if x.strip()]
-
-    def _has_all(self, required: List[str], actual: List[str]) -> bool:
-        actual_lower = {a.strip().lower() for a in actual}
-        for r in required:
-            if r.strip().lower() not in actual_lower:
-                return False
-        return True
+    def _ranked_pilots(self, ranked, mission, bookings) -> List[Dict[str, Any]]:
+        return [
+            {"name": p.get("name"), "score": score, "breakdown": self.scoring.explain(self.scoring.pilot_features(p, mission, bookings))}
+            for p, score in ranked
+        ]
+
+    def _ranked_drones(self, ranked, mission, bookings) -> List[Dict[str, Any]]:
+        return [
+            {"drone_id": d.get("drone_id"), "score": score, "breakdown": self.scoring.explain(self.scoring.drone_features(d, mission, bookings))}
+            for d, score in ranked
+        ]
+
+    def _top_k_message(self, ranked, key_column: str) -> str:
+        if not ranked:
+            return ""
+        return "🏅 Top picks: " + ", ".join(f"{row.get(key_column)} ({score:g})" for row, score in ranked) + "\n"
+
+    def _serialize_match(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        # records -> plain dicts for the JSON/UI response
+        return {k: dict(v) if isinstance(v, Mapping) else v for k, v in match.items()}
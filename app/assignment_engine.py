@@ -1,14 +1,27 @@
-from datetime import datetime
+import heapq
+from typing import Any, Callable, Dict, List, Optional
+
+from app.availability_index import drone_availability, pilot_availability
+from app.booking_index import mission_window
+from app.fleet_index import drone_index, pilot_index
+from app.records import as_mission
+from app.scoring import LazyRanking, ScoringModel
+from app.urgent_reassignment import ROLES, UrgentReassigner
 
 
 class AssignmentEngine:
-    def __init__(self):
-        pass
+    def __init__(self, scoring: Optional[ScoringModel] = None, reassigner: Optional[UrgentReassigner] = None, max_pairs: int = 500):
+        # ranks eligible pilots / drones (skills, workload, availability, maintenance headroom)
+        self.scoring = scoring or ScoringModel()
+        # picks the least disruptive busy pilot / drone in urgent mode
+        self.reassigner = reassigner or UrgentReassigner()
+        # ranked pairs search_match walks before switching to a full scan
+        self.max_pairs = max_pairs
 
     # --------------------------------------------------
     # MAIN MATCHING FUNCTION
     # --------------------------------------------------
-    def find_best_match(self, pilots, drones, location=None, urgent=False, required_certs=None, required_capability=None):
+    def find_best_match(self, pilots, drones, location=None, urgent=False, required_certs=None, required_capability=None, mission=None, bookings=None):
         """
         Returns best pilot + drone match.
 
@@ -17,16 +30,38 @@ class AssignmentEngine:
 
         required_certs example: ["DGCA", "BVLOS"]
         required_capability example: "Thermal"
+        mission / bookings -> optional mission row + BookingIndex used for scoring
+                              (and, in urgent mode, to tell free from busy resources)
         """
 
         if required_certs is None:
             required_certs = []
 
-        # STEP 1: filter pilots
-        filtered_pilots = self._filter_pilots(pilots, location, urgent, required_certs)
+        # STEP 1: filter + rank pilots
+        filtered_pilots = self._filter_pilots(pilots, location, urgent, required_certs, mission, bookings)
+
+        # STEP 2: filter + rank drones
+        filtered_drones = self._filter_drones(drones, location, urgent, required_capability, mission, bookings)
 
-        # STEP 2: filter drones
-        filtered_drones = self._filter_drones(drones, location, urgent, required_capability)
+        # --------------------------------------------------
+        # URGENT MODE RESHUFFLING LOGIC
+        # --------------------------------------------------
+        if urgent and mission is not None and bookings is not None:
+            # best candidate not booked during the mission, else the least disruptive busy one
+            mission = as_mission(mission)
+            pilot = self._first_unbooked("pilot", filtered_pilots, mission, bookings)
+            drone = self._first_unbooked("drone", filtered_drones, mission, bookings)
+            moved = []
+            if pilot is None:
+                pilot = self._find_least_disruptive_pilot(pilots, mission, bookings)
+                moved.append(f"pilot {pilot.get('name')}" if pilot else None)
+            if drone is None:
+                drone = self._find_least_disruptive_drone(drones, mission, bookings)
+                moved.append(f"drone {drone.get('drone_id')}" if drone else None)
+            if pilot is None or drone is None:
+                return None
+            reason = f"Reassigned {' and '.join(moved)} (least disruption)" if moved else "Best available pilot and drone found"
+            return {"pilot": pilot, "drone": drone, "reason": reason}
 
         if filtered_pilots and filtered_drones:
             return {
@@ -35,176 +70,237 @@ class AssignmentEngine:
                 "reason": "Best available pilot and drone found"
             }
 
-        # --------------------------------------------------
-        # URGENT MODE RESHUFFLING LOGIC
-        # --------------------------------------------------
-        if urgent:
-            # If no available, allow reassignment from busy but least disruption
-            candidate_pilot = self._find_least_disruptive_pilot(pilots, location, required_certs)
-            candidate_drone = self._find_least_disruptive_drone(drones, location, required_capability)
-
-            if candidate_pilot and candidate_drone:
-                return {
-                    "pilot": candidate_pilot,
-                    "drone": candidate_drone,
-                    "reason": f"Reassigned pilot {candidate_pilot.get('name')} and drone {candidate_drone.get('drone_id')} (least disruption)"
-                }
-
         return None
 
     # --------------------------------------------------
-    # PILOT FILTER
+    # CONFLICT-AWARE SEARCH
     # --------------------------------------------------
-    def _filter_pilots(self, pilots, location, urgent, required_certs):
-        eligible = []
-
-        for p in pilots:
-            status = str(p.get("status", "")).lower()
-            pilot_loc = str(p.get("location", "")).lower()
-
-            # Normal mode: only available pilots
-            if not urgent:
-                if status not in ["available", "free", "active"]:
-                    continue
+    def search_match(
+        self,
+        pilots,
+        drones,
+        location=None,
+        urgent=False,
+        required_certs=None,
+        required_capability=None,
+        pilot_check: Optional[Callable[[Any], List[str]]] = None,
+        drone_check: Optional[Callable[[Any], List[str]]] = None,
+        pair_check: Optional[Callable[[Any, Any], List[str]]] = None,
+        top_k: int = 3,
+        max_pairs: Optional[int] = None,
+        mission=None,
+        bookings=None,
+    ) -> Dict[str, Any]:
+        """
+        Walks candidate (pilot, drone) pairs lazily in ranked order (best pilot
+        rank + drone rank first) and returns the first pair with no conflicts.
+
+        pilot_check / drone_check / pair_check -> return conflict messages (empty = ok).
+        Per-resource checks run once per pilot / drone; a pilot or drone that
+        fails is pruned, so its remaining pairs are never generated.
+        max_pairs -> ranked pairs tried (default: the engine's max_pairs) before
+                     a full scan: every candidate checked once, then only pairs
+                     of clean pilots and drones, so no valid pair is missed.
+
+        Returns:
+        {
+          "match": {"pilot", "drone", "reason"} or None,
+          "near_misses": [{"pilot", "drone", "conflicts"}],  (up to top_k, fewest conflicts first)
+          "pilots": LazyRanking, "drones": LazyRanking        (scored candidates, best first)
+        }
+        """
+        if required_certs is None:
+            required_certs = []
 
-            # location match if provided
-            if location:
-                if location.lower() not in pilot_loc:
-                    continue
+        ranked_pilots = self._filter_pilots(pilots, location, urgent, required_certs, mission, bookings)
+        ranked_drones = self._filter_drones(drones, location, urgent, required_capability, mission, bookings)
+        rankings = {"pilots": ranked_pilots, "drones": ranked_drones}
+        reason = "Best available pilot and drone found"
+
+        # urgent displacement (with backfills) is planned by the caller from the near misses
+        if not ranked_pilots or not ranked_drones:
+            return {"match": None, "near_misses": [], **rankings}
+
+        if max_pairs is None:
+            max_pairs = self.max_pairs
+        pilot_conflicts: Dict[int, List[str]] = {}
+        drone_conflicts: Dict[int, List[str]] = {}
+        # (conflict count, order, pilot, drone, conflicts) - max-heap on the negated key keeps the best top_k
+        near: List[Any] = []
+        skipped = 0
+        tried = set()
+
+        def check_pilot(i):
+            if i not in pilot_conflicts:
+                pilot_conflicts[i] = pilot_check(ranked_pilots[i]) if pilot_check else []
+            return pilot_conflicts[i]
+
+        def check_drone(j):
+            if j not in drone_conflicts:
+                drone_conflicts[j] = drone_check(ranked_drones[j]) if drone_check else []
+            return drone_conflicts[j]
+
+        def try_pair(order, i, j):
+            nonlocal skipped
+            if (i, j) in tried:
+                return None
+            tried.add((i, j))
+            pilot, drone = ranked_pilots[i], ranked_drones[j]
+            conflicts = check_pilot(i) + check_drone(j)
+            if not conflicts and pair_check:
+                conflicts = pair_check(pilot, drone)
+            if not conflicts:
+                return {"pilot": pilot, "drone": drone, "reason": reason}
+
+            skipped += 1
+            entry = (-len(conflicts), -order, pilot, drone, conflicts)
+            if len(near) < top_k:
+                heapq.heappush(near, entry)
+            elif top_k > 0 and entry[:2] > near[0][:2]:
+                heapq.heapreplace(near, entry)
+            return None
 
-            # cert check
-            pilot_certs = self._parse_list(p.get("certifications", ""))
-            if not self._has_all_certs(pilot_certs, required_certs):
-                continue
+        found = None
+        capped = False
+        for order, (i, j) in enumerate(self._ranked_pairs(len(ranked_pilots), len(ranked_drones), pilot_conflicts, drone_conflicts)):
+            if order >= max_pairs:
+                capped = True
+                break
+            found = try_pair(order, i, j)
+            if found:
+                break
+
+        if capped:
+            # cap hit: check every candidate once, then walk pairs of clean ones only
+            # (instead of reporting no match while a valid pair sits further down)
+            clean_pilots = [i for i in range(len(ranked_pilots)) if not check_pilot(i)]
+            clean_drones = [j for j in range(len(ranked_drones)) if not check_drone(j)]
+            for order, (a, b) in enumerate(self._ranked_pairs(len(clean_pilots), len(clean_drones), {}, {}), start=max_pairs):
+                found = try_pair(order, clean_pilots[a], clean_drones[b])
+                if found:
+                    break
+
+        if found:
+            if skipped:
+                found["reason"] = f"{reason} (skipped {skipped} conflicting pair(s))"
+            return {"match": found, "near_misses": [], **rankings}
+
+        near.sort(key=lambda e: (-e[0], -e[1]))
+        return {
+            "match": None,
+            "near_misses": [{"pilot": p, "drone": d, "conflicts": c} for _, _, p, d, c in near],
+            **rankings,
+        }
+
+    def _ranked_pairs(self, n_pilots: int, n_drones: int, pilot_conflicts: Dict[int, List[str]], drone_conflicts: Dict[int, List[str]]):
+        """
+        Yields (pilot rank, drone rank) in increasing rank-sum order without
+        materializing the n_pilots x n_drones grid. Rows whose pilot already
+        failed its checks stop expanding; drones that already failed theirs are
+        stepped over, so each failing resource is paired at most once or twice.
+        """
 
-            eligible.append(p)
+        def next_drone(j):
+            while j < n_drones and drone_conflicts.get(j):
+                j += 1
+            return j
+
+        # (rank sum, pilot, drone, first cell of its row)
+        heap = [(0, 0, 0, True)] if n_pilots and n_drones else []
+        seen = {(0, 0)}
+        while heap:
+            _, i, j, row_start = heapq.heappop(heap)
+            # queued before the drone failed on an earlier row
+            if not drone_conflicts.get(j):
+                yield i, j
+            nxt = [(i + 1, next_drone(0), True)] if row_start else []
+            if not pilot_conflicts.get(i):
+                nxt.append((i, next_drone(j + 1), False))
+            for a, b, starts in nxt:
+                if a < n_pilots and b < n_drones and (a, b) not in seen:
+                    seen.add((a, b))
+                    heapq.heappush(heap, (a + b, a, b, starts))
 
-        # Sort pilots: prioritize Available first
-        eligible.sort(key=lambda x: str(x.get("status", "")).lower() != "available")
-        return eligible
+    # --------------------------------------------------
+    # PILOT FILTER
+    # --------------------------------------------------
+    def _filter_pilots(self, pilots, location, urgent, required_certs, mission=None, bookings=None):
+        # Normal mode: only available pilots; location + cert match via the roster index
+        positions = pilot_index(pilots).match(
+            statuses=None if urgent else ["available", "free", "active"],
+            location=location,
+            tags=required_certs,
+        )
+        mission = as_mission(mission) if mission is not None else None
+        positions = self._free_for_mission(pilot_availability(pilots), positions, mission, urgent, bookings)
+
+        # Rank by score (best first), lazily - callers usually read only the top few
+        return LazyRanking(pilots, positions, lambda p: self.scoring.score_pilot(p, mission, bookings))
 
     # --------------------------------------------------
     # DRONE FILTER
     # --------------------------------------------------
-    def _filter_drones(self, drones, location, urgent, required_capability):
-        eligible = []
-
-        for d in drones:
-            status = str(d.get("status", "")).lower()
-            drone_loc = str(d.get("location", "")).lower()
-            capability = str(d.get("capabilities", "")).lower()
-
-            # Normal mode: only available drones
-            if not urgent:
-                if status not in ["available", "ready", "free"]:
-                    continue
-
-            # Exclude maintenance always
-            if "maintenance" in status:
-                continue
-
-            # location match if provided
-            if location:
-                if location.lower() not in drone_loc:
-                    continue
-
-            # capability check
-            if required_capability:
-                if required_capability.lower() not in capability:
-                    continue
-
-            eligible.append(d)
-
-        eligible.sort(key=lambda x: str(x.get("status", "")).lower() != "available")
-        return eligible
+    def _filter_drones(self, drones, location, urgent, required_capability, mission=None, bookings=None):
+        # Normal mode: only available drones; maintenance always excluded
+        positions = drone_index(drones).match(
+            statuses=None if urgent else ["available", "ready", "free"],
+            exclude_status="maintenance",
+            location=location,
+            tag_substring=required_capability,
+        )
+        mission = as_mission(mission) if mission is not None else None
+        positions = self._free_for_mission(drone_availability(drones), positions, mission, urgent, bookings)
+
+        return LazyRanking(drones, positions, lambda d: self.scoring.score_drone(d, mission, bookings))
 
     # --------------------------------------------------
     # URGENT MODE - PILOT REASSIGNMENT
     # --------------------------------------------------
-    def _find_least_disruptive_pilot(self, pilots, location, required_certs):
+    def _find_least_disruptive_pilot(self, pilots, mission, bookings):
         """
-        Choose pilot whose current assignment ends earliest (least disruption)
+        Choose the pilot whose displacement costs least (fewest missions to re-cover,
+        then earliest-ending ones), from the missions sheet via UrgentReassigner
         """
-        candidates = []
-
-        for p in pilots:
-            status = str(p.get("status", "")).lower()
-            pilot_loc = str(p.get("location", "")).lower()
-
-            if location and location.lower() not in pilot_loc:
-                continue
-
-            pilot_certs = self._parse_list(p.get("certifications", ""))
-            if not self._has_all_certs(pilot_certs, required_certs):
-                continue
-
-            # only consider busy pilots for reassignment
-            if status in ["busy", "assigned", "deployed"]:
-                # Optional field if your sheet provides it
-                end_date = p.get("assigned_end") or p.get("AssignedEnd")
-                if end_date:
-                    candidates.append((p, end_date))
-
-        if not candidates:
-            return None
-
-        # sort by earliest end date
-        candidates.sort(key=lambda x: self._safe_date(x[1]))
-        return candidates[0][0]
+        return self._least_disruptive("pilot", pilots, mission, bookings)
 
     # --------------------------------------------------
     # URGENT MODE - DRONE REASSIGNMENT
     # --------------------------------------------------
-    def _find_least_disruptive_drone(self, drones, location, required_capability):
-        candidates = []
-
-        for d in drones:
-            status = str(d.get("status", "")).lower()
-            drone_loc = str(d.get("location", "")).lower()
-            capability = str(d.get("capabilities", "")).lower()
-
-            if "maintenance" in status:
-                continue
-
-            if location and location.lower() not in drone_loc:
-                continue
-
-            if required_capability and required_capability.lower() not in capability:
-                continue
-
-            if status in ["busy", "assigned", "deployed"]:
-                end_date = d.get("assigned_end") or d.get("AssignedEnd")
-                if end_date:
-                    candidates.append((d, end_date))
-
-        if not candidates:
-            return None
-
-        candidates.sort(key=lambda x: self._safe_date(x[1]))
-        return candidates[0][0]
+    def _find_least_disruptive_drone(self, drones, mission, bookings):
+        return self._least_disruptive("drone", drones, mission, bookings)
 
     # --------------------------------------------------
     # HELPERS
     # --------------------------------------------------
-    def _parse_list(self, value):
-        if not value:
-            return []
-        if isinstance(value, list):
-            return value
-        return [x.strip() for x in str(value).split(",") if x.strip()]
-
-    def _has_all_certs(self, pilot_certs, required_certs):
-        pilot_certs_lower = [c.lower() for c in pilot_certs]
-        for cert in required_certs:
-            if cert.lower() not in pilot_certs_lower:
-                return False
-        return True
-
-    def _safe_date(self, date_str):
+    def _free_for_mission(self, availability, positions, mission, urgent, bookings):
+        """
+        Drops candidates that can't fly during the mission dates (leave, available_from,
+        maintenance, overlapping missions). Urgent mode keeps busy-on-a-mission
+        candidates: displacing them is what urgent reassignment is for.
         """
-        Converts YYYY-MM-DD to datetime
+        if mission is None or mission.start is None:
+            return positions
+        start, end = mission_window(mission)
+        return availability.free(
+            positions,
+            start,
+            end,
+            bookings=None if urgent else bookings,
+            exclude_mission=mission.get("mission_id"),
+        )
+
+    def _first_unbooked(self, role, ranked, mission, bookings):
         """
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%d")
-        except:
-            return datetime.max
+        Best-ranked row with no mission overlapping the given one (ranks are read lazily).
+        """
+        key_column = ROLES[role][0]
+        start, end = mission_window(mission)
+        for row in ranked:
+            if not bookings.booked(role, row.get(key_column), start, end, exclude=mission.get("mission_id")):
+                return row
+        return None
+
+    def _least_disruptive(self, role, rows, mission, bookings):
+        # same availability / qualification gates as a normal assignment; only bookings are displaced
+        plan = self.reassigner.plan(role, rows, bookings.rows, mission, bookings)
+        return plan["resource"] if plan is not None else None
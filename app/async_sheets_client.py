@@ -0,0 +1,212 @@
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from app.sheets_client import BaseSheetsClient
+from app.snapshot_cache import SnapshotCache
+
+
+class AsyncSheetsClient(BaseSheetsClient):
+    """
+    asyncio version of SheetsClient (same get_*_data / update_* surface, all awaitable).
+    Used by the FastAPI app so in-flight Apps Script calls don't hold a worker thread.
+
+    Only the HTTP calls are awaited on the event loop; JSON parsing, record
+    building and merging into the snapshot cache run in worker threads
+    (asyncio.to_thread). Concurrent cache misses on one sheet share one fetch.
+    """
+
+    is_async = True
+
+    def __init__(
+        self,
+        script_url: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        batch_writes: bool = True,
+        cache_ttl: Optional[float] = 30.0,
+        cache_stale_ttl: float = 60.0,
+        delta_sync: bool = True,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        max_connections           -> cap on concurrent connections (requests queue beyond it)
+        max_keepalive_connections -> idle connections kept open for reuse
+        Other options match SheetsClient.
+        """
+        super().__init__(
+            script_url,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            batch_writes=batch_writes,
+            cache_ttl=cache_ttl,
+            cache_stale_ttl=cache_stale_ttl,
+            delta_sync=delta_sync,
+        )
+        self.client = client or httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            # Apps Script answers with a redirect to googleusercontent.com
+            follow_redirects=True,
+        )
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        # sheet -> in-flight load, awaited by every concurrent reader of that sheet
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    # -------------------------
+    # INTERNAL HELPERS
+    # -------------------------
+
+    async def _fetch_sheet(self, sheet_name: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        params = params or {"sheet": sheet_name}
+        with self._http_timer(sheet_name, self._read_action(params)):
+            res = await self.client.get(self.script_url, params=params)
+        # parsing and record building are CPU-bound: keep them off the event loop
+        return await asyncio.to_thread(self._parse_fetched, sheet_name, res)
+
+    def _parse_fetched(self, sheet_name: str, res: httpx.Response) -> Any:
+        with self._normalize_timer(sheet_name):
+            parsed = res.json() if res.status_code == 200 else None
+            return self._parse_sheet_response(sheet_name, res.status_code, res.text, parsed)
+
+    async def _get_sheet(self, sheet_name: str) -> List[Dict[str, Any]]:
+        if self.cache is None:
+            return await self._fetch_sheet(sheet_name)
+
+        table, state = self.cache.lookup(sheet_name)
+        if state == SnapshotCache.STALE:
+            self._refresh_in_background(sheet_name)
+        if table is not None:
+            return table
+
+        # one load per sheet at a time; shield: a cancelled reader doesn't cancel the others'
+        task = self._inflight.get(sheet_name)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._load_sheet(sheet_name))
+            self._inflight[sheet_name] = task
+            task.add_done_callback(lambda t: self._forget_load(sheet_name, t))
+        return await asyncio.shield(task)
+
+    async def _load_sheet(self, sheet_name: str) -> Any:
+        fetched = await self._fetch_sheet(sheet_name, self._sheet_params(sheet_name))
+        table = await asyncio.to_thread(self._sync_fetched, sheet_name, fetched)
+        if table is None:
+            fetched = await self._fetch_sheet(sheet_name, self._sheet_params(sheet_name))
+            table = await asyncio.to_thread(self._sync_fetched, sheet_name, fetched)
+        return table
+
+    def _forget_load(self, sheet_name: str, task: asyncio.Task):
+        if self._inflight.get(sheet_name) is task:
+            del self._inflight[sheet_name]
+        # every reader may have been cancelled: don't log the error as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def _refresh_in_background(self, sheet_name: str):
+        if not self.cache.begin_refresh(sheet_name):
+            return
+
+        async def run():
+            try:
+                rows = await self._fetch_sheet(sheet_name, self._sheet_params(sheet_name))
+            except Exception:
+                rows = None
+            await asyncio.to_thread(self.cache.finish_refresh, sheet_name, rows)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _post(self, payload: Dict[str, Any], what: str):
+        with self._http_timer(what, payload.get("action", "post")):
+            res = await self.client.post(
+                self.script_url,
+                content=json.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            )
+
+        if res.status_code != 200:
+            raise Exception(f"Update failed ({what}): {res.text}")
+
+        return res.json()
+
+    async def _update_cell(self, sheet: str, key_column: str, key_value: str, update_column: str, update_value: str):
+        update = self._cell_update(sheet, key_column, key_value, update_column, update_value)
+        result = await self._post({"action": "update", **update}, sheet)
+        self._apply_to_cache([update], result)
+        return result
+
+    async def _batch_update(self, updates: List[Dict[str, Any]]):
+        if not updates:
+            return {"status": "success", "updated": 0}
+
+        if not self.batch_writes:
+            result = None
+            for u in updates:
+                result = await self._update_cell(u["sheet"], u["keyColumn"], u["keyValue"], u["updateColumn"], u["updateValue"])
+            return result
+
+        sheets = sorted({u["sheet"] for u in updates})
+        result = await self._post({"action": "batchUpdate", "updates": updates}, ", ".join(sheets))
+        self._apply_to_cache(updates, result)
+        return result
+
+    # -------------------------
+    # READ FUNCTIONS
+    # -------------------------
+
+    async def get_pilot_data(self):
+        return await self._get_sheet("Pilots")
+
+    async def get_drone_data(self):
+        return await self._get_sheet("Drones")
+
+    async def get_mission_data(self):
+        return await self._get_sheet("missions")
+
+    async def load_tables(self, tables: Iterable[str]) -> Dict[str, Any]:
+        sheets = self._table_sheets(tables)
+        results = await asyncio.gather(*(self._get_sheet(sheet) for sheet in sheets.values()))
+        return dict(zip(sheets.keys(), results))
+
+    # -------------------------
+    # UPDATE FUNCTIONS
+    # -------------------------
+
+    async def update_pilot_status(self, pilot_name: str, status: str):
+        return await self._update_cell("Pilots", "name", pilot_name, "status", status)
+
+    async def update_drone_status(self, drone_id: str, status: str):
+        return await self._update_cell("Drones", "drone_id", drone_id, "status", status)
+
+    async def update_mission_assignment(self, mission_id: str, pilot_name: str, drone_id: str):
+        return await self._batch_update(self._mission_assignment_updates(mission_id, pilot_name, drone_id))
+
+    async def assign_mission(
+        self,
+        mission_id: str,
+        pilot_name: str,
+        drone_id: str,
+        pilot_status: Optional[str] = None,
+        drone_status: Optional[str] = None,
+    ):
+        return await self._batch_update(self._assignment_updates(mission_id, pilot_name, drone_id, pilot_status, drone_status))
+
+    async def assign_missions(self, assignments: List[Dict[str, Any]]):
+        return await self._batch_update(self._bulk_assignment_updates(assignments))
+
+    async def update_mission_status(self, mission_id: str, status: str):
+        return await self._update_cell("missions", "mission_id", mission_id, "status", status)
@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.booking_index import BookingIndex, IntervalTree
+from app.records import as_drone, as_pilot
+from app.snapshot_cache import SheetTable
+
+Block = Tuple[date, date, str]
+
+
+class AvailabilityIndex:
+    """
+    Time windows in which pilots / drones can NOT fly, from the roster / fleet sheet:
+
+    pilots -> before available_from, on leave (open-ended while the status says so), inactive
+    drones -> under maintenance (open-ended), the maintenance_due day(s), inactive / retired
+
+    All blocks of one sheet live in a single IntervalTree keyed by row
+    position, so "who is blocked between A and B" is one O(log n + k) query
+    instead of a scan. Mission windows are not duplicated here; free() asks
+    the BookingIndex for those, per candidate.
+    """
+
+    WATCHED = {"status", "available_from", "maintenance_due"}
+
+    # days a drone is grounded from maintenance_due
+    MAINTENANCE_DAYS = 1
+
+    def __init__(self, rows: List[Dict[str, Any]], role: str):
+        """
+        role -> "pilot" or "drone"
+        """
+        self.rows = rows
+        self.role = role
+        self.key_column = "name" if role == "pilot" else "drone_id"
+        self.tree = IntervalTree()
+        # row position -> blocks it was indexed under
+        self._blocks: Dict[int, List[Block]] = {}
+
+        for pos, row in enumerate(rows):
+            self._index_row(pos, row)
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+
+    def blocked(self, start: date, end: date) -> Dict[int, List[str]]:
+        """
+        row position -> reasons, for rows with a block overlapping [start, end].
+        """
+        found: Dict[int, List[str]] = {}
+        for _, _, key in self.tree.overlapping(start, end):
+            pos, reason = key
+            found.setdefault(pos, []).append(reason)
+        return found
+
+    def free(
+        self,
+        positions: Iterable[int],
+        start: date,
+        end: date,
+        bookings: Optional[BookingIndex] = None,
+        exclude_mission: Optional[str] = None,
+    ) -> List[int]:
+        """
+        positions (e.g. from pilot_index().match) with no block and, if bookings
+        is given, no overlapping mission in [start, end]. Keeps input order.
+        """
+        blocked: Set[int] = set(self.blocked(start, end))
+        free = []
+        for pos in positions:
+            if pos in blocked:
+                continue
+            if bookings is not None and bookings.booked(
+                self.role, self.rows[pos].get(self.key_column), start, end, exclude=exclude_mission
+            ):
+                continue
+            free.append(pos)
+        return free
+
+    def busy_reasons(self, pos: int, start: date, end: date, bookings: Optional[BookingIndex] = None) -> List[str]:
+        reasons = [reason for _, _, (p, reason) in self.tree.overlapping(start, end) if p == pos]
+        if bookings is not None:
+            key = self.rows[pos].get(self.key_column)
+            reasons.extend(f"on {mission_id} ({s} to {e})" for s, e, mission_id in bookings.booked(self.role, key, start, end))
+        return reasons
+
+    # -------------------------
+    # INCREMENTAL UPDATES
+    # -------------------------
+
+    def on_patch(self, pos: int, column: str, old_value: Any, new_value: Any):
+        if column not in self.WATCHED:
+            return
+        for start, end, key in self._blocks.pop(pos, []):
+            self.tree.remove(start, end, key)
+        self._index_row(pos, self.rows[pos])
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def _index_row(self, pos: int, row: Dict[str, Any]):
+        blocks = self._pilot_blocks(row) if self.role == "pilot" else self._drone_blocks(row)
+        entries = []
+        for start, end, reason in blocks:
+            key = (pos, reason)
+            self.tree.add(start, end, key)
+            entries.append((start, end, key))
+        if entries:
+            self._blocks[pos] = entries
+
+    def _pilot_blocks(self, row) -> List[Block]:
+        pilot = as_pilot(row)
+        status = pilot.status_key
+        available_from = pilot.available_from_date
+
+        if "inactive" in status:
+            return [(date.min, date.max, "inactive")]
+        if "leave" in status:
+            if available_from is None or available_from <= date.min:
+                return [(date.min, date.max, "on leave")]
+            # available_from is only the expected return; until the status changes the
+            # pilot stays blocked, including windows from that day on (stale / past dates)
+            return [
+                (date.min, self._day_before(available_from), f"on leave until {available_from}"),
+                (available_from, date.max, f"on leave (expected back {available_from})"),
+            ]
+        if available_from is not None:
+            return [(date.min, self._day_before(available_from), f"available from {available_from}")]
+        return []
+
+    def _drone_blocks(self, row) -> List[Block]:
+        drone = as_drone(row)
+        status = drone.status_key
+        due = drone.maintenance_due_date
+
+        if "inactive" in status or "retired" in status:
+            return [(date.min, date.max, status)]
+        if "maintenance" in status:
+            return [(date.min, date.max, "under maintenance")]
+        if due is not None:
+            days = timedelta(days=self.MAINTENANCE_DAYS - 1)
+            until = due + days if due <= date.max - days else date.max
+            return [(due, until, f"maintenance due {due}")]
+        return []
+
+    def _day_before(self, day: date) -> date:
+        # a block ending before date.min can't exist; (min, min) only hits queries that reach date.min
+        return day - timedelta(days=1) if day > date.min else date.min
+
+
+def pilot_availability(pilots: List[Dict[str, Any]]) -> AvailabilityIndex:
+    """
+    Availability index for a pilots table (cached on the snapshot when it is a SheetTable).
+    """
+    if isinstance(pilots, SheetTable):
+        return pilots.derived("pilot_availability", lambda t: AvailabilityIndex(t, "pilot"))
+    return AvailabilityIndex(pilots, "pilot")
+
+
+def drone_availability(drones: List[Dict[str, Any]]) -> AvailabilityIndex:
+    """
+    Availability index for a drones table (cached on the snapshot when it is a SheetTable).
+    """
+    if isinstance(drones, SheetTable):
+        return drones.derived("drone_availability", lambda t: AvailabilityIndex(t, "drone"))
+    return AvailabilityIndex(drones, "drone")
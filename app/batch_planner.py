@@ -0,0 +1,388 @@
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from app.availability_index import AvailabilityIndex, drone_availability, pilot_availability
+from app.booking_index import EMPTY_ASSIGNEES, IntervalTree, Window, mission_window
+from app.fleet_index import drone_index, pilot_index
+from app.records import Mission, as_drone, as_mission, as_pilot, norm
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+except ModuleNotFoundError:
+    # scipy not installed -> pure-Python Hungarian below (dense, fine for small fleets)
+    linear_sum_assignment = csr_matrix = min_weight_full_bipartite_matching = None
+
+# cost used for "not allowed" cells; pairs at this cost are never returned
+INFEASIBLE = 1e9
+# cost of leaving a row unmatched in the sparse solver; far above any real cost,
+# so matching more rows wins over matching them more cheaply
+UNMATCHED = 1e6
+
+
+def solve_assignment(cost: List[List[float]]) -> List[Tuple[int, int]]:
+    """
+    Min-cost rectangular assignment (rows -> distinct columns).
+    Returns (row, col) pairs with feasible cost only.
+    """
+    if not cost or not cost[0]:
+        return []
+
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(cost)
+        pairs = zip(rows.tolist(), cols.tolist())
+    else:
+        pairs = _hungarian(cost)
+
+    return [(r, c) for r, c in pairs if cost[r][c] < INFEASIBLE]
+
+
+def solve_sparse_assignment(n_rows: int, n_cols: int, edges: List[Tuple[int, int, float]]) -> List[Tuple[int, int]]:
+    """
+    Min-cost assignment over the given (row, col, cost) edges only (no duplicate
+    cells); rows with no usable edge stay unassigned. Returns (row, col) pairs.
+
+    With scipy the matrix is never densified (memory ~ edges, not rows x cols):
+    each row gets a private dummy column at UNMATCHED cost so a full matching
+    always exists. Without scipy it falls back to the dense Hungarian.
+    """
+    if not edges:
+        return []
+
+    if min_weight_full_bipartite_matching is None:
+        cost = [[INFEASIBLE] * n_cols for _ in range(n_rows)]
+        for r, c, w in edges:
+            cost[r][c] = w
+        return solve_assignment(cost)
+
+    rows = [r for r, _, _ in edges] + list(range(n_rows))
+    cols = [c for _, c, _ in edges] + list(range(n_cols, n_cols + n_rows))
+    # +1: zero-cost edges would otherwise read as missing entries
+    weights = [w + 1.0 for _, _, w in edges] + [UNMATCHED] * n_rows
+    graph = csr_matrix((weights, (rows, cols)), shape=(n_rows, n_cols + n_rows))
+    matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+    return [(r, c) for r, c in zip(matched_rows.tolist(), matched_cols.tolist()) if c < n_cols]
+
+
+def _hungarian(cost: List[List[float]]) -> List[Tuple[int, int]]:
+    """
+    O(n^2 * m) Hungarian algorithm (potentials), n <= m; transposes otherwise.
+    """
+    n, m = len(cost), len(cost[0])
+    if n > m:
+        return [(r, c) for c, r in _hungarian([list(col) for col in zip(*cost)])]
+
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = inf
+            j1 = 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    return [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+
+
+class BatchPlanner:
+    """
+    Assigns every open mission at once instead of one greedy match at a time.
+
+    Candidates are pruned up front (status, location, required certs /
+    capability, then leave / available_from / maintenance via the
+    AvailabilityIndex for the mission dates). For each mission location the
+    remaining pairs are matched by sparse min-cost assignment (scipy; dense
+    Hungarian without it) over the allowed pairs only, so cost and memory
+    follow the number of candidate pairs, not missions x resources. Date
+    overlap with the resource's other missions removes a pair. Rounds repeat
+    so one resource can take several non-overlapping missions. Undated
+    missions are treated as overlapping everything. Drones are matched only
+    to missions that got a pilot; pilots are re-solved without any mission
+    no drone is left for.
+    """
+
+    PILOT_STATUSES = ["available", "free", "active"]
+    DRONE_STATUSES = ["available", "ready", "free"]
+
+    def __init__(self, max_rounds: int = 10):
+        self.max_rounds = max_rounds
+
+    # --------------------------------------------------
+    # MAIN ENTRY
+    # --------------------------------------------------
+    def plan(self, pilots, drones, missions) -> Dict[str, Any]:
+        """
+        Returns:
+        {
+          "assignments": [{"mission_id", "pilot", "drone", "cost"}],
+          "unassigned":  [{"mission_id", "reason"}]
+        }
+        pilot / drone are the roster rows.
+        """
+        open_missions = [as_mission(m) for m in missions if self._is_open(m)]
+
+        pilot_windows = self._committed_windows(missions, "assigned_pilot")
+        drone_windows = self._committed_windows(missions, "assigned_drone")
+
+        pilot_idx = pilot_index(pilots)
+        drone_idx = drone_index(drones)
+        pilot_free = pilot_availability(pilots)
+        drone_free = drone_availability(drones)
+        # mission window -> blocked row positions; many missions share dates
+        pilot_blocked: Dict[Window, Set[int]] = {}
+        drone_blocked: Dict[Window, Set[int]] = {}
+
+        pilot_candidates = {
+            i: self._free(pilot_free, pilot_blocked, m, pilot_idx.match(
+                statuses=self.PILOT_STATUSES,
+                location=m.get("location"),
+                tags=m.required_cert_list,
+            ))
+            for i, m in enumerate(open_missions)
+        }
+        drone_candidates = {
+            i: self._free(drone_free, drone_blocked, m, drone_idx.match(
+                statuses=self.DRONE_STATUSES,
+                exclude_status="maintenance",
+                location=m.get("location"),
+                tag_substring=m.get("required_capability"),
+            ))
+            for i, m in enumerate(open_missions)
+        }
+
+        # only missions both sides can staff. Drones are matched to the missions that
+        # got a pilot; a mission no drone is left for is dropped and pilots re-solved
+        # without it, so no pilot is spent on a mission that ends up unassigned.
+        viable = {i for i in pilot_candidates if pilot_candidates[i] and drone_candidates[i]}
+        short: Dict[int, str] = {}
+        pilot_pick: Dict[int, Tuple[int, float]] = {}
+        drone_pick: Dict[int, Tuple[int, float]] = {}
+        for _ in range(self.max_rounds):
+            pilot_pick = self._assign_resources(
+                open_missions, {i: pilot_candidates[i] for i in viable}, pilots, "name", pilot_windows, self._pilot_cost
+            )
+            drone_pick = self._assign_resources(
+                open_missions, {i: drone_candidates[i] for i in pilot_pick}, drones, "drone_id", drone_windows, self._drone_cost
+            )
+            dropped = pilot_pick.keys() - drone_pick.keys()
+            if not dropped:
+                break
+            for i in dropped:
+                short[i] = "drone"
+            viable -= dropped
+
+        assignments = []
+        unassigned = []
+        for i, m in enumerate(open_missions):
+            mission_id = m.get("mission_id")
+            p = pilot_pick.get(i)
+            d = drone_pick.get(i)
+            if p is None or d is None:
+                unassigned.append({"mission_id": mission_id, "reason": self._reason(
+                    pilot_candidates[i], drone_candidates[i], short.get(i, "pilot" if p is None else "drone")
+                )})
+                continue
+            assignments.append({
+                "mission_id": mission_id,
+                "pilot": pilots[p[0]],
+                "drone": drones[d[0]],
+                "cost": round(p[1] + d[1], 3),
+            })
+
+        return {"assignments": assignments, "unassigned": unassigned}
+
+    # --------------------------------------------------
+    # ROUND-BASED MIN-COST MATCHING
+    # --------------------------------------------------
+    def _assign_resources(
+        self,
+        missions: List[Mission],
+        candidates: Dict[int, List[int]],
+        rows: Sequence[Dict[str, Any]],
+        key_column: str,
+        committed: Dict[str, List[Window]],
+        cost_fn,
+    ) -> Dict[int, Tuple[int, float]]:
+        """
+        mission index -> (resource row position, cost)
+        """
+        picked: Dict[int, Tuple[int, float]] = {}
+
+        # the candidates' existing missions in one tree keyed by row position
+        booked = IntervalTree()
+        for pos in {pos for positions in candidates.values() for pos in positions}:
+            for start, end in committed.get(norm(rows[pos].get(key_column)), []):
+                booked.add(start, end, pos)
+        # mission window -> positions booked during it; one tree query per distinct window
+        clashes: Dict[Window, Set[int]] = {}
+        # position -> windows planned here (seen by later groups sharing a candidate)
+        planned: Dict[int, List[Window]] = {}
+
+        groups: Dict[str, List[int]] = {}
+        for i, m in enumerate(missions):
+            if candidates.get(i):
+                groups.setdefault(m.location_key, []).append(i)
+
+        for group in groups.values():
+            # mission -> {resource: cost} for resources free on its dates; after this it
+            # only shrinks, for the resources picked in the round before
+            live: Dict[int, Dict[int, float]] = {}
+            for i in group:
+                window = mission_window(missions[i])
+                if window not in clashes:
+                    clashes[window] = {pos for _, _, pos in booked.overlapping(*window)}
+                busy = clashes[window]
+                live[i] = {
+                    pos: cost_fn(missions[i], rows[pos])
+                    for pos in candidates[i]
+                    if pos not in busy and not (pos in planned and self._overlaps(window, planned[pos]))
+                }
+
+            for _ in range(self.max_rounds):
+                pending = [i for i in group if i not in picked and live[i]]
+                if not pending:
+                    break
+
+                columns = sorted({pos for i in pending for pos in live[i]})
+                column_of = {pos: c for c, pos in enumerate(columns)}
+                edges = [(r, column_of[pos], cost) for r, i in enumerate(pending) for pos, cost in live[i].items()]
+
+                pairs = solve_sparse_assignment(len(pending), len(columns), edges)
+                if not pairs:
+                    break
+                taken: Dict[int, Window] = {}
+                for r, c in pairs:
+                    i, pos = pending[r], columns[c]
+                    picked[i] = (pos, live[i][pos])
+                    taken[pos] = mission_window(missions[i])
+                    planned.setdefault(pos, []).append(taken[pos])
+
+                for i in pending:
+                    if i in picked:
+                        continue
+                    window = mission_window(missions[i])
+                    for pos in live[i].keys() & taken.keys():
+                        if self._overlaps(window, [taken[pos]]):
+                            del live[i][pos]
+
+        return picked
+
+    def _free(
+        self, availability: AvailabilityIndex, blocked: Dict[Window, Set[int]], mission: Mission, positions: List[int]
+    ) -> List[int]:
+        """
+        positions not on leave / before available_from / in maintenance during the
+        mission, like AvailabilityIndex.free but one tree query per distinct window.
+        Undated missions skip this.
+        """
+        if mission.start is None:
+            return positions
+        window = mission_window(mission)
+        if window not in blocked:
+            blocked[window] = set(availability.blocked(*window))
+        return [pos for pos in positions if pos not in blocked[window]]
+
+    # --------------------------------------------------
+    # COSTS (lower is better)
+    # --------------------------------------------------
+    def _pilot_cost(self, mission: Mission, pilot) -> float:
+        pilot = as_pilot(pilot)
+        missing_skills = len(mission.required_skill_set - pilot.skill_set)
+        return 2.0 * missing_skills + (0.0 if pilot.status_key == "available" else 0.5)
+
+    def _drone_cost(self, mission: Mission, drone) -> float:
+        drone = as_drone(drone)
+        return 0.0 if drone.status_key == "available" else 0.5
+
+    # --------------------------------------------------
+    # HELPERS
+    # --------------------------------------------------
+    def _is_open(self, mission) -> bool:
+        m = as_mission(mission)
+        if not m.get("mission_id"):
+            return False
+        if m.status_key in ["assigned", "completed"]:
+            return False
+        return norm(m.get("assigned_pilot")) in EMPTY_ASSIGNEES
+
+    def _reason(self, pilot_candidates, drone_candidates, short: str) -> str:
+        """
+        Why a mission stayed unassigned: no compatible candidate at all, or the
+        compatible ones all went to other missions on overlapping dates.
+        """
+        incompatible = [x for x, cands in (("pilot", pilot_candidates), ("drone", drone_candidates)) if not cands]
+        if incompatible:
+            return f"No compatible {' and '.join(incompatible)}"
+        return f"No free {short} (compatible ones are booked on these dates)"
+
+    def _committed_windows(self, missions, column: str) -> Dict[str, List[Window]]:
+        """
+        resource name/id (normalized) -> date windows of missions already assigned to it
+        """
+        committed: Dict[str, List[Window]] = {}
+        for m in missions:
+            m = as_mission(m)
+            if m.status_key == "completed":
+                continue
+            key = norm(m.get(column))
+            if key not in EMPTY_ASSIGNEES:
+                committed.setdefault(key, []).append(mission_window(m))
+        return committed
+
+    def _overlaps(self, window: Window, others: List[Window]) -> bool:
+        return any(window[0] <= o[1] and o[0] <= window[1] for o in others)
+
+
+def assignment_status(mission_ids: List[str]) -> str:
+    return f"Assigned({', '.join(mission_ids)})"
+
+
+def group_by_resource(assignments: List[Dict[str, Any]], role: str, key_column: str) -> Dict[str, List[str]]:
+    """
+    resource name/id -> mission ids assigned to it in this plan (plan order)
+    """
+    grouped: Dict[str, List[str]] = {}
+    for a in assignments:
+        grouped.setdefault(str(a[role].get(key_column)), []).append(a["mission_id"])
+    return grouped
+
+
+def plan_status_updates(assignments: List[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    (pilot name -> status, drone id -> status) for a plan,
+    e.g. a pilot given M001 and M004 -> "Assigned(M001, M004)".
+    """
+    pilots = {k: assignment_status(v) for k, v in group_by_resource(assignments, "pilot", "name").items()}
+    drones = {k: assignment_status(v) for k, v in group_by_resource(assignments, "drone", "drone_id").items()}
+    return pilots, drones
@@ -0,0 +1,185 @@
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.records import Mission, as_mission, norm
+from app.snapshot_cache import SheetTable
+
+Window = Tuple[date, date]
+
+# assigned_pilot / assigned_drone values that mean "nobody"
+EMPTY_ASSIGNEES = {"", "-", "–"}
+
+
+def mission_window(mission: Mission) -> Window:
+    """
+    (start, end) of a mission. Undated missions overlap everything;
+    a missing end date means a one-day mission.
+    """
+    start = mission.start or date.min
+    end = mission.end or (date.max if mission.start is None else mission.start)
+    return (start, end)
+
+
+class IntervalTree:
+    """
+    Date intervals of one pilot / drone, kept sorted by start.
+
+    Queries walk an implicit balanced tree over the sorted list where each
+    node stores the max end of its subtree, so "what overlaps [start, end]"
+    is O(log n + k). Adds/removes are list inserts; the max-end array is
+    rebuilt lazily on the next query.
+    """
+
+    def __init__(self):
+        self._items: List[Tuple[date, date, str]] = []
+        self._max_end: List[date] = []
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, start: date, end: date, key: str):
+        insort(self._items, (start, end, key))
+        self._dirty = True
+
+    def remove(self, start: date, end: date, key: str) -> bool:
+        item = (start, end, key)
+        i = bisect_left(self._items, item)
+        if i < len(self._items) and self._items[i] == item:
+            del self._items[i]
+            self._dirty = True
+            return True
+        return False
+
+    def overlapping(self, start: date, end: date) -> List[Tuple[date, date, str]]:
+        """
+        Intervals that share at least one day with [start, end], in start order.
+        """
+        if self._dirty:
+            self._max_end = [date.min] * len(self._items)
+            self._build(0, len(self._items))
+            self._dirty = False
+
+        found: List[Tuple[date, date, str]] = []
+        self._query(0, len(self._items), start, end, found)
+        return found
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def _build(self, lo: int, hi: int) -> date:
+        if lo >= hi:
+            return date.min
+        mid = (lo + hi) // 2
+        best = max(self._items[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        self._max_end[mid] = best
+        return best
+
+    def _query(self, lo: int, hi: int, start: date, end: date, found: list):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] < start:
+            # everything in this subtree ends before the window
+            return
+        self._query(lo, mid, start, end, found)
+        item = self._items[mid]
+        if item[0] > end:
+            # mid and everything right of it start after the window
+            return
+        if item[1] >= start:
+            found.append(item)
+        self._query(mid + 1, hi, start, end, found)
+
+
+class BookingIndex:
+    """
+    Per-resource interval index over the missions sheet:
+
+    pilots -> normalized assigned_pilot -> IntervalTree of mission windows
+    drones -> normalized assigned_drone -> IntervalTree of mission windows
+
+    Completed missions and missions without an assignee are left out.
+    Writes to the assignment / date / status columns re-index just that
+    mission (on_patch), so the index follows assignments as they are made.
+    """
+
+    WATCHED = {"assigned_pilot", "assigned_drone", "start_date", "end_date", "status", "mission_id"}
+
+    def __init__(self, missions: List[Dict[str, Any]]):
+        self.rows = missions
+        self.pilots: Dict[str, IntervalTree] = {}
+        self.drones: Dict[str, IntervalTree] = {}
+        # row position -> what it was indexed under
+        self._entries: Dict[int, List[Tuple[Dict[str, IntervalTree], str, date, date, str]]] = {}
+
+        for pos, row in enumerate(missions):
+            self._index_row(pos, row)
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+
+    def pilot_bookings(self, pilot_name: Any, start: date, end: date, exclude: Optional[str] = None) -> List[str]:
+        return [mission_id for _, _, mission_id in self.booked("pilot", pilot_name, start, end, exclude)]
+
+    def drone_bookings(self, drone_id: Any, start: date, end: date, exclude: Optional[str] = None) -> List[str]:
+        return [mission_id for _, _, mission_id in self.booked("drone", drone_id, start, end, exclude)]
+
+    def booked(self, role: str, key: Any, start: date, end: date, exclude: Optional[str] = None) -> List[Tuple[date, date, str]]:
+        """
+        (start, end, mission_id) of the missions the pilot / drone is on that overlap [start, end].
+        role -> "pilot" or "drone"
+        """
+        tree = (self.pilots if role == "pilot" else self.drones).get(norm(key))
+        if tree is None:
+            return []
+        skip = norm(exclude)
+        return [item for item in tree.overlapping(start, end) if norm(item[2]) != skip]
+
+    # -------------------------
+    # INCREMENTAL UPDATES
+    # -------------------------
+
+    def on_patch(self, pos: int, column: str, old_value: Any, new_value: Any):
+        if column not in self.WATCHED:
+            return
+        for trees, key, start, end, mission_id in self._entries.pop(pos, []):
+            tree = trees.get(key)
+            if tree is not None:
+                tree.remove(start, end, mission_id)
+                if not len(tree):
+                    del trees[key]
+        self._index_row(pos, self.rows[pos])
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def _index_row(self, pos: int, row: Dict[str, Any]):
+        mission = as_mission(row)
+        if mission.status_key == "completed":
+            return
+        mission_id = str(mission.get("mission_id") or "").strip()
+        start, end = mission_window(mission)
+
+        entries = []
+        for trees, column in ((self.pilots, "assigned_pilot"), (self.drones, "assigned_drone")):
+            key = norm(mission.get(column))
+            if key in EMPTY_ASSIGNEES:
+                continue
+            trees.setdefault(key, IntervalTree()).add(start, end, mission_id)
+            entries.append((trees, key, start, end, mission_id))
+        if entries:
+            self._entries[pos] = entries
+
+
+def booking_index(missions: List[Dict[str, Any]]) -> BookingIndex:
+    """
+    Booking index for a missions table (cached on the snapshot when it is a SheetTable).
+    """
+    if isinstance(missions, SheetTable):
+        return missions.derived("booking_index", BookingIndex)
+    return BookingIndex(missions)
@@ -1,4 +1,8 @@
 from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.booking_index import EMPTY_ASSIGNEES, BookingIndex, mission_window
+from app.records import as_drone, as_mission, as_pilot, norm, parse_date
 
 
 class ConflictDetector:
@@ -8,82 +12,215 @@ class ConflictDetector:
     # ----------------------------
     # MAIN FUNCTION
     # ----------------------------
-    def check_conflicts(self, pilot: dict, drone: dict, project: str, project_req: dict = None):
+    def check_conflicts(self, pilot: dict, drone: dict, project: str, project_req: dict = None, bookings: BookingIndex = None):
         """
         project_req example:
         {
+          "mission_id": "M001",
           "location": "Bangalore",
           "start_date": "2026-02-10",
           "end_date": "2026-02-12",
           "required_certs": ["DGCA", "BVLOS"]
         }
+
+        bookings -> BookingIndex over the missions sheet; when given (and the
+        project has dates) double booking is checked against real mission dates.
         """
+        return (
+            self.pilot_conflicts(pilot, project, project_req, bookings)
+            + self.drone_conflicts(drone, project, project_req, bookings)
+            + self.pair_conflicts(pilot, drone)
+        )
 
+    # ----------------------------
+    # PER-RESOURCE CHECKS
+    # (also used as pruning predicates by AssignmentEngine.search_match)
+    # ----------------------------
+    def pilot_conflicts(
+        self, pilot: dict, project: str, project_req: dict = None, bookings: BookingIndex = None, check_bookings: bool = True
+    ) -> List[str]:
+        """
+        Conflicts that depend only on the pilot: location, certifications, double booking.
+        check_bookings=False skips double booking (what an urgent reassignment can resolve).
+        """
         conflicts = []
 
         # Defaults if no project requirements provided
         if project_req is None:
             project_req = {}
 
-        # ----------------------------
-        # 1) Drone Maintenance Conflict
-        # ----------------------------
-        drone_status = str(drone.get("status", "")).lower()
-        if "maintenance" in drone_status:
-            conflicts.append(f"Drone {drone.get('drone_id')} is under maintenance")
+        # Typed records carry pre-parsed status/location/certs; plain dicts are parsed once here
+        pilot = as_pilot(pilot)
+
+        # Location mismatch
+        project_loc = norm(project_req.get("location", ""))
+        if project_loc and pilot.location_key and project_loc != pilot.location_key:
+            conflicts.append(f"Pilot is in {pilot.get('location')} but project is in {project_req.get('location')}")
 
-        # ----------------------------
-        # 2) Location Mismatch Conflict
-        # ----------------------------
-        pilot_loc = str(pilot.get("location", "")).strip().lower()
-        drone_loc = str(drone.get("location", "")).strip().lower()
-        project_loc = str(project_req.get("location", "")).strip().lower()
-
-        if pilot_loc and drone_loc and pilot_loc != drone_loc:
-            conflicts.append(
-                f"Pilot is in {pilot.get('location')} but drone is in {drone.get('location')}"
-            )
-        if project_loc:
-            if pilot_loc and project_loc != pilot_loc:
-                conflicts.append(f"Pilot is in {pilot.get('location')} but project is in {project_req.get('location')}")
-            if drone_loc and project_loc != drone_loc:
-                conflicts.append(f"Drone is in {drone.get('location')} but project is in {project_req.get('location')}")
-
-        # ----------------------------
-        # 3) Certification Mismatch
-        # ----------------------------
-        required_certs = project_req.get("required_certs", [])
-        pilot_certs = self._parse_list(pilot.get("certifications", ""))
-
-        for cert in required_certs:
-            if cert.lower() not in [c.lower() for c in pilot_certs]:
+        # Certification mismatch
+        for cert in project_req.get("required_certs", []):
+            if norm(cert) not in pilot.cert_set:
                 conflicts.append(f"Pilot {pilot.get('name')} does not have required certification: {cert}")
 
-        # ----------------------------
-        # 4) Double Booking / Busy Conflict (best-effort)
-        # ----------------------------
-        pilot_status = str(pilot.get("status", "")).lower()
-        pilot_assignment = str(pilot.get("current_assignment", "")).strip()
-        if pilot_status in {"assigned", "busy", "deployed"} and pilot_assignment and pilot_assignment != "-" and pilot_assignment.lower() != project.lower():
-            conflicts.append(f"Pilot {pilot.get('name')} is already assigned to {pilot_assignment}")
+        # Double booking
+        if check_bookings:
+            conflicts.extend(self._booking_conflicts(pilot, "Pilot", pilot.get("name"), project, project_req, bookings))
+        return conflicts
+
+    def drone_conflicts(
+        self, drone: dict, project: str, project_req: dict = None, bookings: BookingIndex = None, check_bookings: bool = True
+    ) -> List[str]:
+        """
+        Conflicts that depend only on the drone: maintenance, location, double booking.
+        check_bookings=False skips double booking.
+        """
+        conflicts = []
+
+        if project_req is None:
+            project_req = {}
+
+        drone = as_drone(drone)
 
-        drone_assignment = str(drone.get("current_assignment", "")).strip()
-        if str(drone.get("status", "")).lower() in {"assigned", "busy", "deployed"} and drone_assignment and drone_assignment != "-" and drone_assignment.lower() != project.lower():
-            conflicts.append(f"Drone {drone.get('drone_id')} is already assigned to {drone_assignment}")
+        # Drone maintenance
+        if "maintenance" in drone.status_key:
+            conflicts.append(f"Drone {drone.get('drone_id')} is under maintenance")
 
+        # Location mismatch
+        project_loc = norm(project_req.get("location", ""))
+        if project_loc and drone.location_key and project_loc != drone.location_key:
+            conflicts.append(f"Drone is in {drone.get('location')} but project is in {project_req.get('location')}")
+
+        # Double booking
+        if check_bookings:
+            conflicts.extend(self._booking_conflicts(drone, "Drone", drone.get("drone_id"), project, project_req, bookings))
         return conflicts
 
+    def pair_conflicts(self, pilot: dict, drone: dict) -> List[str]:
+        """
+        Conflicts between the pilot and the drone themselves (different cities).
+        """
+        pilot = as_pilot(pilot)
+        drone = as_drone(drone)
+
+        if pilot.location_key and drone.location_key and pilot.location_key != drone.location_key:
+            return [f"Pilot is in {pilot.get('location')} but drone is in {drone.get('location')}"]
+        return []
+
+    def _booking_conflicts(self, row, kind: str, label: Any, project: str, project_req: dict, bookings: BookingIndex) -> List[str]:
+        start = parse_date(project_req.get("start_date"))
+        end = parse_date(project_req.get("end_date")) or start
+
+        if bookings is not None and start is not None:
+            # date overlap against the missions this resource is already assigned to
+            lookup = bookings.pilot_bookings if kind == "Pilot" else bookings.drone_bookings
+            others = lookup(label, start, end, exclude=project_req.get("mission_id"))
+            return [f"{kind} {label} is already booked on {other} during {start} to {end}" for other in others]
+
+        # Best-effort fallback: status / current_assignment strings
+        assignment = str(row.get("current_assignment", "")).strip()
+        if row.status_key in {"assigned", "busy", "deployed"} and assignment and assignment != "-" and assignment.lower() != project.lower():
+            return [f"{kind} {label} is already assigned to {assignment}"]
+        return []
+
     # ----------------------------
-    # HELPERS
+    # FLEET-WIDE AUDIT
     # ----------------------------
-    def _parse_list(self, value):
+    def audit(self, pilots, drones, missions) -> Dict[str, Any]:
+        """
+        Checks every assigned (not completed) mission against the roster and fleet:
+
+        double_booking      -> pilot / drone on two missions with overlapping dates
+        missing_cert        -> assigned pilot lacks a required certification
+        location_mismatch   -> pilot / drone not at the mission location
+        maintenance         -> drone under maintenance, or maintenance_due inside the mission window
+        unknown_resource    -> assigned pilot / drone not in the roster / fleet
+
+        Returns {"summary": {type: count}, "conflicts": [{"type", "mission_id", "resource", "detail"}]}
+        """
+        pilots_by_name = self._by_key((as_pilot(p) for p in pilots), "name")
+        drones_by_id = self._by_key((as_drone(d) for d in drones), "drone_id")
+
+        conflicts: List[Dict[str, str]] = []
+        # (resource key, start, end, mission_id) for the sweep
+        pilot_spans: List[Tuple[str, Any, Any, str]] = []
+        drone_spans: List[Tuple[str, Any, Any, str]] = []
+
+        def add(kind, mission_id, resource, detail):
+            conflicts.append({"type": kind, "mission_id": mission_id, "resource": resource, "detail": detail})
+
+        for m in missions:
+            m = as_mission(m)
+            if m.status_key == "completed":
+                continue
+            pilot_key = norm(m.get("assigned_pilot"))
+            drone_key = norm(m.get("assigned_drone"))
+            if pilot_key in EMPTY_ASSIGNEES and drone_key in EMPTY_ASSIGNEES:
+                continue
+
+            mission_id = str(m.get("mission_id") or "").strip()
+            start, end = mission_window(m)
+            location = m.location_key
+
+            if pilot_key not in EMPTY_ASSIGNEES:
+                pilot_spans.append((pilot_key, start, end, mission_id))
+                pilot = pilots_by_name.get(pilot_key)
+                name = m.get("assigned_pilot")
+                if pilot is None:
+                    add("unknown_resource", mission_id, name, f"Pilot {name} is not in the roster")
+                else:
+                    for cert in m.required_cert_list:
+                        if norm(cert) not in pilot.cert_set:
+                            add("missing_cert", mission_id, name, f"Pilot {name} does not have required certification: {cert}")
+                    if location and pilot.location_key and pilot.location_key != location:
+                        add("location_mismatch", mission_id, name, f"Pilot is in {pilot.get('location')} but mission is in {m.get('location')}")
+
+            if drone_key not in EMPTY_ASSIGNEES:
+                drone_spans.append((drone_key, start, end, mission_id))
+                drone = drones_by_id.get(drone_key)
+                drone_id = m.get("assigned_drone")
+                if drone is None:
+                    add("unknown_resource", mission_id, drone_id, f"Drone {drone_id} is not in the fleet")
+                else:
+                    if location and drone.location_key and drone.location_key != location:
+                        add("location_mismatch", mission_id, drone_id, f"Drone is in {drone.get('location')} but mission is in {m.get('location')}")
+                    due = drone.maintenance_due_date
+                    if "maintenance" in drone.status_key:
+                        add("maintenance", mission_id, drone_id, f"Drone {drone_id} is under maintenance")
+                    elif due is not None and start <= due <= end:
+                        add("maintenance", mission_id, drone_id, f"Drone {drone_id} maintenance due {due} inside mission window")
+
+        for kind, spans in (("Pilot", pilot_spans), ("Drone", drone_spans)):
+            for resource, first, second in self._sweep_overlaps(spans):
+                label = pilots_by_name.get(resource) if kind == "Pilot" else drones_by_id.get(resource)
+                name = label.get("name" if kind == "Pilot" else "drone_id") if label is not None else resource
+                add("double_booking", second, name, f"{kind} {name} is booked on {first} and {second} with overlapping dates")
+
+        summary: Dict[str, int] = {}
+        for c in conflicts:
+            summary[c["type"]] = summary.get(c["type"], 0) + 1
+        return {"summary": summary, "conflicts": conflicts}
+
+    def _sweep_overlaps(self, spans: List[Tuple[str, Any, Any, str]]) -> Iterable[Tuple[str, str, str]]:
         """
-        Converts comma separated string -> list
-        Example: "DGCA, BVLOS" -> ["DGCA", "BVLOS"]
+        One sort by (resource, start), then a single pass per resource keeping the
+        interval that reaches furthest: any later interval starting on or before
+        its end overlaps it. Yields (resource, earlier mission, later mission).
         """
-        if not value:
-            return []
-        if isinstance(value, list):
-            return value
+        spans.sort()
+        current = None
+        reach = None
+        reach_id = None
+        for resource, start, end, mission_id in spans:
+            if resource != current:
+                current, reach, reach_id = resource, end, mission_id
+                continue
+            if start <= reach:
+                yield resource, reach_id, mission_id
+            if end > reach:
+                reach, reach_id = end, mission_id
 
-        return [x.strip() for x in str(value).split(",") if x.strip()]
+    def _by_key(self, rows, column: str) -> Dict[str, Any]:
+        by_key: Dict[str, Any] = {}
+        for row in rows:
+            by_key.setdefault(norm(row.get(column)), row)
+        return by_key
@@ -0,0 +1,178 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from app.records import Record, norm, parse_tags
+from app.snapshot_cache import SheetTable
+
+try:
+    from app.vector_index import VectorIndex
+except ModuleNotFoundError:
+    # numpy not installed -> set-based FleetIndex only
+    VectorIndex = None
+
+# below this many rows set intersection beats NumPy's per-call overhead
+# (measured: sets ~4x faster at 100 rows, about even at 2k, NumPy ~4x faster at 20k)
+VECTOR_MIN_ROWS = 2000
+
+
+class FleetIndex:
+    """
+    Secondary indexes over one roster/fleet snapshot (row positions):
+
+    by_status   -> normalized status   -> {pos}
+    by_location -> normalized location -> {pos}
+    by_tag      -> cert / capability   -> {pos}   (tag_column split on ",")
+
+    Built once per snapshot; status/location/tag writes move a row between
+    buckets incrementally (on_patch), so filtering is set intersection
+    instead of re-scanning and re-parsing every row.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], tag_column: str):
+        self.tag_column = tag_column
+        self.by_status: Dict[str, Set[int]] = {}
+        self.by_location: Dict[str, Set[int]] = {}
+        self.by_tag: Dict[str, Set[int]] = {}
+        self.size = 0
+
+        for pos, row in enumerate(rows):
+            if isinstance(row, Record):
+                # pre-parsed once at load time
+                status, location, tags = row.status_key, row.location_key, row.tag_set(tag_column) or ()
+            else:
+                status, location, tags = self._norm(row.get("status")), self._norm(row.get("location")), self._tags(row.get(tag_column))
+            self._add(self.by_status, status, pos)
+            self._add(self.by_location, location, pos)
+            for tag in tags:
+                self._add(self.by_tag, tag, pos)
+            self.size = pos + 1
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+
+    def match(
+        self,
+        statuses: Optional[Iterable[str]] = None,
+        exclude_status: Optional[str] = None,
+        location: Optional[str] = None,
+        tags: Iterable[str] = (),
+        tag_substring: Optional[str] = None,
+    ) -> List[int]:
+        """
+        Returns matching row positions in sheet order.
+
+        statuses       -> status must be one of these (None = any)
+        exclude_status -> drop rows whose status contains this text (e.g. "maintenance")
+        location       -> location contains this text (same semantics as the old scan)
+        tags           -> row must have all these tags (exact, case-insensitive)
+        tag_substring  -> some tag contains this text (e.g. "thermal")
+        """
+        candidates: List[Set[int]] = []
+
+        if statuses is not None:
+            candidates.append(self._union(self.by_status.get(self._norm(s), ()) for s in statuses))
+
+        if location:
+            needle = self._norm(location)
+            candidates.append(self._union(p for key, p in list(self.by_location.items()) if needle in key))
+
+        for tag in tags:
+            candidates.append(self.by_tag.get(self._norm(tag), set()))
+
+        if tag_substring:
+            needle = self._norm(tag_substring)
+            candidates.append(self._union(p for key, p in list(self.by_tag.items()) if needle in key))
+
+        if candidates:
+            candidates.sort(key=len)
+            result = set(candidates[0])
+            for other in candidates[1:]:
+                result &= other
+                if not result:
+                    break
+        else:
+            result = set(range(self.size))
+
+        if exclude_status:
+            needle = self._norm(exclude_status)
+            for key, p in list(self.by_status.items()):
+                if needle in key:
+                    result -= p
+
+        return sorted(result)
+
+    # -------------------------
+    # INCREMENTAL UPDATES
+    # -------------------------
+
+    def on_patch(self, pos: int, column: str, old_value: Any, new_value: Any):
+        if column == "status":
+            self._move(self.by_status, self._norm(old_value), self._norm(new_value), pos)
+        elif column == "location":
+            self._move(self.by_location, self._norm(old_value), self._norm(new_value), pos)
+        elif column == self.tag_column:
+            for tag in self._tags(old_value):
+                self._discard(self.by_tag, tag, pos)
+            for tag in self._tags(new_value):
+                self._add(self.by_tag, tag, pos)
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def _norm(self, value: Any) -> str:
+        return norm(value)
+
+    def _tags(self, value: Any) -> FrozenSet[str]:
+        return parse_tags(value)
+
+    def _union(self, sets: Iterable[Iterable[int]]) -> Set[int]:
+        result: Set[int] = set()
+        for s in sets:
+            result.update(s)
+        return result
+
+    def _add(self, index: Dict[str, Set[int]], key: str, pos: int):
+        index.setdefault(key, set()).add(pos)
+
+    def _discard(self, index: Dict[str, Set[int]], key: str, pos: int):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(pos)
+            if not bucket:
+                del index[key]
+
+    def _move(self, index: Dict[str, Set[int]], old_key: str, new_key: str, pos: int):
+        if old_key == new_key:
+            return
+        self._discard(index, old_key, pos)
+        self._add(index, new_key, pos)
+
+
+def build_index(rows: List[Dict[str, Any]], tag_column: str):
+    """
+    Set-based FleetIndex for small tables, NumPy-backed VectorIndex from
+    VECTOR_MIN_ROWS rows on (FleetIndex at any size without numpy).
+    Both answer match() / on_patch() the same way.
+    """
+    if VectorIndex is not None and len(rows) >= VECTOR_MIN_ROWS:
+        return VectorIndex(rows, tag_column)
+    return FleetIndex(rows, tag_column)
+
+
+def pilot_index(pilots: List[Dict[str, Any]]):
+    """
+    Index for a pilots table (cached on the snapshot when it is a SheetTable).
+    """
+    if isinstance(pilots, SheetTable):
+        return pilots.derived("pilot_index", lambda t: build_index(t, "certifications"))
+    return build_index(pilots, "certifications")
+
+
+def drone_index(drones: List[Dict[str, Any]]):
+    """
+    Index for a drones table (cached on the snapshot when it is a SheetTable).
+    """
+    if isinstance(drones, SheetTable):
+        return drones.derived("drone_index", lambda t: build_index(t, "capabilities"))
+    return build_index(drones, "capabilities")
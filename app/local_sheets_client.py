@@ -0,0 +1,235 @@
+import csv
+import os
+import stat
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.records import RECORD_TYPES, build_records
+from app.sheets_client import BaseSheetsClient
+from app.snapshot_cache import SheetTable
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+SHEET_FILES = {
+    "Pilots": "pilot_roster.csv",
+    "Drones": "drone_fleet.csv",
+    "missions": "missions.csv",
+}
+
+
+class LocalSheetsClient(BaseSheetsClient):
+    """
+    Drop-in SheetsClient backed by CSV files (data/*.csv by default).
+
+    - reads stream the CSV row by row and are kept in memory until the file changes on disk
+    - writes stream the file into a temp copy with the cells replaced, then os.replace() it
+      (atomic: readers never see a half-written file)
+
+    Zero network latency; used for development, benchmarks and offline operation.
+    """
+
+    def __init__(self, data_dir: Any = DATA_DIR, sheet_files: Optional[Dict[str, str]] = None):
+        data_dir = Path(data_dir).resolve()
+        super().__init__(data_dir.as_uri(), cache_ttl=None)
+        self.data_dir = data_dir
+        self.sheet_files = dict(sheet_files or SHEET_FILES)
+        self._tables: Dict[str, SheetTable] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        return None
+
+    # -------------------------
+    # INTERNAL HELPERS
+    # -------------------------
+
+    def _path(self, sheet_name: str) -> Path:
+        filename = self.sheet_files.get(sheet_name)
+        if not filename:
+            raise Exception(f"Failed to read sheet {sheet_name}: no file mapped")
+        return self.data_dir / filename
+
+    def _read_rows(self, sheet_name: str, path: Path) -> List[Dict[str, Any]]:
+        """
+        Streams a CSV into rows (typed records for known sheets; missing trailing cells -> "").
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            headers = [str(h).strip() for h in next(reader, [])]
+            rows = (row for row in reader if row)
+            record_type = RECORD_TYPES.get(sheet_name)
+            if record_type:
+                return build_records(record_type, headers, rows)
+            return [{h: (row[i] if i < len(row) else "") for i, h in enumerate(headers)} for row in rows]
+
+    def _get_sheet(self, sheet_name: str) -> List[Dict[str, Any]]:
+        path = self._path(sheet_name)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise Exception(f"Failed to read sheet {sheet_name}: {path} not found")
+
+        with self._lock:
+            table = self._tables.get(sheet_name)
+            if table is not None and self._mtimes.get(sheet_name) == mtime:
+                return table
+
+            version = self._versions.get(sheet_name, 0) + 1
+            with self._normalize_timer(sheet_name):
+                rows = self._read_rows(sheet_name, path)
+            table = SheetTable(rows, name=sheet_name, version=version)
+            self._versions[sheet_name] = version
+            self._tables[sheet_name] = table
+            self._mtimes[sheet_name] = mtime
+            return table
+
+    def _rewrite(self, sheet_name: str, updates: List[Dict[str, Any]]) -> List[str]:
+        """
+        Applies updates for one sheet in a single streaming pass + atomic replace.
+        Returns error messages for updates whose row/column wasn't found.
+        """
+        path = self._path(sheet_name)
+        pending: Dict[tuple, Dict[str, Any]] = {}
+        labels: Dict[tuple, str] = {}
+        for u in updates:
+            key = (u["keyColumn"], str(u["keyValue"]).strip().lower())
+            pending.setdefault(key, {})[u["updateColumn"]] = u["updateValue"]
+            labels[key] = f"{u['keyColumn']}={u['keyValue']}"
+        matched = set()
+
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+        try:
+            with open(path, newline="", encoding="utf-8") as src, os.fdopen(fd, "w", newline="", encoding="utf-8") as dst:
+                reader = csv.reader(src)
+                writer = csv.writer(dst, lineterminator="\n")
+
+                headers = [str(h).strip() for h in next(reader, [])]
+                for u in updates:
+                    if u["updateColumn"] not in headers:
+                        headers.append(u["updateColumn"])
+                writer.writerow(headers)
+
+                positions = {h: i for i, h in enumerate(headers)}
+                key_columns = {k[0]: positions[k[0]] for k in pending if k[0] in positions}
+                for row in reader:
+                    row = row + [""] * (len(headers) - len(row))
+                    for key_column, idx in key_columns.items():
+                        key = (key_column, str(row[idx]).strip().lower())
+                        if key in pending and key not in matched:
+                            matched.add(key)
+                            for column, value in pending[key].items():
+                                row[positions[column]] = value
+                    writer.writerow(row)
+
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        self._mtimes[sheet_name] = path.stat().st_mtime_ns
+        return [f"Row not found: {labels[k]}" for k in pending if k not in matched]
+
+    def _update_cell(self, sheet: str, key_column: str, key_value: str, update_column: str, update_value: str):
+        return self._batch_update([self._cell_update(sheet, key_column, key_value, update_column, update_value)])
+
+    def _batch_update(self, updates: List[Dict[str, Any]]):
+        if not updates:
+            return {"status": "success", "updated": 0}
+
+        by_sheet: Dict[str, List[Dict[str, Any]]] = {}
+        for u in updates:
+            by_sheet.setdefault(u["sheet"], []).append(u)
+
+        errors: List[str] = []
+        with self._lock:
+            for sheet_name, sheet_updates in by_sheet.items():
+                table = self._get_sheet(sheet_name)
+                errors.extend(self._rewrite(sheet_name, sheet_updates))
+                for u in sheet_updates:
+                    table.patch(u["keyColumn"], u["keyValue"], u["updateColumn"], u["updateValue"])
+                self._versions[sheet_name] = table.version
+
+        if errors:
+            return {"status": "partial", "updated": len(updates) - len(errors), "errors": errors}
+        return {"status": "success", "updated": len(updates)}
+
+    def patch_snapshot(self, updates: List[Dict[str, Any]]):
+        with self._lock:
+            for u in updates:
+                table = self._tables.get(u["sheet"])
+                if table is not None and table.patch(u["keyColumn"], u["keyValue"], u["updateColumn"], u["updateValue"]):
+                    self._versions[u["sheet"]] = table.version
+
+    # -------------------------
+    # CACHE CONTROL
+    # -------------------------
+
+    def invalidate(self, sheet_name: Optional[str] = None):
+        with self._lock:
+            if sheet_name is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(sheet_name, None)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": False, "backend": "local", "versions": dict(self._versions)}
+
+    # -------------------------
+    # READ FUNCTIONS
+    # -------------------------
+
+    def get_pilot_data(self):
+        return self._get_sheet("Pilots")
+
+    def get_drone_data(self):
+        return self._get_sheet("Drones")
+
+    def get_mission_data(self):
+        return self._get_sheet("missions")
+
+    def load_tables(self, tables: Iterable[str]) -> Dict[str, Any]:
+        return {n: self._get_sheet(sheet) for n, sheet in self._table_sheets(tables).items()}
+
+    # -------------------------
+    # UPDATE FUNCTIONS
+    # -------------------------
+
+    def update_pilot_status(self, pilot_name: str, status: str):
+        return self._update_cell("Pilots", "name", pilot_name, "status", status)
+
+    def update_drone_status(self, drone_id: str, status: str):
+        return self._update_cell("Drones", "drone_id", drone_id, "status", status)
+
+    def update_mission_assignment(self, mission_id: str, pilot_name: str, drone_id: str):
+        return self._batch_update(self._mission_assignment_updates(mission_id, pilot_name, drone_id))
+
+    def assign_mission(
+        self,
+        mission_id: str,
+        pilot_name: str,
+        drone_id: str,
+        pilot_status: Optional[str] = None,
+        drone_status: Optional[str] = None,
+    ):
+        return self._batch_update(self._assignment_updates(mission_id, pilot_name, drone_id, pilot_status, drone_status))
+
+    def assign_missions(self, assignments: List[Dict[str, Any]]):
+        return self._batch_update(self._bulk_assignment_updates(assignments))
+
+    def update_mission_status(self, mission_id: str, status: str):
+        return self._update_cell("missions", "mission_id", mission_id, "status", status)
@@ -1,7 +1,13 @@
+import json
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import List
 
-from app.sheets_client import SheetsClient
+from app.async_sheets_client import AsyncSheetsClient
 from app.agent import CoordinatorAgent
+from app.local_sheets_client import DATA_DIR, LocalSheetsClient
+from app.metrics import REGISTRY, collect_timings
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -12,21 +18,90 @@ except ModuleNotFoundError:
     pass
 
 from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-app = FastAPI()
-
 SCRIPT_URL = os.getenv("GOOGLE_SCRIPT_URL")
-if not SCRIPT_URL:
-    raise RuntimeError("Missing GOOGLE_SCRIPT_URL. Set it in environment or .env.")
-sheets_client = SheetsClient(SCRIPT_URL)
+if SCRIPT_URL:
+    sheets_client = AsyncSheetsClient(SCRIPT_URL)
+else:
+    # No Apps Script configured -> serve the local CSVs (DATA_DIR or ./data)
+    sheets_client = LocalSheetsClient(os.getenv("DATA_DIR") or DATA_DIR)
 agent = CoordinatorAgent(sheets_client)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if sheets_client.is_async:
+        await sheets_client.aclose()
+    else:
+        sheets_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
 class QueryRequest(BaseModel):
     query: str
+    # debugging: add a per-stage "timings_ms" breakdown to the response
+    timings: bool = False
+
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
 
 
 @app.post("/chat")
-def chat(req: QueryRequest):
-    return agent.handle_query(req.query)
+async def chat(req: QueryRequest):
+    if not req.timings:
+        return await agent.ahandle_query(req.query)
+
+    start = time.perf_counter()
+    with collect_timings() as timings:
+        response = await agent.ahandle_query(req.query)
+    breakdown = timings.as_dict()
+    breakdown["total"] = round((time.perf_counter() - start) * 1000, 3)
+    return {**response, "timings_ms": breakdown}
+
+
+@app.post("/chat/batch")
+async def chat_batch(req: BatchQueryRequest):
+    """
+    Runs the queries in order against one snapshot; writes go out as one batch at the end.
+    Streams NDJSON: one line per answered query, then a {"flush": ...} line.
+    """
+
+    async def lines():
+        async for item in agent.arun_batch(req.queries):
+            yield json.dumps(jsonable_encoder(item)) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/missions/assign-all")
+async def assign_all_missions():
+    return await agent.arun_intent("assign_all_missions")
+
+
+@app.get("/conflicts/audit")
+async def audit_conflicts():
+    return await agent.arun_intent("audit_conflicts")
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "sheets": sheets_client.cache_stats(),
+        "responses": agent.response_cache.stats(),
+        "parser": agent.parser.stats(),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus text format: latency histograms per intent / stage and per sheet HTTP call.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,174 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# seconds; from cached replies (sub-ms) to slow Apps Script reads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Latency histogram with labels, rendered in the Prometheus text format
+    (cumulative _bucket series plus _sum and _count per label set).
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [count per bucket (last = +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, seconds: float, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+
+        for key, values in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-1]!r}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, help, labels, buckets)
+            return self._histograms[name]
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = list(self._histograms.values())
+        return "\n".join(line for h in histograms for line in h.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+QUERY_SECONDS = REGISTRY.histogram(
+    "drone_ops_query_seconds", "Time to answer a query, by intent", ("intent",)
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "drone_ops_stage_seconds", "Time per query stage (parse, fetch, handler, match, conflicts, reassign, write)", ("intent", "stage")
+)
+SHEETS_HTTP_SECONDS = REGISTRY.histogram(
+    "drone_ops_sheets_http_seconds", "Apps Script HTTP calls, by sheet and action", ("sheet", "action")
+)
+NORMALIZE_SECONDS = REGISTRY.histogram(
+    "drone_ops_sheets_normalize_seconds", "Decoding a sheet response / CSV into records", ("sheet",)
+)
+
+
+# -------------------------
+# PER-REQUEST BREAKDOWN
+# -------------------------
+
+class Timings:
+    """
+    Per-request breakdown: key -> total milliseconds. Stages that run more
+    than once (or in parallel, like sheet fetches) add up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {}
+
+    def add(self, key: str, seconds: float):
+        with self._lock:
+            self._seconds[key] = self._seconds.get(key, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {key: round(seconds * 1000, 3) for key, seconds in self._seconds.items()}
+
+
+_current_timings: ContextVar[Optional[Timings]] = ContextVar("drone_ops_timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """
+    Everything timed inside the block (same thread / task, or threads started
+    with a copied context) is also added to the yielded Timings.
+    """
+    timings = Timings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+# -------------------------
+# HOOKS
+# -------------------------
+
+def observe(histogram: Histogram, seconds: float, key: Optional[str] = None, **labels: Any):
+    """
+    Records seconds in the histogram and, under key, in the current request's breakdown (if any).
+    """
+    histogram.observe(seconds, **labels)
+    timings = _current_timings.get()
+    if timings is not None and key:
+        timings.add(key, seconds)
+
+
+@contextmanager
+def timed(histogram: Histogram, key: Optional[str] = None, **labels: Any) -> Iterator[None]:
+    # failed calls are recorded too; the time was still spent
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(histogram, time.perf_counter() - start, key, **labels)
+
+
+class Stopwatch:
+    """
+    Accumulates the time spent in wrapped callables, for work that runs
+    interleaved with something else (conflict checks inside the match search).
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def wrap(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def run(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+
+        return run
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
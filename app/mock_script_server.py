@@ -0,0 +1,297 @@
+"""
+Local stand-in for the Google Apps Script Web App.
+
+Serves the CSVs in data/ as sheets and understands the same protocol as the
+deployed script, so SheetsClient can be exercised offline:
+
+GET  ?sheet=Pilots                 -> list[list] (first row = headers)
+GET  ?sheet=Pilots&since=N         -> delta sync: rows changed after revision N
+POST {"action": "update", ...}     -> single cell update
+POST {"action": "batchUpdate", "updates": [...]} -> many cell updates, one request
+
+Delta sync: every sheet has a revision, bumped by each change. A delta read answers
+    {"revision": R, "base": N, "headers": [...], "rows": [[position, [cells]], ...], "count": C}
+(position = 0-based data row, current cells of each changed row, C = data rows now), or the full sheet
+    {"revision": R, "full": true, "headers": [...], "rows": [[cells], ...]}
+when N is 0, unknown (e.g. from before a restart) or older than the change log
+reaches back (max_log entries, or a column was added since).
+
+Run standalone:
+    python -m app.mock_script_server --port 8765
+then point GOOGLE_SCRIPT_URL at http://127.0.0.1:8765/exec
+"""
+
+import argparse
+import csv
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from app.local_sheets_client import DATA_DIR, SHEET_FILES
+
+
+def load_sheets(data_dir: Path = DATA_DIR) -> Dict[str, List[List[str]]]:
+    sheets = {}
+    for sheet, filename in SHEET_FILES.items():
+        path = Path(data_dir) / filename
+        if not path.exists():
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            sheets[sheet] = [row for row in csv.reader(f)]
+    return sheets
+
+
+class MockScriptServer:
+    """
+    In-memory Apps Script emulator on a background thread.
+
+    sheets           -> {sheet_name: [[headers...], [row...], ...]}
+    request_counts   -> {"GET": n, "delta": n, "update": n, "batchUpdate": n}
+    bytes_sent       -> total response body bytes (to compare full vs delta reads)
+    max_log          -> changed-row entries kept per sheet for delta reads
+    """
+
+    def __init__(
+        self,
+        sheets: Optional[Dict[str, List[List[Any]]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_log: int = 1000,
+    ):
+        self.sheets = sheets if sheets is not None else load_sheets()
+        self.request_counts: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.max_log = max_log
+        # sheet -> current revision / [(revision, row position)] / oldest revision a delta can start from
+        self.revisions: Dict[str, int] = {sheet: 1 for sheet in self.sheets}
+        self._log: Dict[str, List[Tuple[int, int]]] = {sheet: [] for sheet in self.sheets}
+        self._floor: Dict[str, int] = {sheet: 1 for sheet in self.sheets}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/exec"
+
+    def start(self) -> "MockScriptServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -------------------------
+    # SHEET OPERATIONS
+    # -------------------------
+
+    def read_sheet(self, sheet: str) -> Any:
+        with self._lock:
+            table = self.sheets.get(sheet)
+            if table is None:
+                return {"error": f"Sheet not found: {sheet}"}
+            return [list(row) for row in table]
+
+    def read_delta(self, sheet: str, since: int) -> Any:
+        with self._lock:
+            table = self.sheets.get(sheet)
+            if table is None:
+                return {"error": f"Sheet not found: {sheet}"}
+
+            revision = self.revisions.get(sheet, 1)
+            headers = list(table[0]) if table else []
+            if since <= 0 or since > revision or since < self._floor.get(sheet, 1):
+                return {"revision": revision, "full": True, "headers": headers, "rows": [list(row) for row in table[1:]]}
+
+            positions = sorted({pos for rev, pos in self._log.get(sheet, []) if rev > since})
+            return {
+                "revision": revision,
+                "base": since,
+                "headers": headers,
+                # positions past the end are rows deleted since they changed
+                "rows": [[pos, list(table[pos + 1])] for pos in positions if pos + 1 < len(table)],
+                "count": len(table) - 1,
+            }
+
+    def append_row(self, sheet: str, row: List[Any]) -> int:
+        """
+        Adds a data row (like someone typing into the sheet). Returns its position.
+        """
+        with self._lock:
+            table = self.sheets[sheet]
+            table.append(list(row))
+            pos = len(table) - 2
+            self._record_change(sheet, pos)
+            return pos
+
+    def delete_row(self, sheet: str, pos: int) -> List[Any]:
+        """
+        Removes a data row the way a manual delete looks to the script: the
+        revision moves on but no position is logged (the rows below shift up),
+        so clients only notice through the row count. Returns the removed row.
+        """
+        with self._lock:
+            table = self.sheets[sheet]
+            row = table.pop(pos + 1)
+            self.revisions[sheet] = self.revisions.get(sheet, 1) + 1
+            return row
+
+    def apply_update(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            return self._apply_update_locked(update)
+
+    def apply_batch(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            results = [self._apply_update_locked(u) for u in updates]
+        errors = [r["error"] for r in results if "error" in r]
+        if errors:
+            return {"status": "partial", "updated": len(results) - len(errors), "errors": errors}
+        return {"status": "success", "updated": len(results)}
+
+    def _apply_update_locked(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        sheet = update.get("sheet")
+        table = self.sheets.get(sheet)
+        if not table:
+            return {"error": f"Sheet not found: {sheet}"}
+
+        headers = [str(h).strip() for h in table[0]]
+        key_column = update.get("keyColumn")
+        update_column = update.get("updateColumn")
+        if key_column not in headers:
+            return {"error": f"Column not found: {key_column}"}
+        if update_column not in headers:
+            headers.append(update_column)
+            table[0].append(update_column)
+            # new column: older revisions can't be diffed any more
+            self._record_change(sheet, None)
+
+        key_idx = headers.index(key_column)
+        col_idx = headers.index(update_column)
+        key_value = str(update.get("keyValue", "")).strip().lower()
+
+        for pos, row in enumerate(table[1:]):
+            if key_idx < len(row) and str(row[key_idx]).strip().lower() == key_value:
+                while len(row) <= col_idx:
+                    row.append("")
+                row[col_idx] = update.get("updateValue", "")
+                self._record_change(sheet, pos)
+                return {"status": "success"}
+
+        return {"error": f"Row not found: {key_column}={update.get('keyValue')}"}
+
+    def _record_change(self, sheet: str, pos: Optional[int]):
+        """
+        Bumps the sheet revision and logs the changed row (pos None -> structural
+        change, deltas from before it are no longer possible). Caller holds the lock.
+        """
+        revision = self.revisions.get(sheet, 1) + 1
+        self.revisions[sheet] = revision
+        log = self._log.setdefault(sheet, [])
+        if pos is None:
+            log.clear()
+            self._floor[sheet] = revision
+            return
+
+        log.append((revision, pos))
+        if len(log) > self.max_log:
+            dropped = len(log) - self.max_log
+            self._floor[sheet] = log[dropped - 1][0]
+            del log[:dropped]
+
+    # -------------------------
+    # HTTP HANDLER
+    # -------------------------
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.request_counts[kind] = self.request_counts.get(kind, 0) + 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, body: Any):
+                raw = json.dumps(body).encode("utf-8")
+                with server._lock:
+                    server.bytes_sent += len(raw)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                server._count("GET")
+                params = parse_qs(urlparse(self.path).query)
+                sheet = (params.get("sheet") or [""])[0]
+                since = (params.get("since") or [None])[0]
+                if since is None:
+                    self._send_json(server.read_sheet(sheet))
+                    return
+
+                server._count("delta")
+                try:
+                    since_revision = int(since)
+                except ValueError:
+                    since_revision = 0
+                self._send_json(server.read_delta(sheet, since_revision))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json({"error": "Invalid JSON body"})
+                    return
+
+                action = payload.get("action")
+                server._count(str(action))
+
+                if action == "update":
+                    self._send_json(server.apply_update(payload))
+                elif action == "batchUpdate":
+                    self._send_json(server.apply_batch(payload.get("updates") or []))
+                else:
+                    self._send_json({"error": f"Unsupported action: {action}"})
+
+            def log_message(self, format, *args):
+                return
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Apps Script stand-in backed by data/*.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    args = parser.parse_args()
+
+    server = MockScriptServer(load_sheets(Path(args.data_dir)), host=args.host, port=args.port)
+    print(f"Mock Apps Script serving on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.records import parse_date, parse_list
+from app.snapshot_cache import SheetTable
+
+# Seed vocabulary (the old hard-coded lists); live sheet values are added by learn()
+DEFAULT_VOCABULARY = {
+    "cities": [],
+    "certs": ["DGCA", "BVLOS", "Night Ops"],
+    "capabilities": ["thermal", "lidar", "rgb", "camera"],
+    "statuses": ["On Leave", "Maintenance", "Available", "Busy", "Inactive", "Assigned"],
+}
+
+# table -> column -> vocabulary it feeds
+VOCABULARY_COLUMNS = {
+    "pilots": {"location": "cities", "certifications": "certs", "status": "statuses"},
+    "drones": {"location": "cities", "capabilities": "capabilities", "status": "statuses"},
+}
+
+KEYWORDS = [
+    "available pilots", "available drones",
+    "urgent", "audit", "conflicts", "conflict", "all", "assign", "missions", "mission",
+    "show", "pilots", "pilot", "drones", "drone", "update", "free", "available",
+]
+
+# never taken as a name / id after "pilot" / "drone" (on top of keywords and vocabulary)
+STOP_WORDS = ["in", "at", "to", "from", "with", "for", "top", "and", "the", "is", "status"]
+
+# plural / phrase keyword -> flags it sets
+KEYWORD_FLAGS = {
+    "available pilots": {"available", "pilot", "available pilots"},
+    "available drones": {"available", "drone", "available drones"},
+    "pilots": {"pilot"},
+    "drones": {"drone"},
+    "missions": {"mission", "missions"},
+    "conflicts": {"conflict"},
+}
+
+
+class ParsedQuery(NamedTuple):
+    intent: str
+    location: Optional[str] = None
+    mission_id: Optional[str] = None
+    pilot_name: Optional[str] = None
+    drone_id: Optional[str] = None
+    capability: Optional[str] = None
+    certs: Tuple[str, ...] = ()
+    status: Optional[str] = None
+    top_k: Optional[int] = None
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+
+class VocabularyWatch:
+    """
+    Derived structure on a SheetTable: flags patches to the columns the
+    vocabulary is learned from, so other writes don't trigger a rescan.
+    Starts dirty, so a table seen for the first time is always scanned.
+    """
+
+    def __init__(self, columns: Iterable[str]):
+        self.columns = set(columns)
+        self.dirty = True
+
+    def on_patch(self, pos: int, column: str, old_value: Any, new_value: Any):
+        if column not in self.columns or old_value == new_value:
+            return
+        # written-back statuses like "Assigned(M001)" are never learned (see _collect)
+        if column == "status" and not re.fullmatch(r"[A-Za-z][A-Za-z ]*", str(new_value or "").strip()):
+            return
+        self.dirty = True
+
+
+class QueryParser:
+    """
+    Turns a chat query into intent + slots in one regex pass.
+
+    All token kinds (dates, mission ids, "pilot <name>", "drone <id>",
+    "in <place>", "top <n>", vocabulary terms and intent keywords) are
+    alternatives of a single compiled pattern, so the query is scanned once.
+    Vocabularies start from DEFAULT_VOCABULARY and grow with the values seen
+    in the sheets (learn()), so new cities / certs / capabilities / statuses
+    work without code changes.
+
+    Parses are kept in an LRU cache keyed on the whitespace-normalized query
+    (and the vocabulary generation), so repeated dashboard queries skip
+    parsing entirely.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, int], ParsedQuery]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0}
+        self._learned: Dict[str, Dict[str, Set[str]]] = {}
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+        self.generation = 0
+        self._compile()
+
+    # -------------------------
+    # PARSING
+    # -------------------------
+
+    def parse(self, query: str) -> ParsedQuery:
+        text = " ".join((query or "").split())
+        key = (text, self.generation)
+
+        with self._lock:
+            parsed = self._cache.get(key)
+            if parsed is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return parsed
+            self._stats["misses"] += 1
+
+        parsed = self._parse(text)
+
+        with self._lock:
+            self._cache[key] = parsed
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return parsed
+
+    def _parse(self, text: str) -> ParsedQuery:
+        flags: Set[str] = set()
+        slots: Dict[str, Any] = {}
+        certs: List[str] = []
+        dates: List[date] = []
+
+        for m in self._pattern.finditer(text):
+            kind = m.lastgroup
+            if kind == "date":
+                d = parse_date(m.group("date"))
+                if d:
+                    dates.append(d)
+            elif kind == "mission_id":
+                slots.setdefault("mission_id", m.group("mission_id"))
+            elif kind == "top":
+                flags.add("top")
+                slots.setdefault("top_k", int(m.group("top_n")))
+            elif kind == "pilot":
+                flags.add("pilot")
+                slots.setdefault("pilot_name", m.group("pilot_name"))
+            elif kind == "drone":
+                flags.add("drone")
+                slots.setdefault("drone_id", m.group("drone_id"))
+            elif kind == "in":
+                word = m.group("in_term") or " ".join(m.group("in_word").split())
+                term = self._lookup(word)
+                if term is None or term[0] == "cities":
+                    slots.setdefault("location", term[1] if term else word)
+                else:
+                    self._add_term(term, flags, slots, certs)
+            elif kind == "term":
+                self._add_term(self._lookup(m.group("term")), flags, slots, certs)
+            elif kind in ("phrase", "keyword"):
+                word = " ".join(m.group(kind).lower().split())
+                flags |= KEYWORD_FLAGS.get(word, {word})
+
+        dates.sort()
+        return ParsedQuery(
+            intent=self._intent(flags, bool(dates)),
+            location=slots.get("location"),
+            mission_id=slots.get("mission_id"),
+            pilot_name=slots.get("pilot_name"),
+            drone_id=slots.get("drone_id"),
+            capability=slots.get("capability"),
+            certs=tuple(dict.fromkeys(certs)),
+            status=slots.get("status"),
+            top_k=slots.get("top_k"),
+            start=dates[0] if dates else None,
+            end=dates[-1] if dates else None,
+        )
+
+    def _add_term(self, term: Optional[Tuple[str, str]], flags: Set[str], slots: Dict[str, Any], certs: List[str]):
+        if term is None:
+            return
+        kind, value = term
+        if kind == "cities":
+            slots.setdefault("location", value)
+        elif kind == "certs":
+            certs.append(value)
+        elif kind == "capabilities":
+            slots.setdefault("capability", value)
+        elif kind == "statuses":
+            # last status mentioned wins ("from Assigned to Available")
+            slots["status"] = value
+            flags.add(value.lower())
+
+    def _intent(self, flags: Set[str], has_dates: bool) -> str:
+        if "audit" in flags or ("conflict" in flags and "all" in flags):
+            return "audit_conflicts"
+        if "urgent" in flags and "mission" in flags:
+            return "urgent_assign_mission"
+        if "assign" in flags and "all" in flags and "missions" in flags:
+            return "assign_all_missions"
+        if "assign" in flags and "mission" in flags:
+            return "assign_mission"
+        if has_dates and ("free" in flags or "available" in flags):
+            if "drone" in flags:
+                return "show_free_drones"
+            if "pilot" in flags:
+                return "show_free_pilots"
+        if "show" in flags and "pilot" in flags:
+            return "show_available_pilots"
+        if "show" in flags and "drone" in flags:
+            return "show_available_drones"
+        # ranking form: "top 3 pilots in Mumbai"
+        if "top" in flags and "pilot" in flags and "update" not in flags:
+            return "show_available_pilots"
+        if "top" in flags and "drone" in flags and "update" not in flags:
+            return "show_available_drones"
+        if "available pilots" in flags:
+            return "show_available_pilots"
+        if "available drones" in flags:
+            return "show_available_drones"
+        if "update" in flags and "pilot" in flags:
+            return "update_pilot_status"
+        if "update" in flags and "drone" in flags:
+            return "update_drone_status"
+        return "unknown"
+
+    # -------------------------
+    # VOCABULARY
+    # -------------------------
+
+    def learn(self, tables: Dict[str, Any]):
+        """
+        Adds the cities / certs / capabilities / statuses found in freshly loaded
+        tables. Only new snapshots, or ones whose vocabulary columns were patched
+        (VocabularyWatch), are scanned; the pattern is recompiled (and the parse
+        cache effectively reset) only if the vocabulary actually changed.
+        """
+        changed = False
+        for name, rows in tables.items():
+            columns = VOCABULARY_COLUMNS.get(name)
+            if columns is None or not isinstance(rows, list):
+                continue
+            watch = rows.derived("vocabulary", lambda _: VocabularyWatch(columns)) if isinstance(rows, SheetTable) else None
+            stamp = (id(rows), len(rows))
+            with self._lock:
+                if self._stamps.get(name) == stamp and not (watch is not None and watch.dirty):
+                    continue
+                self._stamps[name] = stamp
+                if watch is not None:
+                    # cleared before the scan: a patch landing during it marks the table again
+                    watch.dirty = False
+
+            learned = self._collect(rows, columns)
+            with self._lock:
+                if learned != self._learned.get(name):
+                    self._learned[name] = learned
+                    changed = True
+
+        if changed:
+            self._compile()
+
+    def vocabulary(self) -> Dict[str, List[str]]:
+        return {kind: sorted(terms.values()) for kind, terms in self._terms.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._cache),
+                "hit_ratio": round(self._stats["hits"] / total, 3) if total else 0.0,
+                "generation": self.generation,
+            }
+
+    def _collect(self, rows, columns: Dict[str, str]) -> Dict[str, Set[str]]:
+        learned: Dict[str, Set[str]] = {}
+        for column, kind in columns.items():
+            values = learned.setdefault(kind, set())
+            seen: Set[Any] = set()
+            for row in rows:
+                raw = row.get(column)
+                if raw in seen:
+                    continue
+                seen.add(raw)
+                if kind == "statuses":
+                    status = str(raw or "").strip()
+                    # skip written-back values like "Assigned(M001)"
+                    if re.fullmatch(r"[A-Za-z][A-Za-z ]*", status):
+                        values.add(status)
+                elif kind == "cities":
+                    city = str(raw or "").strip()
+                    if city:
+                        values.add(city)
+                else:
+                    values.update(parse_list(raw))
+        return learned
+
+    def _compile(self):
+        # kind -> lowercase term -> canonical spelling (sheet values win over defaults)
+        terms: Dict[str, Dict[str, str]] = {kind: {t.lower(): t for t in words} for kind, words in DEFAULT_VOCABULARY.items()}
+        with self._lock:
+            learned_tables = list(self._learned.values())
+        for learned in learned_tables:
+            for kind, words in learned.items():
+                for word in words:
+                    terms[kind][word.lower()] = word
+
+        # lookup: term -> (kind, canonical); first word of a multi-word cert is an alias ("night" -> "Night Ops")
+        lookup: Dict[str, Tuple[str, str]] = {}
+        for kind in ("statuses", "certs", "capabilities", "cities"):
+            for lower, canonical in terms[kind].items():
+                lookup.setdefault(lower, (kind, canonical))
+        for lower, canonical in terms["certs"].items():
+            first = lower.split(" ")[0]
+            if first != lower:
+                lookup.setdefault(first, ("certs", canonical))
+
+        words = sorted(lookup, key=len, reverse=True)
+        phrases = [k for k in KEYWORDS if " " in k]
+        keywords = sorted((k for k in KEYWORDS if " " not in k), key=len, reverse=True)
+        # "drone thermal" / "pilot in Mumbai": the next word is a slot, not a name / id
+        reserved = sorted(set(words) | set(KEYWORDS) | set(STOP_WORDS), key=len, reverse=True)
+        not_reserved = rf"(?!(?:{self._alternation(reserved)})\b)"
+
+        # "in <place>": a known (possibly multi-word) term, else a word plus any
+        # Capitalized words after it ("in New Delhi") up to a reserved word
+        in_place = (
+            rf"(?P<in_term>{self._alternation(words)})\b"
+            rf"|(?P<in_word>[A-Za-z]+(?:\s+{not_reserved}(?-i:[A-Z])[A-Za-z]*)*)\b"
+        )
+
+        # order matters: at each position the first alternative that matches wins
+        # ("available pilots" before the status "available", "in <place>" before bare terms)
+        pattern = re.compile(
+            r"(?P<date>\b\d{4}-\d{2}-\d{2}\b)"
+            r"|(?P<mission_id>\bM\d+\b)"
+            r"|(?P<top>\btop\s+(?P<top_n>\d+)\b)"
+            rf"|(?P<pilot>\bpilot\s+{not_reserved}(?P<pilot_name>[A-Za-z]+)\b)"
+            rf"|(?P<drone>\bdrone\s+{not_reserved}(?P<drone_id>[A-Za-z0-9]+)\b)"
+            rf"|(?P<phrase>\b(?:{self._alternation(phrases)})\b)"
+            rf"|(?P<in>\bin\s+(?:{in_place}))"
+            rf"|(?P<term>\b(?:{self._alternation(words)})\b)"
+            rf"|(?P<keyword>\b(?:{self._alternation(keywords)})\b)",
+            flags=re.IGNORECASE,
+        )
+
+        with self._lock:
+            self._terms = terms
+            self._term_lookup = lookup
+            self._pattern = pattern
+            self.generation += 1
+            self._cache.clear()
+
+    def _alternation(self, words: Iterable[str]) -> str:
+        # multi-word terms match any run of whitespace; an empty list never matches
+        return "|".join(re.escape(w).replace(r"\ ", r"\s+") for w in words) or r"(?!x)x"
+
+    def _lookup(self, word: str) -> Optional[Tuple[str, str]]:
+        return self._term_lookup.get(" ".join(word.lower().split()))
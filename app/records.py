@@ -0,0 +1,249 @@
+from collections.abc import Mapping
+from datetime import date
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+
+def parse_list(value: Any) -> Tuple[str, ...]:
+    """
+    Converts comma separated string -> tuple
+    Example: "DGCA, BVLOS" -> ("DGCA", "BVLOS")
+    """
+    if not value:
+        return ()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(str(x).strip() for x in value if str(x).strip())
+    return tuple(x.strip() for x in str(value).split(",") if x.strip())
+
+
+def parse_tags(value: Any) -> FrozenSet[str]:
+    return frozenset(x.lower() for x in parse_list(value))
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """
+    YYYY-MM-DD (or a date/datetime) -> date, anything else -> None
+    """
+    if isinstance(value, date):
+        return value if type(value) is date else value.date()
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def norm(value: Any) -> str:
+    return str(value if value is not None else "").strip().lower()
+
+
+class Record(Mapping):
+    """
+    One sheet row stored compactly: values in a list that shares its column
+    layout (schema) with every row of the same table (until a write adds a
+    column to this row only), plus pre-parsed fields in __slots__.
+
+    Reads like the dict rows it replaces (row["status"], row.get("location"),
+    dict(row) for JSON); writes via row[column] = value re-parse only the
+    fields derived from that column.
+    """
+
+    __slots__ = ("_schema", "_values")
+
+    # column -> parser name; subclasses fill these in
+    PARSED: Dict[str, str] = {}
+    # tag-like list column -> slot holding its frozenset
+    TAG_SLOTS: Dict[str, str] = {}
+
+    def __init__(self, schema: Dict[str, int], values: List[Any]):
+        self._schema = schema
+        self._values = values
+        for column in self.PARSED:
+            self._parse(column)
+
+    @classmethod
+    def from_dict(cls, row: Dict[str, Any]) -> "Record":
+        return cls({k: i for i, k in enumerate(row)}, list(row.values()))
+
+    # -------------------------
+    # MAPPING INTERFACE
+    # -------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        idx = self._schema[key]
+        return self._values[idx] if idx < len(self._values) else ""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        idx = self._schema.get(key)
+        if idx is None:
+            return default
+        return self._values[idx] if idx < len(self._values) else ""
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._schema)
+
+    def __len__(self) -> int:
+        return len(self._schema)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._schema
+
+    def __setitem__(self, key: str, value: Any):
+        idx = self._schema.get(key)
+        if idx is None:
+            # new column: only this row gains it. The schema dict is shared with the
+            # other rows (and with copies in older snapshots), so switch to a private one
+            idx = len(self._schema)
+            self._schema = {**self._schema, key: idx}
+        if idx >= len(self._values):
+            self._values.extend([""] * (idx + 1 - len(self._values)))
+        self._values[idx] = value
+        if key in self.PARSED:
+            self._parse(key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: self.get(k) for k in self._schema}
+
+    def copy(self) -> "Record":
+        # same schema, own values list; writes to the copy (new columns included) don't show through the original
+        return type(self)(self._schema, list(self._values))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    # -------------------------
+    # PARSING
+    # -------------------------
+
+    def tag_set(self, column: str) -> Optional[FrozenSet[str]]:
+        slot = self.TAG_SLOTS.get(column)
+        return getattr(self, slot) if slot else None
+
+    def _parse(self, column: str):
+        getattr(self, self.PARSED[column])(self.get(column))
+
+
+class Pilot(Record):
+    __slots__ = ("status_key", "location_key", "cert_set", "skill_set", "available_from_date")
+
+    PARSED = {
+        "status": "_parse_status",
+        "location": "_parse_location",
+        "certifications": "_parse_certs",
+        "skills": "_parse_skills",
+        "available_from": "_parse_available_from",
+    }
+    TAG_SLOTS = {"certifications": "cert_set", "skills": "skill_set"}
+
+    def _parse_status(self, value):
+        self.status_key = norm(value)
+
+    def _parse_location(self, value):
+        self.location_key = norm(value)
+
+    def _parse_certs(self, value):
+        self.cert_set = parse_tags(value)
+
+    def _parse_skills(self, value):
+        self.skill_set = parse_tags(value)
+
+    def _parse_available_from(self, value):
+        self.available_from_date = parse_date(value)
+
+
+class Drone(Record):
+    __slots__ = ("status_key", "location_key", "capability_set", "maintenance_due_date")
+
+    PARSED = {
+        "status": "_parse_status",
+        "location": "_parse_location",
+        "capabilities": "_parse_capabilities",
+        "maintenance_due": "_parse_maintenance_due",
+    }
+    TAG_SLOTS = {"capabilities": "capability_set"}
+
+    def _parse_status(self, value):
+        self.status_key = norm(value)
+
+    def _parse_location(self, value):
+        self.location_key = norm(value)
+
+    def _parse_capabilities(self, value):
+        self.capability_set = parse_tags(value)
+
+    def _parse_maintenance_due(self, value):
+        self.maintenance_due_date = parse_date(value)
+
+
+class Mission(Record):
+    __slots__ = ("status_key", "location_key", "required_cert_list", "required_skill_set", "start", "end")
+
+    PARSED = {
+        "status": "_parse_status",
+        "location": "_parse_location",
+        "required_certs": "_parse_required_certs",
+        "required_skills": "_parse_required_skills",
+        "start_date": "_parse_start",
+        "end_date": "_parse_end",
+    }
+    TAG_SLOTS = {"required_skills": "required_skill_set"}
+
+    def _parse_status(self, value):
+        self.status_key = norm(value)
+
+    def _parse_location(self, value):
+        self.location_key = norm(value)
+
+    def _parse_required_certs(self, value):
+        self.required_cert_list = parse_list(value)
+
+    def _parse_required_skills(self, value):
+        self.required_skill_set = parse_tags(value)
+
+    def _parse_start(self, value):
+        self.start = parse_date(value)
+
+    def _parse_end(self, value):
+        self.end = parse_date(value)
+
+
+# sheet name -> record type
+RECORD_TYPES = {
+    "Pilots": Pilot,
+    "Drones": Drone,
+    "missions": Mission,
+}
+
+
+def build_records(record_type: type, headers: List[str], rows: Iterable[List[Any]]) -> List[Record]:
+    """
+    list[list] rows -> records sharing one schema (missing trailing cells -> "").
+    """
+    schema = {h: i for i, h in enumerate(headers)}
+    width = len(headers)
+    records = []
+    for row in rows:
+        if not isinstance(row, list):
+            continue
+        values = row[:width] if len(row) >= width else row + [""] * (width - len(row))
+        records.append(record_type(schema, values))
+    return records
+
+
+def as_record(record_type: type, row: Any) -> Record:
+    """
+    Returns row itself if it's already a record_type, else parses a dict row once.
+    """
+    if isinstance(row, record_type):
+        return row
+    return record_type.from_dict(row or {})
+
+
+def as_pilot(row: Any) -> Pilot:
+    return as_record(Pilot, row)
+
+
+def as_drone(row: Any) -> Drone:
+    return as_record(Drone, row)
+
+
+def as_mission(row: Any) -> Mission:
+    return as_record(Mission, row)
@@ -0,0 +1,96 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class ResponseCache:
+    """
+    Bounded LRU of finished responses for read-only intents.
+
+    Keys are built by the caller from everything the response depends on
+    (intent, parsed query slots, snapshot versions of the sheets it read), so
+    entries never need explicit invalidation: a write bumps the version of the
+    patched sheet and the old entries simply stop being asked for, then age
+    out of the LRU.
+
+    maxsize   -> max entries
+    max_bytes -> max approximate size of all cached responses (sys.getsizeof, recursive)
+    """
+
+    def __init__(self, maxsize: int = 256, max_bytes: int = 8 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "skipped": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        size = deep_size(value)
+        with self._lock:
+            if size > self.max_bytes:
+                # one oversized response would flush everything else
+                self._stats["skipped"] += 1
+                return
+            if key in self._entries:
+                self._bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+            stats["size"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["maxsize"] = self.maxsize
+            stats["max_bytes"] = self.max_bytes
+            return stats
+
+
+def deep_size(obj: Any) -> int:
+    """
+    Approximate memory footprint of a JSON-like value (dicts / lists / scalars).
+    Shared objects are counted once.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+    return total
@@ -0,0 +1,182 @@
+import heapq
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.booking_index import BookingIndex
+from app.records import Mission, as_drone, as_pilot, norm
+
+# feature -> weight (score = sum of weight * feature; higher is better)
+DEFAULT_WEIGHTS = {
+    # share of the mission's required_skills the pilot has (0..1)
+    "skill_overlap": 3.0,
+    # certs beyond what the mission needs; negative keeps highly certified pilots for missions that need them
+    "cert_surplus": -0.25,
+    # upcoming (not finished) missions already assigned to the resource
+    "workload": -1.0,
+    # days the pilot still has to wait (available_from after the mission start / today)
+    "availability_wait": -0.2,
+    # days between mission end and drone maintenance_due (capped at MAX_HEADROOM_DAYS)
+    "maintenance_headroom": 0.05,
+    # 1 if drone maintenance_due is already past at the mission start / today
+    "maintenance_overdue": -1.0,
+    # 1 if status is exactly "available"
+    "available_status": 1.0,
+}
+
+# maintenance_due inside the mission window -> this many "days" of headroom (heavy penalty)
+MAINTENANCE_CLASH_DAYS = -60
+MAX_HEADROOM_DAYS = 60
+
+
+class ScoringModel:
+    """
+    Scores pilots / drones for a mission (or, without one, for "today").
+
+    Features are cheap reads of the pre-parsed record fields plus the
+    BookingIndex for workload; weights are plain numbers so teams can tune the
+    ranking (ScoringModel({"workload": -2.0})) without touching the engine.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, today: Optional[Callable[[], date]] = None):
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown scoring weights: {sorted(unknown)}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.today = today or date.today
+
+    # -------------------------
+    # FEATURES
+    # -------------------------
+
+    def pilot_features(self, pilot, mission: Optional[Mission] = None, bookings: Optional[BookingIndex] = None) -> Dict[str, float]:
+        pilot = as_pilot(pilot)
+        ref = self._reference_date(mission)
+        features = {
+            "available_status": 1.0 if pilot.status_key == "available" else 0.0,
+            "workload": float(self._workload(bookings, "pilot", pilot.get("name"), ref)),
+        }
+
+        if pilot.available_from_date is not None:
+            features["availability_wait"] = float(max(0, (pilot.available_from_date - ref).days))
+
+        if mission is not None:
+            required_skills = mission.required_skill_set
+            if required_skills:
+                features["skill_overlap"] = len(required_skills & pilot.skill_set) / len(required_skills)
+            required_certs = {norm(c) for c in mission.required_cert_list}
+            features["cert_surplus"] = float(len(pilot.cert_set - required_certs))
+
+        return features
+
+    def drone_features(self, drone, mission: Optional[Mission] = None, bookings: Optional[BookingIndex] = None) -> Dict[str, float]:
+        drone = as_drone(drone)
+        ref = self._reference_date(mission)
+        features = {
+            "available_status": 1.0 if drone.status_key == "available" else 0.0,
+            "workload": float(self._workload(bookings, "drone", drone.get("drone_id"), ref)),
+        }
+
+        due = drone.maintenance_due_date
+        if due is not None:
+            start = mission.start if mission is not None and mission.start else ref
+            end = mission.end if mission is not None and mission.end else start
+            if due < start:
+                # overdue, not a clash: one flat penalty, so overdue drones still rank by the rest
+                features["maintenance_overdue"] = 1.0
+            elif due <= end:
+                features["maintenance_headroom"] = float(MAINTENANCE_CLASH_DAYS)
+            else:
+                features["maintenance_headroom"] = float(min((due - end).days, MAX_HEADROOM_DAYS))
+
+        return features
+
+    # -------------------------
+    # SCORES
+    # -------------------------
+
+    def score(self, features: Dict[str, float]) -> float:
+        # "+ 0.0" turns -0.0 into 0.0 for display
+        return round(sum(self.weights.get(k, 0.0) * v for k, v in features.items()), 3) + 0.0
+
+    def score_pilot(self, pilot, mission: Optional[Mission] = None, bookings: Optional[BookingIndex] = None) -> float:
+        return self.score(self.pilot_features(pilot, mission, bookings))
+
+    def score_drone(self, drone, mission: Optional[Mission] = None, bookings: Optional[BookingIndex] = None) -> float:
+        return self.score(self.drone_features(drone, mission, bookings))
+
+    def explain(self, features: Dict[str, float]) -> Dict[str, float]:
+        """
+        feature -> weighted contribution (for UI / API responses)
+        """
+        return {k: round(self.weights.get(k, 0.0) * v, 3) + 0.0 for k, v in features.items()}
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def _reference_date(self, mission: Optional[Mission]) -> date:
+        if mission is not None and mission.start is not None:
+            return mission.start
+        return self.today()
+
+    def _workload(self, bookings: Optional[BookingIndex], role: str, key: Any, ref: date) -> int:
+        if bookings is None:
+            return 0
+        return len(bookings.booked(role, key, ref, date.max))
+
+
+class LazyRanking:
+    """
+    Rows ordered by score (best first), produced on demand.
+
+    heapify is O(n); each rank actually read costs one O(log n) pop, so asking
+    for the top k (or walking pairs until a clean one turns up) never pays for
+    a full sort. Ties keep sheet order.
+    """
+
+    def __init__(self, rows, positions: Iterable[int], score_fn: Callable[[Any], float]):
+        self.rows = rows
+        self.scores: Dict[int, float] = {}
+        self._heap: List[Tuple[float, int]] = []
+        for pos in positions:
+            s = score_fn(rows[pos])
+            self.scores[pos] = s
+            self._heap.append((-s, pos))
+        heapq.heapify(self._heap)
+        self._order: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __bool__(self) -> bool:
+        return bool(self.scores)
+
+    def __getitem__(self, rank: int):
+        return self.rows[self.position(rank)]
+
+    def position(self, rank: int) -> int:
+        while len(self._order) <= rank:
+            if not self._heap:
+                raise IndexError(rank)
+            self._order.append(heapq.heappop(self._heap)[1])
+        return self._order[rank]
+
+    def __iter__(self):
+        rank = 0
+        while rank < len(self):
+            yield self[rank]
+            rank += 1
+
+    def top(self, k: int) -> List[Tuple[Any, float]]:
+        """
+        [(row, score)] for the best k.
+        """
+        return [(self[r], self.scores[self.position(r)]) for r in range(min(k, len(self)))]
+
+
+def top_k(rows, positions: Iterable[int], score_fn: Callable[[Any], float], k: int) -> List[Tuple[Any, float]]:
+    """
+    [(row, score)] for the best k rows, via a bounded heap (O(n log k)); ties keep sheet order.
+    """
+    best = heapq.nsmallest(k, ((-score_fn(rows[pos]), pos) for pos in positions))
+    return [(rows[pos], -neg) for neg, pos in best]
@@ -1,22 +1,56 @@
 import requests
+import contextvars
 import json
-from typing import Any, Dict, List, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from requests.adapters import HTTPAdapter
 
-class SheetsClient:
-    def __init__(self, script_url: str):
-        """
-        script_url = Google Apps Script Web App URL
-        Example:
-        https://script.google.com/macros/s/AKfycbxxxxx/exec
-        """
+from app.metrics import NORMALIZE_SECONDS, SHEETS_HTTP_SECONDS, timed
+from app.records import RECORD_TYPES, build_records
+from app.snapshot_cache import SheetDelta, SnapshotCache
+from app.write_behind import PermanentWriteError, WriteBehindQueue
+
+
+class BaseSheetsClient:
+    """
+    Transport-independent parts of the Apps Script client:
+    response normalization, write payloads and the snapshot cache.
+    SheetsClient (requests) and AsyncSheetsClient (httpx) add the I/O.
+    """
+
+    is_async = False
+
+    # logical table name -> sheet name in the spreadsheet
+    TABLE_SHEETS = {
+        "pilots": "Pilots",
+        "drones": "Drones",
+        "missions": "missions",
+    }
+
+    def __init__(
+        self,
+        script_url: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        batch_writes: bool = True,
+        cache_ttl: Optional[float] = 30.0,
+        cache_stale_ttl: float = 60.0,
+        delta_sync: bool = True,
+    ):
         self.script_url = script_url
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.batch_writes = batch_writes
+        self.cache = SnapshotCache(ttl=cache_ttl, stale_ttl=cache_stale_ttl) if cache_ttl else None
+        # delta sync needs a local snapshot to merge into
+        self.delta_sync = delta_sync and self.cache is not None
 
     # -------------------------
     # INTERNAL HELPERS
     # -------------------------
 
-    def _normalize_table(self, data: Any) -> Any:
+    def _normalize_table(self, data: Any, sheet_name: Optional[str] = None) -> Any:
         """
         Normalizes Apps Script output into list[dict] format.
 
@@ -24,17 +58,26 @@ class SheetsClient:
         - list[list] (first row = headers)
         - list[dict] (already correct)
         - dict (error response)
+
+        Known sheets (Pilots / Drones / missions) become typed records
+        (dict-like, fields pre-parsed once here).
         """
         if not isinstance(data, list) or not data:
             return data
 
+        record_type = RECORD_TYPES.get(sheet_name)
+
         # Already list[dict]
         if isinstance(data[0], dict):
+            if record_type:
+                return [record_type.from_dict(row) for row in data if isinstance(row, dict)]
             return data
 
         # list[list] format
         if isinstance(data[0], list):
             headers = [str(h).strip() for h in data[0]]
+            if record_type:
+                return build_records(record_type, headers, data[1:])
             rows = []
             for row in data[1:]:
                 if not isinstance(row, list):
@@ -47,28 +90,74 @@ class SheetsClient:
 
         return data
 
-    def _get_sheet(self, sheet_name: str) -> List[Dict[str, Any]]:
-        params = {"sheet": sheet_name}
-        res = requests.get(self.script_url, params=params, timeout=30)
+    def _http_timer(self, sheet: str, action: str):
+        # action: read / delta for GETs, the Apps Script action for POSTs
+        return timed(SHEETS_HTTP_SECONDS, f"http {action} {sheet}", sheet=sheet, action=action)
 
-        if res.status_code != 200:
-            raise Exception(f"Failed to read sheet {sheet_name}: {res.text}")
+    def _normalize_timer(self, sheet: str):
+        return timed(NORMALIZE_SECONDS, f"normalize {sheet}", sheet=sheet)
 
-        parsed = res.json()
-        normalized = self._normalize_table(parsed)
+    def _read_action(self, params: Dict[str, Any]) -> str:
+        return "delta" if params.get("since") else "read"
+
+    def _sheet_params(self, sheet_name: str) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"sheet": sheet_name}
+        if self.delta_sync:
+            params["since"] = self.cache.since(sheet_name)
+        return params
+
+    def _parse_sheet_response(self, sheet_name: str, status_code: int, text: str, parsed: Any) -> Any:
+        """
+        Returns rows (list[dict] / records), or a SheetDelta if the backend
+        answered a delta-sync read ({"revision": ...}).
+        """
+        if status_code != 200:
+            raise Exception(f"Failed to read sheet {sheet_name}: {text}")
+
+        if isinstance(parsed, dict) and "revision" in parsed:
+            return self._parse_delta(sheet_name, parsed)
+
+        normalized = self._normalize_table(parsed, sheet_name)
 
         if isinstance(normalized, dict) and "error" in normalized:
             raise Exception(f"Apps Script error: {normalized}")
 
         return normalized
 
-    def _update_cell(self, sheet: str, key_column: str, key_value: str, update_column: str, update_value: str):
+    def _parse_delta(self, sheet_name: str, data: Dict[str, Any]) -> SheetDelta:
         """
-        Uses Apps Script POST update API.
-        Requires Apps Script to support action=update.
+        Delta-sync response:
+        {"revision": 12, "full": true,  "headers": [...], "rows": [[cells], ...]}
+        {"revision": 12, "base": 9,     "headers": [...], "rows": [[position, [cells]], ...], "count": 40}
+        Only the rows in the response are normalized. count (backend data rows) is optional.
         """
-        payload = {
-            "action": "update",
+        headers = [str(h).strip() for h in data.get("headers") or []]
+        rows = data.get("rows") or []
+        revision = int(data["revision"])
+
+        if data.get("full") or data.get("base") is None:
+            records = self._normalize_table([headers] + rows, sheet_name) if headers else []
+            return SheetDelta(revision, records if isinstance(records, list) else [])
+
+        positions = [int(pos) for pos, _ in rows]
+        records = self._normalize_table([headers] + [cells for _, cells in rows], sheet_name)
+        count = int(data["count"]) if data.get("count") is not None else None
+        return SheetDelta(revision, dict(zip(positions, records)), base=int(data["base"]), headers=headers, count=count)
+
+    def _sync_fetched(self, sheet_name: str, fetched: Any) -> Any:
+        """
+        Puts a fetch result into the snapshot cache. Returns the table, or None
+        on a revision gap (caller reloads the full sheet).
+        """
+        if not isinstance(fetched, (list, SheetDelta)):
+            return fetched
+        table = self.cache.sync(sheet_name, fetched)
+        if table is None:
+            self.cache.invalidate(sheet_name)
+        return table
+
+    def _cell_update(self, sheet: str, key_column: str, key_value: str, update_column: str, update_value: str) -> Dict[str, Any]:
+        return {
             "sheet": sheet,
             "keyColumn": key_column,
             "keyValue": key_value,
@@ -76,18 +165,365 @@ class SheetsClient:
             "updateValue": update_value,
         }
 
-        res = requests.post(
-            self.script_url,
-            data=json.dumps(payload),
-            headers={"Content-Type": "application/json"},
-            timeout=30,
+    def _apply_to_cache(self, updates: List[Dict[str, Any]], result: Any):
+        """
+        Write-through: patch cached rows in place instead of refetching.
+        If the backend reported any error, drop the affected sheets instead.
+        """
+        if self.cache is None:
+            return
+
+        failed = isinstance(result, dict) and ("error" in result or "errors" in result)
+        for u in updates:
+            if failed:
+                self.cache.invalidate(u["sheet"])
+            else:
+                self.cache.patch(u["sheet"], u["keyColumn"], u["keyValue"], u["updateColumn"], u["updateValue"])
+
+    def _table_sheets(self, tables: Iterable[str]) -> Dict[str, str]:
+        names = list(dict.fromkeys(tables))
+        unknown = [n for n in names if n not in self.TABLE_SHEETS]
+        if unknown:
+            raise ValueError(f"Unknown tables: {unknown}")
+        return {n: self.TABLE_SHEETS[n] for n in names}
+
+    def _mission_assignment_updates(self, mission_id: str, pilot_name: str, drone_id: str) -> List[Dict[str, Any]]:
+        return [
+            self._cell_update("missions", "mission_id", mission_id, "assigned_pilot", pilot_name),
+            self._cell_update("missions", "mission_id", mission_id, "assigned_drone", drone_id),
+            self._cell_update("missions", "mission_id", mission_id, "status", "assigned"),
+        ]
+
+    def _assignment_updates(
+        self,
+        mission_id: str,
+        pilot_name: str,
+        drone_id: str,
+        pilot_status: Optional[str] = None,
+        drone_status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        updates = self._mission_assignment_updates(mission_id, pilot_name, drone_id)
+        if pilot_status:
+            updates.append(self._cell_update("Pilots", "name", pilot_name, "status", pilot_status))
+        if drone_status:
+            updates.append(self._cell_update("Drones", "drone_id", drone_id, "status", drone_status))
+        return updates
+
+    def _bulk_assignment_updates(self, assignments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        assignments: [{"mission_id", "pilot_name", "drone_id", "pilot_status"?, "drone_status"?}]
+        Repeated writes to the same cell (a pilot on several missions) are sent once, last value wins.
+        """
+        updates: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        for a in assignments:
+            for u in self._assignment_updates(
+                a["mission_id"], a["pilot_name"], a["drone_id"], a.get("pilot_status"), a.get("drone_status")
+            ):
+                key = (u["sheet"], u["keyColumn"], str(u["keyValue"]).strip().lower(), u["updateColumn"])
+                updates.pop(key, None)
+                updates[key] = u
+        return list(updates.values())
+
+    # -------------------------
+    # BATCHED WRITES (e.g. /chat/batch)
+    # -------------------------
+
+    def updates_for(self, method: str, kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Cell updates an update_* / assign_* call would send, without sending them,
+        so several calls can be flushed together via write_batch().
+        """
+        if method == "update_pilot_status":
+            return [self._cell_update("Pilots", "name", kwargs["pilot_name"], "status", kwargs["status"])]
+        if method == "update_drone_status":
+            return [self._cell_update("Drones", "drone_id", kwargs["drone_id"], "status", kwargs["status"])]
+        if method == "update_mission_status":
+            return [self._cell_update("missions", "mission_id", kwargs["mission_id"], "status", kwargs["status"])]
+        if method == "update_mission_assignment":
+            return self._mission_assignment_updates(**kwargs)
+        if method == "assign_mission":
+            return self._assignment_updates(**kwargs)
+        if method == "assign_missions":
+            return self._bulk_assignment_updates(**kwargs)
+        raise ValueError(f"Unknown write method: {method}")
+
+    def write_batch(self, updates: List[Dict[str, Any]]):
+        """
+        Sends cell updates (any sheets) as one backend write. Awaitable on async clients.
+        """
+        return self._batch_update(updates)
+
+    def patch_snapshot(self, updates: List[Dict[str, Any]]):
+        """
+        Applies updates to the cached snapshot only; the backend write follows later.
+        """
+        self._apply_to_cache(updates, None)
+
+    # -------------------------
+    # CACHE CONTROL
+    # -------------------------
+
+    def invalidate(self, sheet_name: Optional[str] = None):
+        if self.cache is not None:
+            self.cache.invalidate(sheet_name)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
+
+class SheetsClient(BaseSheetsClient):
+    def __init__(
+        self,
+        script_url: str,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        max_retries: int = 0,
+        batch_writes: bool = True,
+        cache_ttl: Optional[float] = 30.0,
+        cache_stale_ttl: float = 60.0,
+        delta_sync: bool = True,
+        write_behind: bool = False,
+        write_flush_interval: float = 0.5,
+        write_max_retries: Optional[int] = 8,
+        write_journal: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        """
+        script_url = Google Apps Script Web App URL
+        Example:
+        https://script.google.com/macros/s/AKfycbxxxxx/exec
+
+        All calls go through one pooled keep-alive session, so repeated
+        reads/writes reuse the TCP+TLS connection to Apps Script.
+
+        pool_connections -> number of hosts kept in the pool
+                            (Apps Script redirects script.google.com -> googleusercontent.com)
+        pool_maxsize     -> max open connections per host
+        pool_block       -> wait for a free connection instead of opening extra ones
+        connect_timeout / read_timeout -> passed to requests as (connect, read)
+        batch_writes     -> send grouped writes as one action=batchUpdate POST
+                            (set False for Apps Script deployments without it)
+        cache_ttl        -> seconds sheet snapshots are served from memory (None/0 disables the cache)
+        cache_stale_ttl  -> extra seconds a stale snapshot is served while refreshed in the background
+        delta_sync       -> refresh snapshots by asking for rows changed since their revision
+                            (?since=N); backends that ignore it keep sending the full sheet
+        write_behind     -> writes patch the local snapshot and return at once ({"status": "queued"});
+                            a background worker sends them, coalescing repeated writes to the
+                            same cell within write_flush_interval seconds, retrying with backoff
+        write_max_retries -> transient failures retried this many times per batch; rejected (4xx /
+                            validation error) or exhausted batches are dead-lettered (write_stats())
+                            and their sheets reloaded
+        write_journal    -> file queued writes are journaled to until sent (replayed on start)
+        """
+        super().__init__(
+            script_url,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            batch_writes=batch_writes,
+            cache_ttl=cache_ttl,
+            cache_stale_ttl=cache_stale_ttl,
+            delta_sync=delta_sync,
+        )
+        self.session = session or self._build_session(pool_connections, pool_maxsize, pool_block, max_retries)
+        self._fetch_workers = max(1, min(pool_maxsize, 8))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # sheet -> in-flight load, shared by every thread reading that sheet meanwhile
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        self._writer: Optional[WriteBehindQueue] = None
+        if write_behind:
+            self._writer = WriteBehindQueue(
+                self._send_updates,
+                flush_interval=write_flush_interval,
+                max_retries=write_max_retries,
+                journal_path=write_journal,
+                on_dead_letter=self._on_dead_letter,
+            )
+            if self.cache is not None:
+                self.cache.overlay = self._writer.pending_for
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # queued writes go out (or stay journaled) before the session closes
+        if self._writer is not None:
+            self._writer.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session.close()
+
+    # -------------------------
+    # INTERNAL HELPERS
+    # -------------------------
+
+    def _build_session(self, pool_connections: int, pool_maxsize: int, pool_block: bool, max_retries: int) -> requests.Session:
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=max_retries,
         )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _fetch_sheet(self, sheet_name: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        params = params or {"sheet": sheet_name}
+        with self._http_timer(sheet_name, self._read_action(params)):
+            res = self.session.get(self.script_url, params=params, timeout=self.timeout)
+        with self._normalize_timer(sheet_name):
+            parsed = res.json() if res.status_code == 200 else None
+            return self._parse_sheet_response(sheet_name, res.status_code, res.text, parsed)
+
+    def _get_sheet(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """
+        Read-through: served from the snapshot cache when fresh; stale snapshots are
+        returned immediately and refreshed in the background. Concurrent misses on
+        one sheet share a single fetch (without the cache every caller gets its own rows).
+        """
+        if self.cache is None:
+            return self._fetch_sheet(sheet_name)
+
+        table, state = self.cache.lookup(sheet_name)
+        if state == SnapshotCache.STALE:
+            self.cache.refresh_in_background(sheet_name, lambda: self._fetch_sheet(sheet_name, self._sheet_params(sheet_name)))
+        if table is not None:
+            return table
+
+        with self._inflight_lock:
+            future = self._inflight.get(sheet_name)
+            loading = future is None
+            if loading:
+                future = self._inflight[sheet_name] = Future()
+        if not loading:
+            return future.result()
+
+        try:
+            future.set_result(self._load_sheet(sheet_name))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[sheet_name]
+        return future.result()
+
+    def _load_sheet(self, sheet_name: str) -> Any:
+        # expired: with delta sync only the rows changed since the snapshot's revision come back
+        table = self._sync_fetched(sheet_name, self._fetch_sheet(sheet_name, self._sheet_params(sheet_name)))
+        if table is None:
+            table = self._sync_fetched(sheet_name, self._fetch_sheet(sheet_name, self._sheet_params(sheet_name)))
+        return table
+
+    def _post(self, payload: Dict[str, Any], what: str):
+        with self._http_timer(what, payload.get("action", "post")):
+            res = self.session.post(
+                self.script_url,
+                data=json.dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout,
+            )
 
         if res.status_code != 200:
-            raise Exception(f"Update failed ({sheet}): {res.text}")
+            # 4xx (bar timeouts / rate limits) won't succeed on a resend
+            if 400 <= res.status_code < 500 and res.status_code not in (408, 429):
+                raise PermanentWriteError(f"Update rejected ({what}): HTTP {res.status_code} {res.text}")
+            raise Exception(f"Update failed ({what}): {res.text}")
 
         return res.json()
 
+    def _update_cell(self, sheet: str, key_column: str, key_value: str, update_column: str, update_value: str):
+        """
+        Uses Apps Script POST update API.
+        Requires Apps Script to support action=update.
+        """
+        update = self._cell_update(sheet, key_column, key_value, update_column, update_value)
+        if self._writer is not None:
+            return self._queue_updates([update])
+        result = self._post({"action": "update", **update}, sheet)
+        self._apply_to_cache([update], result)
+        return result
+
+    def _batch_update(self, updates: List[Dict[str, Any]]):
+        """
+        Sends many cell updates (possibly across sheets) in one POST.
+        Requires Apps Script to support action=batchUpdate:
+        {"action": "batchUpdate", "updates": [{sheet, keyColumn, keyValue, updateColumn, updateValue}, ...]}
+        """
+        if not updates:
+            return {"status": "success", "updated": 0}
+
+        if self._writer is not None:
+            return self._queue_updates(updates)
+
+        if not self.batch_writes:
+            result = None
+            for u in updates:
+                result = self._update_cell(u["sheet"], u["keyColumn"], u["keyValue"], u["updateColumn"], u["updateValue"])
+            return result
+
+        sheets = sorted({u["sheet"] for u in updates})
+        result = self._post({"action": "batchUpdate", "updates": updates}, ", ".join(sheets))
+        self._apply_to_cache(updates, result)
+        return result
+
+    # -------------------------
+    # WRITE-BEHIND
+    # -------------------------
+
+    def _queue_updates(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self._apply_to_cache(updates, None)
+        pending = self._writer.enqueue(updates)
+        return {"status": "queued", "updated": len(updates), "pending": pending}
+
+    def _send_updates(self, updates: List[Dict[str, Any]]):
+        """
+        Worker side of write-behind: one POST per flush (per cell without batchUpdate).
+        Raises on HTTP errors so the queue retries; rejections raise PermanentWriteError.
+        """
+        if not self.batch_writes:
+            result = None
+            for u in updates:
+                result = self._check_write(self._post({"action": "update", **u}, u["sheet"]), u["sheet"])
+            return result
+        sheets = ", ".join(sorted({u["sheet"] for u in updates}))
+        return self._check_write(self._post({"action": "batchUpdate", "updates": updates}, sheets), sheets)
+
+    def _check_write(self, result: Any, what: str) -> Any:
+        # validation errors come back as 200 + {"error"/"errors"}
+        if isinstance(result, dict) and ("error" in result or "errors" in result):
+            raise PermanentWriteError(f"Update rejected ({what}): {result.get('error') or result.get('errors')}")
+        return result
+
+    def _on_dead_letter(self, updates: List[Dict[str, Any]], error: str):
+        # our patched snapshot no longer matches the sheet: refetch it
+        if self.cache is not None:
+            for sheet in {u["sheet"] for u in updates}:
+                self.cache.invalidate(sheet)
+
+    def flush_writes(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sends queued writes now and waits for them. True if nothing is left queued.
+        """
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def write_stats(self) -> Dict[str, Any]:
+        if self._writer is None:
+            return {"write_behind": False}
+        return {"write_behind": True, **self._writer.stats()}
+
     # -------------------------
     # READ FUNCTIONS
     # -------------------------
@@ -101,6 +537,29 @@ class SheetsClient:
     def get_mission_data(self):
         return self._get_sheet("missions")
 
+    def load_tables(self, tables: Iterable[str]) -> Dict[str, Any]:
+        """
+        Loads several tables at once, fetching them in parallel.
+
+        tables example: ["pilots", "drones", "missions"]
+        Returns {"pilots": [...], "drones": [...], "missions": [...]}
+        """
+        sheets = self._table_sheets(tables)
+
+        if len(sheets) <= 1:
+            return {n: self._get_sheet(sheet) for n, sheet in sheets.items()}
+
+        # copied context: fetch threads report into the caller's request timings (app.metrics)
+        executor = self._get_executor()
+        futures = {n: executor.submit(contextvars.copy_context().run, self._get_sheet, sheet) for n, sheet in sheets.items()}
+        return {n: f.result() for n, f in futures.items()}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._fetch_workers, thread_name_prefix="sheets-fetch")
+            return self._executor
+
     # -------------------------
     # UPDATE FUNCTIONS
     # -------------------------
@@ -131,9 +590,27 @@ class SheetsClient:
         """
         Writes assigned pilot/drone into missions sheet.
         """
-        self._update_cell("missions", "mission_id", mission_id, "assigned_pilot", pilot_name)
-        self._update_cell("missions", "mission_id", mission_id, "assigned_drone", drone_id)
-        return self._update_cell("missions", "mission_id", mission_id, "status", "assigned")
+        return self._batch_update(self._mission_assignment_updates(mission_id, pilot_name, drone_id))
+
+    def assign_mission(
+        self,
+        mission_id: str,
+        pilot_name: str,
+        drone_id: str,
+        pilot_status: Optional[str] = None,
+        drone_status: Optional[str] = None,
+    ):
+        """
+        Writes a full assignment in one round trip:
+        missions row (pilot, drone, status) + pilot status + drone status.
+        """
+        return self._batch_update(self._assignment_updates(mission_id, pilot_name, drone_id, pilot_status, drone_status))
+
+    def assign_missions(self, assignments: List[Dict[str, Any]]):
+        """
+        Writes many assignments (e.g. a batch plan) in one round trip.
+        """
+        return self._batch_update(self._bulk_assignment_updates(assignments))
 
     def update_mission_status(self, mission_id: str, status: str):
         return self._update_cell("missions", "mission_id", mission_id, "status", status)
@@ -0,0 +1,382 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class SheetTable(list):
+    """
+    Rows of one sheet (list[dict]) plus snapshot metadata.
+
+    Behaves exactly like the list[dict] the rest of the app expects, but also
+    carries a version number that changes whenever the rows change
+    (refetch or local patch).
+
+    Structures derived from the rows (indexes) can be attached with derived();
+    they are built once per snapshot and told about patches via
+    on_patch(pos, column, old_value, new_value). Structures without
+    on_patch are dropped on patch and rebuilt on next use.
+
+    Rows are copy-on-write: a patch or merge builds a new row and swaps it
+    into its slot, so readers iterating the table (other threads share the
+    snapshot) see each row either entirely before or entirely after a change.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = (), name: str = "", version: int = 0, revision: Optional[int] = None):
+        """
+        version  -> local counter, bumped on every change (refetch, patch, merged delta)
+        revision -> backend revision the rows were synced to (delta sync), None if unknown
+        """
+        super().__init__(rows)
+        self.name = name
+        self.version = version
+        self.revision = revision
+        self.fetched_at = time.monotonic()
+        self._key_positions: Dict[str, Dict[str, int]] = {}
+        self._derived: Dict[str, Any] = {}
+
+    def derived(self, name: str, factory: Callable[["SheetTable"], Any]) -> Any:
+        obj = self._derived.get(name)
+        if obj is None:
+            obj = factory(self)
+            self._derived[name] = obj
+        return obj
+
+    def find(self, key_column: str, key_value: Any) -> Optional[int]:
+        """
+        Returns row position for key_column == key_value (case-insensitive), or None.
+        """
+        positions = self._key_positions.get(key_column)
+        if positions is None:
+            positions = {}
+            for i, row in enumerate(self):
+                positions.setdefault(str(row.get(key_column, "")).strip().lower(), i)
+            self._key_positions[key_column] = positions
+        return positions.get(str(key_value).strip().lower())
+
+    def patch(self, key_column: str, key_value: Any, column: str, value: Any) -> bool:
+        """
+        Applies a single cell write to the local rows.
+        Returns False if the row isn't in this snapshot.
+        """
+        pos = self.find(key_column, key_value)
+        if pos is None:
+            return False
+
+        self._update_row(pos, {column: value})
+        self.version += 1
+        return True
+
+    def merge(self, changes: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Applies changed rows from a delta sync: position -> full row.
+        Existing rows are replaced by an updated copy (derived indexes get
+        on_patch for the cells that actually differ); positions == len(self),
+        len(self) + 1, ... are appended, which drops derived structures.
+        Returns the number of changed cells + appended rows.
+        """
+        changed = 0
+        appended = False
+        for pos in sorted(changes):
+            row = changes[pos]
+            if pos == len(self):
+                self.append(row)
+                appended = True
+                changed += 1
+                continue
+
+            changed += self._update_row(pos, row)
+
+        if appended:
+            self._key_positions.clear()
+            self._derived.clear()
+        if changed:
+            self.version += 1
+        return changed
+
+    def _update_row(self, pos: int, values: Dict[str, Any]) -> int:
+        """
+        Swaps in a copy of row pos with values applied; the old row object is
+        never modified. Returns the number of cells that changed.
+        """
+        current = self[pos]
+        diffs = [(column, current.get(column), value) for column, value in values.items() if current.get(column) != value]
+        if not diffs:
+            return 0
+
+        row = _copy_row(current)
+        for column, _, value in diffs:
+            row[column] = value
+        self[pos] = row
+
+        for column, old_value, value in diffs:
+            if column in self._key_positions:
+                del self._key_positions[column]
+            for name, obj in list(self._derived.items()):
+                on_patch = getattr(obj, "on_patch", None)
+                if on_patch is None:
+                    self._derived.pop(name, None)
+                else:
+                    on_patch(pos, column, old_value, value)
+        return len(diffs)
+
+
+def _copy_row(row: Any) -> Any:
+    # records copy their values list (and re-parse); plain dict rows are shallow-copied
+    copy = getattr(row, "copy", None)
+    return copy() if copy is not None else dict(row)
+
+
+class SheetDelta:
+    """
+    A delta-sync read: rows of one sheet at backend `revision`.
+
+    full  -> rows is the whole sheet (first sync, or the backend could not diff from base)
+    else  -> rows is {position: row} for the rows changed since revision `base`
+    count -> data rows the backend sheet has now (None if it didn't say); a partial
+             delta that doesn't add up to it means rows were deleted / moved
+    """
+
+    def __init__(
+        self,
+        revision: int,
+        rows: Any,
+        base: Optional[int] = None,
+        headers: Optional[List[str]] = None,
+        count: Optional[int] = None,
+    ):
+        self.revision = revision
+        self.rows = rows
+        self.base = base
+        self.headers = headers
+        self.count = count
+
+    @property
+    def full(self) -> bool:
+        return self.base is None
+
+
+class SnapshotCache:
+    """
+    In-process read-through cache of sheet snapshots.
+
+    ttl       -> seconds a snapshot is served as fresh
+    stale_ttl -> extra seconds a snapshot may be served while it is refreshed in the background
+                 (stale-while-revalidate); older snapshots are refetched synchronously
+    """
+
+    FRESH = "fresh"
+    STALE = "stale"
+    MISS = "miss"
+
+    def __init__(self, ttl: float = 30.0, stale_ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._tables: Dict[str, SheetTable] = {}
+        self._versions: Dict[str, int] = {}
+        self._refreshing: Dict[str, int] = {}
+        # sheet -> local writes not yet on the backend (write-behind); re-applied over fetched rows
+        self.overlay: Optional[Callable[[str], List[Dict[str, Any]]]] = None
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "patches": 0,
+            "deltas": 0,
+            "delta_rows": 0,
+            "revision_gaps": 0,
+        }
+
+    # -------------------------
+    # READS
+    # -------------------------
+
+    def lookup(self, sheet: str) -> Tuple[Optional[SheetTable], str]:
+        """
+        Returns (table, state) where state is fresh / stale / miss and counts it.
+        """
+        with self._lock:
+            table = self._tables.get(sheet)
+            if table is None:
+                self._stats["misses"] += 1
+                return None, self.MISS
+
+            age = self.clock() - table.fetched_at
+            if age <= self.ttl:
+                self._stats["hits"] += 1
+                return table, self.FRESH
+            if age <= self.ttl + self.stale_ttl:
+                self._stats["stale_hits"] += 1
+                return table, self.STALE
+
+            self._stats["misses"] += 1
+            return None, self.MISS
+
+    def peek(self, sheet: str) -> Optional[SheetTable]:
+        with self._lock:
+            return self._tables.get(sheet)
+
+    def store(self, sheet: str, rows: List[Dict[str, Any]], revision: Optional[int] = None) -> SheetTable:
+        with self._lock:
+            version = self._versions.get(sheet, 0) + 1
+            self._versions[sheet] = version
+            table = SheetTable(rows, name=sheet, version=version, revision=revision)
+            table.fetched_at = self.clock()
+            self._tables[sheet] = table
+            return table
+
+    # -------------------------
+    # DELTA SYNC
+    # -------------------------
+
+    def since(self, sheet: str) -> int:
+        """
+        Revision to ask the backend for changes since (0 -> full sheet).
+        Expired snapshots still count: a delta is cheaper than a reload.
+        """
+        with self._lock:
+            table = self._tables.get(sheet)
+            return table.revision if table is not None and table.revision is not None else 0
+
+    def sync(self, sheet: str, fetched: Any) -> Optional[SheetTable]:
+        """
+        Stores a fetch result: plain rows / full deltas replace the snapshot,
+        partial deltas are merged into it in place.
+        Returns None on a revision gap (delta doesn't start at or before our
+        revision, the columns changed, or rows were deleted / moved); the
+        caller then reloads in full.
+        """
+        with self._lock:
+            if not isinstance(fetched, SheetDelta):
+                return self._apply_overlay(self.store(sheet, fetched))
+            if fetched.full:
+                return self._apply_overlay(self.store(sheet, fetched.rows, revision=fetched.revision))
+
+            table = self._tables.get(sheet)
+            if table is None or table.revision is None or fetched.base > table.revision or not self._mergeable(table, fetched):
+                self._stats["revision_gaps"] += 1
+                return None
+
+            if fetched.revision >= table.revision:
+                table.merge(fetched.rows)
+                table.revision = fetched.revision
+                self._versions[sheet] = table.version
+            table.fetched_at = self.clock()
+            self._stats["deltas"] += 1
+            self._stats["delta_rows"] += len(fetched.rows)
+            return self._apply_overlay(table)
+
+    def _apply_overlay(self, table: SheetTable) -> SheetTable:
+        if self.overlay is None:
+            return table
+        for u in self.overlay(table.name):
+            table.patch(u["keyColumn"], u["keyValue"], u["updateColumn"], u["updateValue"])
+        self._versions[table.name] = table.version
+        return table
+
+    def _mergeable(self, table: SheetTable, delta: SheetDelta) -> bool:
+        """
+        Deltas are keyed by row position, so they only apply if no row moved:
+        same columns, new rows appended right after the last one, the backend's
+        row count matches, and every changed row still has the id (first
+        column) we hold at that position.
+        """
+        if table and delta.headers is not None and list(table[0]) != delta.headers:
+            return False
+        appended = sorted(pos for pos in delta.rows if pos >= len(table))
+        if appended != list(range(len(table), len(table) + len(appended))):
+            return False
+        if delta.count is not None and delta.count != len(table) + len(appended):
+            return False
+        key = delta.headers[0] if delta.headers else None
+        return key is None or all(
+            table[pos].get(key) == row.get(key) for pos, row in delta.rows.items() if pos < len(table)
+        )
+
+    # -------------------------
+    # BACKGROUND REFRESH
+    # -------------------------
+
+    def begin_refresh(self, sheet: str) -> bool:
+        """
+        Marks a refresh as in flight. Returns False if one is already running.
+        """
+        with self._lock:
+            if sheet in self._refreshing:
+                return False
+            self._refreshing[sheet] = self._versions.get(sheet, 0)
+            return True
+
+    def finish_refresh(self, sheet: str, rows: Optional[List[Dict[str, Any]]]) -> Optional[SheetTable]:
+        """
+        Stores refreshed rows unless a local write landed while the fetch was in flight
+        (the fetched rows could predate that write); in that case the snapshot is
+        left as is and the next stale read refreshes again.
+        """
+        with self._lock:
+            started_at = self._refreshing.pop(sheet, None)
+            if rows is None:
+                self._stats["refresh_errors"] += 1
+                return None
+            if started_at is not None and self._versions.get(sheet, 0) != started_at:
+                return None
+            self._stats["refreshes"] += 1
+            table = self.sync(sheet, rows)
+            if table is None:
+                # revision gap: drop the snapshot so the next read reloads it in full
+                self._tables.pop(sheet, None)
+            return table
+
+    def refresh_in_background(self, sheet: str, loader: Callable[[], Any]):
+        if not self.begin_refresh(sheet):
+            return
+
+        def run():
+            try:
+                rows = loader()
+            except Exception:
+                rows = None
+            self.finish_refresh(sheet, rows)
+
+        threading.Thread(target=run, name=f"sheet-refresh-{sheet}", daemon=True).start()
+
+    # -------------------------
+    # WRITES / INVALIDATION
+    # -------------------------
+
+    def patch(self, sheet: str, key_column: str, key_value: Any, column: str, value: Any):
+        """
+        Write-through: patches the cached row in place (new version, same fetched_at).
+        Drops the snapshot if the row isn't cached so the next read refetches it.
+        """
+        with self._lock:
+            table = self._tables.get(sheet)
+            if table is None:
+                return
+            if table.patch(key_column, key_value, column, value):
+                self._versions[sheet] = table.version
+                self._stats["patches"] += 1
+            else:
+                self._tables.pop(sheet, None)
+
+    def invalidate(self, sheet: Optional[str] = None):
+        with self._lock:
+            if sheet is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(sheet, None)
+
+    def version(self, sheet: str) -> int:
+        with self._lock:
+            return self._versions.get(sheet, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+            stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+            stats["versions"] = dict(self._versions)
+            return stats
@@ -0,0 +1,217 @@
+import heapq
+import time
+from datetime import date
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.availability_index import drone_availability, pilot_availability
+from app.booking_index import BookingIndex, booking_index, mission_window
+from app.conflict_detector import ConflictDetector
+from app.fleet_index import drone_index, pilot_index
+from app.records import Mission, as_mission, norm
+from app.snapshot_cache import SheetTable
+
+# role -> (roster key column, missions column holding the assignee)
+ROLES = {
+    "pilot": ("name", "assigned_pilot"),
+    "drone": ("drone_id", "assigned_drone"),
+}
+
+
+class UrgentReassigner:
+    """
+    Finds the least disruptive way to free a pilot / drone for an urgent mission.
+
+    Candidates that are busy on overlapping missions (per the missions sheet,
+    via BookingIndex) can be pulled; every mission they leave must then be
+    backfilled by someone else, who may in turn be pulled from their own
+    mission (cascade), up to max_depth levels.
+
+    Plans are expanded best-first from a priority queue:
+    cost = 1 per displaced mission + UNFILLED_PENALTY per mission left without
+    cover; ties go to the plan whose displaced work ends earliest. The search
+    stops at the first complete plan (the cheapest) or when the latency budget
+    runs out, returning the best plan seen so far.
+
+    Only bookings can be displaced: candidates (for the urgent mission and
+    for every backfill) must pass the same availability windows and
+    cert / location / maintenance checks as a normal assignment.
+    """
+
+    UNFILLED_PENALTY = 10.0
+
+    def __init__(self, max_depth: int = 2, budget_ms: float = 50.0, clock=time.perf_counter, detector: Optional[ConflictDetector] = None):
+        self.max_depth = max_depth
+        self.budget_ms = budget_ms
+        self.clock = clock
+        self.detector = detector or ConflictDetector()
+
+    # --------------------------------------------------
+    # MAIN ENTRY
+    # --------------------------------------------------
+    def plan(self, role: str, rows, missions, mission, bookings: Optional[BookingIndex] = None) -> Optional[Dict[str, Any]]:
+        """
+        role -> "pilot" or "drone"
+
+        Returns None if nobody is eligible, else:
+        {
+          "resource":  roster row to put on the urgent mission,
+          "backfills": [{"mission_id", "from", "to"}]   (from / to are names / ids),
+          "unfilled":  [mission_id],                    (displaced, nobody to cover)
+          "cost":      float,
+          "complete":  True if nothing is left unfilled,
+          "timed_out": True if the budget ran out before the search finished
+        }
+        """
+        key_column, assigned_column = ROLES[role]
+        bookings = bookings if bookings is not None else booking_index(missions)
+        mission = as_mission(mission)
+        deadline = self.clock() + self.budget_ms / 1000.0
+        seq = count()
+
+        keys = [norm(row.get(key_column)) for row in rows]
+        # mission_id -> eligible positions (displaced missions come up repeatedly)
+        eligible: Dict[Any, List[int]] = {}
+
+        # heap entry: (cost, latest displaced end, seq, state)
+        # state: (target pos, backfills tuple, open tuple of (mission_id, depth), unfilled tuple, used keys)
+        heap: List[Tuple[float, date, int, Tuple]] = []
+        best = None
+
+        timed_out = False
+        for pos in self._eligible(role, rows, mission, eligible):
+            clashes = bookings.booked(role, keys[pos], *mission_window(mission), exclude=mission.get("mission_id"))
+            if clashes and self.max_depth < 1:
+                continue
+            state = (pos, (), tuple((c[2], 1) for c in clashes), (), frozenset([keys[pos]]))
+            heapq.heappush(heap, (float(len(clashes)), self._latest_end(clashes), next(seq), state))
+            if not clashes:
+                # free by dates: nothing can beat cost 0
+                break
+            if self.clock() > deadline:
+                timed_out = True
+                break
+
+        if not heap:
+            return None
+
+        while heap and not timed_out:
+            if self.clock() > deadline:
+                timed_out = True
+                break
+
+            cost, latest, _, state = heapq.heappop(heap)
+            target, backfills, open_missions, unfilled, used = state
+
+            if not open_missions:
+                # cheapest complete plan (costs only grow along a path)
+                best = (cost, state)
+                break
+            # fallback if the budget runs out: whatever is still open counts as unfilled
+            effective = cost + self.UNFILLED_PENALTY * len(open_missions)
+            if best is None or effective < best[0]:
+                best = (effective, state)
+
+            (mission_id, depth), rest = open_missions[0], open_missions[1:]
+            displaced = self._find_mission(missions, mission_id)
+
+            # option: leave it uncovered
+            heapq.heappush(heap, (
+                cost + self.UNFILLED_PENALTY,
+                latest,
+                next(seq),
+                (target, backfills, rest, unfilled + (mission_id,), used),
+            ))
+
+            if displaced is None:
+                continue
+            window = mission_window(displaced)
+            for pos in self._eligible(role, rows, displaced, eligible):
+                if keys[pos] in used:
+                    continue
+                clashes = bookings.booked(role, keys[pos], *window, exclude=mission_id)
+                if clashes and depth >= self.max_depth:
+                    continue
+                heapq.heappush(heap, (
+                    cost + len(clashes),
+                    max(latest, self._latest_end(clashes)),
+                    next(seq),
+                    (
+                        target,
+                        backfills + ((mission_id, displaced.get(assigned_column), rows[pos].get(key_column)),),
+                        rest + tuple((c[2], depth + 1) for c in clashes),
+                        unfilled,
+                        used | {keys[pos]},
+                    ),
+                ))
+
+        if best is None:
+            # budget ran out before any plan was expanded: cheapest root as-is
+            cost, _, _, state = heap[0]
+            best = (cost + self.UNFILLED_PENALTY * len(state[2]), state)
+
+        cost, (target, backfills, open_missions, unfilled, _) = best
+        unfilled = unfilled + tuple(mission_id for mission_id, _ in open_missions)
+        return {
+            "resource": rows[target],
+            "backfills": [{"mission_id": m, "from": old, "to": new} for m, old, new in backfills],
+            "unfilled": list(unfilled),
+            "cost": cost,
+            "complete": not unfilled,
+            "timed_out": timed_out,
+        }
+
+    # --------------------------------------------------
+    # HELPERS
+    # --------------------------------------------------
+    def _eligible(self, role: str, rows, mission: Mission, cache: Dict[Any, List[int]]) -> List[int]:
+        """
+        Anyone who could take the mission if their bookings didn't clash: qualified,
+        not on leave / before available_from / in maintenance during its dates.
+        """
+        mission_id = mission.get("mission_id")
+        if mission_id in cache:
+            return cache[mission_id]
+
+        if role == "pilot":
+            positions = pilot_index(rows).match(
+                exclude_status="leave",
+                location=mission.get("location"),
+                tags=mission.required_cert_list,
+            )
+            availability, check = pilot_availability(rows), self.detector.pilot_conflicts
+        else:
+            positions = drone_index(rows).match(
+                exclude_status="maintenance",
+                location=mission.get("location"),
+                tag_substring=mission.get("required_capability"),
+            )
+            availability, check = drone_availability(rows), self.detector.drone_conflicts
+
+        if mission.start is not None:
+            positions = availability.free(positions, *mission_window(mission))
+
+        project_req = {
+            "mission_id": mission_id,
+            "location": mission.get("location"),
+            "start_date": mission.get("start_date"),
+            "end_date": mission.get("end_date"),
+            "required_certs": list(mission.required_cert_list),
+        }
+        project = mission.get("project") or mission_id or ""
+        positions = [pos for pos in positions if not check(rows[pos], project, project_req, check_bookings=False)]
+
+        cache[mission_id] = positions
+        return positions
+
+    def _latest_end(self, clashes: List[Tuple[date, date, str]]) -> date:
+        return max((c[1] for c in clashes), default=date.min)
+
+    def _find_mission(self, missions, mission_id: str) -> Optional[Mission]:
+        if isinstance(missions, SheetTable):
+            pos = missions.find("mission_id", mission_id)
+            return as_mission(missions[pos]) if pos is not None else None
+        for m in missions:
+            if norm(m.get("mission_id")) == norm(mission_id):
+                return as_mission(m)
+        return None
@@ -0,0 +1,159 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.records import Record, norm, parse_tags
+
+
+class _Categories:
+    """
+    Categorical encoding: value -> small int code (codes only ever grow).
+    """
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        c = self.codes.get(value)
+        if c is None:
+            c = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return c
+
+    def lookup(self, predicate) -> np.ndarray:
+        """
+        Boolean table indexed by code: True where predicate(value).
+        """
+        return np.fromiter((predicate(v) for v in self.values), dtype=bool, count=len(self.values))
+
+
+class VectorIndex:
+    """
+    Column-encoded roster/fleet snapshot for vectorized filtering:
+
+    status_codes / location_codes -> int32 categorical code per row
+    tag_bits                      -> uint64 bitmask words per row (one bit per cert / capability)
+
+    A query like "available pilots in Mumbai with DGCA + Night Ops" is a handful
+    of NumPy boolean ops over the whole table. Same match() / on_patch()
+    interface as FleetIndex.
+    """
+
+    WORD_BITS = 64
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], tag_column: str):
+        self.tag_column = tag_column
+        self.statuses = _Categories()
+        self.locations = _Categories()
+        self.tags = _Categories()
+
+        status_codes: List[int] = []
+        location_codes: List[int] = []
+        row_bits: List[int] = []
+
+        for row in rows:
+            if isinstance(row, Record):
+                status, location, tags = row.status_key, row.location_key, row.tag_set(tag_column) or ()
+            else:
+                status, location, tags = norm(row.get("status")), norm(row.get("location")), parse_tags(row.get(tag_column))
+            status_codes.append(self.statuses.code(status))
+            location_codes.append(self.locations.code(location))
+            bits = 0
+            for t in tags:
+                bits |= 1 << self.tags.code(t)
+            row_bits.append(bits)
+
+        self.size = len(status_codes)
+        self.status_codes = np.array(status_codes, dtype=np.int32)
+        self.location_codes = np.array(location_codes, dtype=np.int32)
+
+        # split each row's Python int bitmask into 64-bit words
+        words = self._words(len(self.tags.values))
+        word_mask = (1 << self.WORD_BITS) - 1
+        self.tag_bits = np.empty((self.size, words), dtype=np.uint64)
+        for w in range(words):
+            shift = w * self.WORD_BITS
+            self.tag_bits[:, w] = np.fromiter(((b >> shift) & word_mask for b in row_bits), dtype=np.uint64, count=self.size)
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+
+    def match(
+        self,
+        statuses: Optional[Iterable[str]] = None,
+        exclude_status: Optional[str] = None,
+        location: Optional[str] = None,
+        tags: Iterable[str] = (),
+        tag_substring: Optional[str] = None,
+    ) -> List[int]:
+        """
+        Same semantics as FleetIndex.match(); returns row positions in sheet order.
+        """
+        mask = np.ones(self.size, dtype=bool)
+
+        if statuses is not None:
+            wanted = {norm(s) for s in statuses}
+            mask &= self.statuses.lookup(lambda v: v in wanted)[self.status_codes]
+
+        if exclude_status:
+            needle = norm(exclude_status)
+            mask &= ~self.statuses.lookup(lambda v: needle in v)[self.status_codes]
+
+        if location:
+            needle = norm(location)
+            mask &= self.locations.lookup(lambda v: needle in v)[self.location_codes]
+
+        required = [norm(t) for t in tags]
+        if required:
+            if any(t not in self.tags.codes for t in required):
+                return []
+            req = self._bitmask(self.tags.codes[t] for t in required)
+            mask &= ((self.tag_bits & req) == req).all(axis=1)
+
+        if tag_substring:
+            needle = norm(tag_substring)
+            any_of = self._bitmask(c for v, c in self.tags.codes.items() if needle in v)
+            mask &= (self.tag_bits & any_of).any(axis=1)
+
+        return np.flatnonzero(mask).tolist()
+
+    # -------------------------
+    # INCREMENTAL UPDATES
+    # -------------------------
+
+    def on_patch(self, pos: int, column: str, old_value: Any, new_value: Any):
+        if column == "status":
+            self.status_codes[pos] = self.statuses.code(norm(new_value))
+        elif column == "location":
+            self.location_codes[pos] = self.locations.code(norm(new_value))
+        elif column == self.tag_column:
+            codes = [self.tags.code(t) for t in parse_tags(new_value)]
+            self._grow(len(self.tags.values))
+            self.tag_bits[pos] = 0
+            for c in codes:
+                self._set_bit(pos, c)
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def _words(self, n_tags: int) -> int:
+        return max(1, -(-n_tags // self.WORD_BITS))
+
+    def _grow(self, n_tags: int):
+        extra = self._words(n_tags) - self.tag_bits.shape[1]
+        if extra > 0:
+            self.tag_bits = np.hstack([self.tag_bits, np.zeros((self.size, extra), dtype=np.uint64)])
+
+    def _set_bit(self, pos: int, code: int):
+        word, bit = divmod(code, self.WORD_BITS)
+        self.tag_bits[pos, word] |= np.uint64(1 << bit)
+
+    def _bitmask(self, codes: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self.tag_bits.shape[1], dtype=np.uint64)
+        for c in codes:
+            word, bit = divmod(c, self.WORD_BITS)
+            mask[word] |= np.uint64(1 << bit)
+        return mask
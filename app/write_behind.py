@@ -0,0 +1,297 @@
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Update = Dict[str, Any]
+CellKey = Tuple[str, str, str, str]
+
+# dead-lettered batches kept for write_stats() / inspection (oldest dropped first)
+MAX_DEAD_LETTERS = 100
+
+
+class PermanentWriteError(Exception):
+    """
+    The backend rejected the write (4xx, validation error); resending it won't help.
+    """
+
+
+def cell_key(update: Update) -> CellKey:
+    return (
+        update["sheet"],
+        update["keyColumn"],
+        str(update["keyValue"]).strip().lower(),
+        update["updateColumn"],
+    )
+
+
+class WriteBehindQueue:
+    """
+    Queues cell updates and sends them from a background thread.
+
+    send(updates) performs one batched write and raises on transport errors.
+    Writes to the same (sheet, key, column) that arrive within flush_interval
+    of the first queued write collapse into one (last value wins). Failed
+    sends are retried with exponential backoff (backoff .. max_backoff
+    seconds), at most max_retries times (None = until the queue is closed).
+
+    Batches that raise PermanentWriteError, or still fail after max_retries,
+    are dropped into a dead-letter list (dead_letters()) instead of blocking
+    the queue; on_dead_letter lets the owner resync what it had patched.
+
+    journal_path   -> optional JSON-lines file every queued update is appended
+                      to before enqueue returns; it is rewritten to the unsent
+                      updates after each flush and replayed on start, so writes
+                      survive a crash or a close() that could not drain in time.
+    on_result      -> called with (batch, backend result) after each send
+    on_dead_letter -> called with (batch, error message) for each dead-lettered batch
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[Update]], Any],
+        flush_interval: float = 0.5,
+        max_batch: int = 500,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_retries: Optional[int] = 8,
+        journal_path: Optional[str] = None,
+        on_result: Optional[Callable[[List[Update], Any], None]] = None,
+        on_dead_letter: Optional[Callable[[List[Update], str], None]] = None,
+    ):
+        self.send = send
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.journal_path = journal_path
+        self.on_result = on_result
+        self.on_dead_letter = on_dead_letter
+        self.last_error: Optional[str] = None
+
+        self._pending: "OrderedDict[CellKey, Update]" = OrderedDict()
+        self._inflight: List[Update] = []
+        # a dead-lettered batch whose on_dead_letter hook hasn't returned yet
+        self._settling = False
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._closed = False
+        self._dead: List[Dict[str, Any]] = []
+        self._stats = {"enqueued": 0, "coalesced": 0, "flushes": 0, "sent": 0, "retries": 0, "dead_lettered": 0}
+
+        if journal_path:
+            self._replay_journal()
+
+        self._thread = threading.Thread(target=self._run, name="sheets-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # -------------------------
+    # PUBLIC API
+    # -------------------------
+
+    def enqueue(self, updates: List[Update]) -> int:
+        """
+        Queues updates; returns how many cells are now waiting to be sent.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            self._journal_append(updates)
+            self._add(updates)
+            self._cond.notify_all()
+            return len(self._pending)
+
+    def pending_for(self, sheet: str) -> List[Update]:
+        """
+        Unsent updates for one sheet, oldest first (re-applied over freshly fetched rows).
+        """
+        with self._cond:
+            return [u for u in self._inflight + list(self._pending.values()) if u["sheet"] == sheet]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sends everything queued now (skipping the coalescing window) and waits.
+        Returns False if the queue wasn't empty after timeout seconds.
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight and not self._settling, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Drains the queue (up to timeout) and stops the worker.
+        Returns False if writes were left unsent; they stay in the journal
+        (if any) and are sent by the next queue started on it.
+        """
+        if self._closed:
+            return not self._pending
+        drained = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=max(self.backoff, 1.0))
+        return drained
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """
+        Dropped batches, oldest first: [{"updates", "error"}].
+        """
+        with self._cond:
+            return [dict(entry) for entry in self._dead]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self._stats,
+                "pending": len(self._pending),
+                "inflight": len(self._inflight),
+                "dead_letters": len(self._dead),
+                "last_dead_letter": self._dead[-1]["error"] if self._dead else None,
+                "last_error": self.last_error,
+            }
+
+    # -------------------------
+    # WORKER
+    # -------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                # coalescing window: later writes to the same cells replace queued ones
+                if not self._flush_requested:
+                    self._cond.wait_for(lambda: self._flush_requested or self._closed, timeout=self.flush_interval)
+                    if self._closed:
+                        return
+
+                batch = []
+                while self._pending and len(batch) < self.max_batch:
+                    batch.append(self._pending.popitem(last=False)[1])
+                self._inflight = batch
+                if not self._pending:
+                    self._flush_requested = False
+
+            done, error = self._send_with_retry(batch)
+
+            with self._cond:
+                self._inflight = []
+                if not done:
+                    # closed while retrying: put the batch back under any newer writes
+                    requeued = OrderedDict((cell_key(u), u) for u in batch)
+                    for key, update in self._pending.items():
+                        requeued.pop(key, None)
+                        requeued[key] = update
+                    self._pending = requeued
+                    self._cond.notify_all()
+                    return
+                if error is not None:
+                    self._dead.append({"updates": batch, "error": error})
+                    del self._dead[:-MAX_DEAD_LETTERS]
+                    self._stats["dead_lettered"] += len(batch)
+                    self._settling = self.on_dead_letter is not None
+                # the journal only has to hold what is still unsent
+                self._journal_rewrite()
+                self._cond.notify_all()
+
+            # outside the lock (and after the batch left _inflight): the owner may reload sheets
+            if self._settling:
+                try:
+                    self.on_dead_letter(batch, error)
+                finally:
+                    with self._cond:
+                        self._settling = False
+                        self._cond.notify_all()
+
+    def _send_with_retry(self, batch: List[Update]) -> Tuple[bool, Optional[str]]:
+        """
+        Returns (True, None) once sent, (True, error) if the batch was given up
+        on, (False, None) if the queue was closed while retrying.
+        """
+        delay = self.backoff
+        attempts = 0
+        while True:
+            try:
+                result = self.send(batch)
+            except PermanentWriteError as e:
+                with self._cond:
+                    self.last_error = str(e)
+                return True, str(e)
+            except Exception as e:
+                attempts += 1
+                with self._cond:
+                    self.last_error = str(e)
+                    if self.max_retries is not None and attempts > self.max_retries:
+                        return True, f"gave up after {attempts} attempts: {e}"
+                    self._stats["retries"] += 1
+                    if self._cond.wait_for(lambda: self._closed, timeout=delay):
+                        return False, None
+                delay = min(delay * 2, self.max_backoff)
+                continue
+
+            with self._cond:
+                self._stats["flushes"] += 1
+                self._stats["sent"] += len(batch)
+                self.last_error = None
+            if self.on_result is not None:
+                self.on_result(batch, result)
+            return True, None
+
+    # -------------------------
+    # HELPERS
+    # -------------------------
+
+    def _add(self, updates: List[Update]):
+        for u in updates:
+            key = cell_key(u)
+            if self._pending.pop(key, None) is not None:
+                self._stats["coalesced"] += 1
+            self._pending[key] = u
+            self._stats["enqueued"] += 1
+
+    def _journal_append(self, updates: List[Update]):
+        if not self.journal_path:
+            return
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for u in updates:
+                f.write(json.dumps(u) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _journal_rewrite(self):
+        """
+        Compacts the journal to the updates still queued (caller holds the lock,
+        so no append can interleave). Written aside and swapped in, so a crash
+        leaves either the old or the new journal.
+        """
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        unsent = self._inflight + list(self._pending.values())
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for u in unsent:
+                f.write(json.dumps(u) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def _replay_journal(self):
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        updates = []
+        for line in lines:
+            try:
+                updates.append(json.loads(line))
+            except ValueError:
+                # torn last line from a crash mid-write
+                continue
+        self._add(updates)
@@ -0,0 +1,349 @@
+"""
+Benchmark suite over a seeded synthetic fleet (benchmarks/synthetic.py).
+
+Times the hot paths at fleet scale and writes the numbers as JSON so runs
+from different commits can be compared:
+
+    python -m benchmarks.run                      # medium: 10k pilots / 5k drones / 20k missions
+    python -m benchmarks.run --scale full         # 100k / 50k / 200k
+    python -m benchmarks.run --compare benchmarks/results/<old>.json
+
+Covered:
+- CoordinatorAgent.handle_query, one entry per intent (read-only intents run
+  with the response cache cleared before every call, plus one cached entry)
+- AssignmentEngine.find_best_match, normal and urgent
+- ConflictDetector.check_conflicts
+- SheetsClient._normalize_table for each sheet
+
+The agent runs on a LocalSheetsClient over CSVs in a temp dir, so writes
+(assign / update intents) include the CSV rewrite, as in offline mode.
+Writes run after the reads, each on a different open mission / pilot / drone.
+assign_all_missions is slow at full scale and only runs with --with-assign-all.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.agent import CoordinatorAgent
+from app.booking_index import EMPTY_ASSIGNEES, booking_index
+from app.local_sheets_client import LocalSheetsClient
+from app.records import as_mission
+from app.sheets_client import SheetsClient
+from benchmarks.synthetic import generate_fleet, write_csvs
+
+SCALES = {
+    "small": (1_000, 500, 2_000),
+    "medium": (10_000, 5_000, 20_000),
+    "full": (100_000, 50_000, 200_000),
+}
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# -------------------------
+# TIMING
+# -------------------------
+
+def measure(fn: Callable[[int], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Calls fn(i) warmup + repeat times (i counts from 0 over all calls) and
+    returns summary stats of the timed calls in milliseconds. The cyclic GC is
+    off while timing (as in timeit); with millions of live rows one collection
+    would otherwise dominate whichever call it lands in.
+    """
+    for i in range(warmup):
+        fn(i)
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(warmup, warmup + repeat):
+            t0 = time.perf_counter()
+            fn(i)
+            times.append((time.perf_counter() - t0) * 1000)
+    finally:
+        gc.enable()
+    return summarize(times)
+
+
+def summarize(times: List[float]) -> Dict[str, Any]:
+    ordered = sorted(times)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "runs": len(times),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+# -------------------------
+# BENCHMARKS
+# -------------------------
+
+def bench_normalize(sheets: Dict[str, List[List[str]]], repeat: int) -> Dict[str, Any]:
+    # no requests are made; only the parsing of a list[list] response is timed
+    client = SheetsClient("http://127.0.0.1:9/unused", cache_ttl=None)
+    try:
+        return {
+            f"normalize_table[{sheet}]": measure(lambda i, rows=rows, sheet=sheet: client._normalize_table(rows, sheet), repeat)
+            for sheet, rows in sheets.items()
+        }
+    finally:
+        client.close()
+
+
+def bench_engine(agent: CoordinatorAgent, repeat: int) -> Dict[str, Any]:
+    tables = agent.sheets.load_tables(["pilots", "drones", "missions"])
+    pilots, drones, missions = tables["pilots"], tables["drones"], tables["missions"]
+    bookings = booking_index(missions)
+
+    open_missions = [m for m in map(as_mission, missions) if m.status_key == "open"]
+    if not open_missions:
+        return {}
+
+    def match(urgent: bool):
+        def run(i):
+            m = open_missions[i % len(open_missions)]
+            agent.assignment_engine.find_best_match(
+                pilots,
+                drones,
+                location=m.get("location"),
+                urgent=urgent,
+                required_certs=list(m.required_cert_list),
+                required_capability=m.get("required_capability"),
+                mission=m,
+                bookings=bookings,
+            )
+        return run
+
+    results = {
+        "find_best_match[normal]": measure(match(False), repeat),
+        "find_best_match[urgent]": measure(match(True), repeat),
+    }
+
+    # check_conflicts on the pairs already assigned in the sheet (the usual clash mix)
+    pilot_by_name = {str(p.get("name")).strip().lower(): p for p in pilots}
+    drone_by_id = {str(d.get("drone_id")).strip().lower(): d for d in drones}
+    pairs = []
+    for m in missions:
+        pilot = pilot_by_name.get(str(m.get("assigned_pilot") or "").strip().lower())
+        drone = drone_by_id.get(str(m.get("assigned_drone") or "").strip().lower())
+        if pilot is not None and drone is not None and m.get("assigned_pilot") not in EMPTY_ASSIGNEES:
+            pairs.append((pilot, drone, as_mission(m)))
+        if len(pairs) >= 1000:
+            break
+
+    if pairs:
+        def conflicts(i):
+            pilot, drone, m = pairs[i % len(pairs)]
+            project_req = {
+                "mission_id": m.get("mission_id"),
+                "location": m.get("location"),
+                "start_date": m.get("start_date"),
+                "end_date": m.get("end_date"),
+                "required_certs": list(m.required_cert_list),
+            }
+            agent.conflict_detector.check_conflicts(pilot, drone, m.get("project"), project_req, bookings)
+
+        results["check_conflicts"] = measure(conflicts, repeat)
+
+    return results
+
+
+def bench_queries(agent: CoordinatorAgent, repeat: int, with_assign_all: bool) -> Dict[str, Any]:
+    tables = agent.sheets.load_tables(["pilots", "drones", "missions"])
+    missions = tables["missions"]
+    start = min((m.start for m in (as_mission(r) for r in missions) if m.start), default=None)
+    window = f"from {start.isoformat()} to {start.isoformat()}" if start else ""
+
+    open_ids = [m.get("mission_id") for m in missions if as_mission(m).status_key == "open"]
+    pilot_names = [p.get("name") for p in tables["pilots"]]
+    drone_ids = [d.get("drone_id") for d in tables["drones"]]
+
+    reads = {
+        "show_available_pilots": "show available pilots in Bangalore with DGCA",
+        "show_available_drones": "show available drones thermal in Mumbai",
+        "show_free_pilots": f"pilots free in Delhi {window} with DGCA",
+        "show_free_drones": f"drones free in Pune {window}",
+        "audit_conflicts": "audit conflicts",
+    }
+
+    results: Dict[str, Any] = {}
+    statuses: Dict[str, Dict[str, int]] = {}
+
+    def run(name: str, query_for: Callable[[int], str], clear_cache: bool):
+        seen: Dict[str, int] = statuses.setdefault(name, {})
+
+        def call(i):
+            if clear_cache:
+                agent.response_cache.clear()
+            status = str(agent.handle_query(query_for(i)).get("status"))
+            seen[status] = seen.get(status, 0) + 1
+
+        return call
+
+    for intent, query in reads.items():
+        results[f"handle_query[{intent}]"] = measure(run(intent, lambda i, q=query: q, True), repeat)
+
+    # same query again, answered from the response cache
+    query = reads["show_available_pilots"]
+    results["handle_query[show_available_pilots, cached]"] = measure(run("show_available_pilots, cached", lambda i: query, False), repeat)
+
+    # writes: a fresh mission / resource per call so every call does real work
+    writes = {
+        "assign_mission": lambda i: f"assign mission {open_ids[i % len(open_ids)]}",
+        "urgent_assign_mission": lambda i: f"urgent assign mission {open_ids[-1 - i % len(open_ids)]}",
+        "update_pilot_status": lambda i: f"update pilot {pilot_names[i % len(pilot_names)]} to On Leave",
+        "update_drone_status": lambda i: f"update drone {drone_ids[i % len(drone_ids)]} to Maintenance",
+    }
+    for intent, query_for in writes.items():
+        if intent.endswith("mission") and not open_ids:
+            continue
+        results[f"handle_query[{intent}]"] = measure(run(intent, query_for, False), repeat, warmup=0)
+
+    if with_assign_all:
+        results["handle_query[assign_all_missions]"] = measure(
+            run("assign_all_missions", lambda i: "assign all open missions", False), 1, warmup=0
+        )
+
+    for name, seen in statuses.items():
+        key = f"handle_query[{name}]"
+        if key in results:
+            results[key]["statuses"] = seen
+    return results
+
+
+# -------------------------
+# RUNNER
+# -------------------------
+
+def run_suite(args) -> Dict[str, Any]:
+    pilots, drones, missions = SCALES[args.scale]
+    pilots = args.pilots or pilots
+    drones = args.drones or drones
+    missions = args.missions or missions
+
+    t0 = time.perf_counter()
+    sheets = generate_fleet(pilots, drones, missions, seed=args.seed, start=args.start)
+    generate_ms = (time.perf_counter() - t0) * 1000
+
+    results: Dict[str, Any] = {}
+    if wanted("normalize", args.only):
+        results.update(bench_normalize(sheets, args.repeat))
+
+    with tempfile.TemporaryDirectory(prefix="drone-bench-") as data_dir:
+        write_csvs(sheets, data_dir)
+        del sheets
+
+        with LocalSheetsClient(data_dir) as client:
+            agent = CoordinatorAgent(client)
+
+            t0 = time.perf_counter()
+            client.load_tables(["pilots", "drones", "missions"])
+            results["load_tables[cold]"] = summarize([(time.perf_counter() - t0) * 1000])
+
+            if wanted("engine", args.only):
+                results.update(bench_engine(agent, args.repeat))
+            if wanted("queries", args.only):
+                results.update(bench_queries(agent, args.repeat, args.with_assign_all))
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "sizes": {"pilots": pilots, "drones": drones, "missions": missions},
+            "seed": args.seed,
+            "start": args.start.isoformat() if args.start else None,
+            "repeat": args.repeat,
+            "generate_ms": round(generate_ms, 3),
+        },
+        "results": results,
+    }
+
+
+def wanted(group: str, only: Optional[List[str]]) -> bool:
+    return not only or group in only
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    old_meta, new_meta = baseline.get("meta", {}), report["meta"]
+    if old_meta.get("sizes") != new_meta["sizes"] or old_meta.get("seed") != new_meta["seed"]:
+        print("warning: baseline was run with different sizes / seed", file=sys.stderr)
+
+    print(f"\n{'benchmark':<48}{'baseline ms':>14}{'now ms':>12}{'ratio':>9}")
+    for name, stats in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            print(f"{name:<48}{'-':>14}{stats['median_ms']:>12.3f}{'new':>9}")
+            continue
+        ratio = stats["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        print(f"{name:<48}{old['median_ms']:>14.3f}{stats['median_ms']:>12.3f}{ratio:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the coordinator agent on a synthetic fleet")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="medium")
+    parser.add_argument("--pilots", type=int, help="override the scale's pilot count")
+    parser.add_argument("--drones", type=int, help="override the scale's drone count")
+    parser.add_argument("--missions", type=int, help="override the scale's mission count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="first mission day, YYYY-MM-DD (default today)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per benchmark")
+    parser.add_argument("--only", nargs="+", choices=["normalize", "engine", "queries"], help="run only these groups")
+    parser.add_argument("--with-assign-all", action="store_true", help="also time 'assign all open missions' (slow at scale)")
+    parser.add_argument("--out", help="JSON output path (default benchmarks/results/<commit>-<scale>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="print median ratios against an earlier JSON report")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{report['meta']['commit'] or 'local'}-{args.scale}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    width = max(len(name) for name in report["results"])
+    for name, stats in report["results"].items():
+        print(f"{name:<{width}}  median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  (n={stats['runs']})")
+    print(f"\nWrote {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
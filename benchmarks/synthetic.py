@@ -0,0 +1,210 @@
+"""
+Seeded synthetic fleet: pilots, drones and missions in the same sheet layout
+as data/*.csv (list[list], first row = headers), sized anywhere from a demo
+to 100k pilots / 50k drones / 200k missions.
+
+Distributions are loosely modelled on a national drone-services operator:
+a few big metros hold most of the fleet, nearly everyone has DGCA but few
+have BVLOS, RGB is standard while LiDAR / multispectral are rare.
+
+Write CSVs for the app (DATA_DIR=/tmp/fleet streamlit run ui/streamlit_app.py):
+    python -m benchmarks.synthetic --out /tmp/fleet --pilots 10000 --drones 5000 --missions 20000
+"""
+
+import argparse
+import csv
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.local_sheets_client import SHEET_FILES
+
+PILOT_HEADERS = ["pilot_id", "name", "skills", "certifications", "location", "status", "current_assignment", "available_from"]
+DRONE_HEADERS = ["drone_id", "model", "capabilities", "status", "location", "current_assignment", "maintenance_due"]
+MISSION_HEADERS = [
+    "mission_id", "project", "location", "required_certs", "required_skills", "required_capability",
+    "start_date", "end_date", "status", "assigned_pilot", "assigned_drone",
+]
+
+# (value, relative weight)
+CITIES = [
+    ("Bangalore", 18), ("Mumbai", 16), ("Delhi", 14), ("Hyderabad", 10), ("Chennai", 9), ("Pune", 8),
+    ("Kolkata", 7), ("Ahmedabad", 5), ("Jaipur", 4), ("Kochi", 3), ("Lucknow", 3), ("Guwahati", 3),
+]
+PILOT_STATUSES = [("Available", 55), ("Assigned", 30), ("On Leave", 10), ("Inactive", 5)]
+DRONE_STATUSES = [("Available", 60), ("Deployed", 25), ("Maintenance", 12), ("Retired", 3)]
+MISSION_CAPABILITIES = [("RGB", 50), ("Thermal", 30), ("LiDAR", 15), ("Multispectral", 5)]
+
+# (value, probability a pilot / drone has it)
+CERTS = [("DGCA", 0.92), ("Night Ops", 0.30), ("BVLOS", 0.15), ("Thermography", 0.10)]
+SKILLS = [("Mapping", 0.50), ("Inspection", 0.45), ("Survey", 0.40), ("Thermal", 0.20), ("Photogrammetry", 0.15)]
+CAPABILITIES = [("RGB", 0.85), ("Thermal", 0.35), ("LiDAR", 0.20), ("Multispectral", 0.10)]
+
+MODELS = ["DJI M300", "DJI Mavic 3", "DJI Mavic 3T", "Autel Evo II", "senseFly eBee X", "Skylark S1"]
+FIRST_NAMES = ["Arjun", "Neha", "Rohit", "Sneha", "Ravi", "Priya", "Kiran", "Anita", "Vikram", "Meera", "Sanjay", "Divya"]
+
+# missions are spread over this many days from the start date
+HORIZON_DAYS = 180
+# share of missions already assigned (some of them clash, like real sheets)
+ASSIGNED_SHARE = 0.55
+
+
+def generate_fleet(
+    pilots: int = 1000,
+    drones: int = 500,
+    missions: int = 2000,
+    seed: int = 42,
+    start: Optional[date] = None,
+) -> Dict[str, List[List[str]]]:
+    """
+    Returns {"Pilots": rows, "Drones": rows, "missions": rows}, each a list[list]
+    with the header row first. Same seed + sizes + start -> identical data.
+
+    start -> first mission day (default today, so missions are upcoming for the
+             availability / workload checks that compare against today)
+    """
+    rng = random.Random(seed)
+    start = start or date.today()
+    pilot_rows = [PILOT_HEADERS] + [_pilot(rng, i, start) for i in range(pilots)]
+    drone_rows = [DRONE_HEADERS] + [_drone(rng, i, start) for i in range(drones)]
+
+    # assignees come from the mission's city, as a dispatcher would pick them
+    pilots_by_city = _by_city(pilot_rows, "name", PILOT_HEADERS)
+    drones_by_city = _by_city(drone_rows, "drone_id", DRONE_HEADERS)
+    mission_rows = [MISSION_HEADERS] + [_mission(rng, i, start, pilots_by_city, drones_by_city) for i in range(missions)]
+
+    return {"Pilots": pilot_rows, "Drones": drone_rows, "missions": mission_rows}
+
+
+def write_csvs(sheets: Dict[str, List[List[str]]], data_dir) -> Path:
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for sheet, rows in sheets.items():
+        with open(data_dir / SHEET_FILES[sheet], "w", newline="", encoding="utf-8") as f:
+            csv.writer(f, lineterminator="\n").writerows(rows)
+    return data_dir
+
+
+# -------------------------
+# ROWS
+# -------------------------
+
+def _pilot(rng: random.Random, i: int, start: date) -> List[str]:
+    status = _weighted(rng, PILOT_STATUSES)
+    if status == "On Leave":
+        available_from = start + timedelta(days=rng.randint(1, 45))
+    elif rng.random() < 0.3:
+        available_from = start + timedelta(days=rng.randint(-30, 30))
+    else:
+        available_from = None
+
+    return [
+        f"P{i + 1:06d}",
+        _pilot_name(i),
+        _tags(rng, SKILLS, at_least=1),
+        _tags(rng, CERTS),
+        _weighted(rng, CITIES),
+        status,
+        "–",
+        available_from.isoformat() if available_from else "",
+    ]
+
+
+def _drone(rng: random.Random, i: int, start: date) -> List[str]:
+    return [
+        f"D{i + 1:06d}",
+        rng.choice(MODELS),
+        _tags(rng, CAPABILITIES, at_least=1),
+        _weighted(rng, DRONE_STATUSES),
+        _weighted(rng, CITIES),
+        "–",
+        (start + timedelta(days=rng.randint(-10, 120))).isoformat(),
+    ]
+
+
+def _mission(rng: random.Random, i: int, start: date, pilots_by_city, drones_by_city) -> List[str]:
+    city = _weighted(rng, CITIES)
+    begin = start + timedelta(days=rng.randint(0, HORIZON_DAYS))
+    end = begin + timedelta(days=rng.randint(0, 4))
+
+    certs = ["DGCA"]
+    if rng.random() < 0.25:
+        certs.append("Night Ops")
+    if rng.random() < 0.08:
+        certs.append("BVLOS")
+
+    pilot = drone = ""
+    status = "open"
+    if rng.random() < ASSIGNED_SHARE and pilots_by_city.get(city) and drones_by_city.get(city):
+        pilot = rng.choice(pilots_by_city[city])
+        drone = rng.choice(drones_by_city[city])
+        status = "assigned"
+
+    return [
+        f"M{i + 1:06d}",
+        f"PRJ{i // 3 + 1:05d}",
+        city,
+        ", ".join(certs),
+        ", ".join(rng.sample([s for s, _ in SKILLS], rng.randint(1, 2))),
+        _weighted(rng, MISSION_CAPABILITIES),
+        begin.isoformat(),
+        end.isoformat(),
+        status,
+        pilot,
+        drone,
+    ]
+
+
+# -------------------------
+# HELPERS
+# -------------------------
+
+def _weighted(rng: random.Random, choices: Sequence[Tuple[str, float]]) -> str:
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def _tags(rng: random.Random, choices: Sequence[Tuple[str, float]], at_least: int = 0) -> str:
+    tags = [c for c, p in choices if rng.random() < p]
+    if len(tags) < at_least:
+        tags = [choices[0][0]]
+    return ", ".join(tags)
+
+
+def _pilot_name(i: int) -> str:
+    # letters only (the chat parser reads "pilot <Name>"), unique per index
+    first = FIRST_NAMES[i % len(FIRST_NAMES)]
+    n = i // len(FIRST_NAMES)
+    suffix = ""
+    while True:
+        n, r = divmod(n, 26)
+        suffix = chr(ord("a") + r) + suffix
+        if n == 0:
+            break
+    return first + suffix
+
+
+def _by_city(rows: List[List[str]], key_column: str, headers: List[str]) -> Dict[str, List[str]]:
+    key_idx, city_idx = headers.index(key_column), headers.index("location")
+    by_city: Dict[str, List[str]] = {}
+    for row in rows[1:]:
+        by_city.setdefault(row[city_idx], []).append(row[key_idx])
+    return by_city
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic fleet as CSVs (data/ layout)")
+    parser.add_argument("--out", required=True, help="directory for pilot_roster.csv / drone_fleet.csv / missions.csv")
+    parser.add_argument("--pilots", type=int, default=1000)
+    parser.add_argument("--drones", type=int, default=500)
+    parser.add_argument("--missions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="first mission day, YYYY-MM-DD (default today)")
+    args = parser.parse_args()
+
+    sheets = generate_fleet(args.pilots, args.drones, args.missions, seed=args.seed, start=args.start)
+    print(f"Wrote synthetic fleet to {write_csvs(sheets, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
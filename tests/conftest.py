@@ -0,0 +1,58 @@
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+# tests import the app package from the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.local_sheets_client import SHEET_FILES  # noqa: E402
+
+PILOT_HEADERS = ["pilot_id", "name", "skills", "certifications", "location", "status", "current_assignment", "available_from"]
+DRONE_HEADERS = ["drone_id", "model", "capabilities", "status", "location", "current_assignment", "maintenance_due"]
+MISSION_HEADERS = [
+    "mission_id", "project", "location", "required_certs", "required_skills", "required_capability",
+    "start_date", "end_date", "status", "assigned_pilot", "assigned_drone",
+]
+
+
+def pilot(name, location="Bangalore", certs="DGCA", status="Available", available_from=""):
+    return {"pilot_id": f"P-{name}", "name": name, "skills": "Mapping", "certifications": certs,
+            "location": location, "status": status, "current_assignment": "–", "available_from": available_from}
+
+
+def drone(drone_id, location="Bangalore", capabilities="RGB", status="Available", maintenance_due=""):
+    return {"drone_id": drone_id, "model": "DJI M300", "capabilities": capabilities, "status": status,
+            "location": location, "current_assignment": "–", "maintenance_due": maintenance_due}
+
+
+def mission(mission_id, start, end, location="Bangalore", capability="RGB", certs="DGCA",
+            status="open", assigned_pilot="", assigned_drone=""):
+    return {"mission_id": mission_id, "project": f"Project {mission_id}", "location": location,
+            "required_certs": certs, "required_skills": "Mapping", "required_capability": capability,
+            "start_date": start, "end_date": end, "status": status,
+            "assigned_pilot": assigned_pilot, "assigned_drone": assigned_drone}
+
+
+def write_sheets(data_dir: Path, pilots, drones, missions) -> Path:
+    for sheet, headers, rows in (
+        ("Pilots", PILOT_HEADERS, pilots),
+        ("Drones", DRONE_HEADERS, drones),
+        ("missions", MISSION_HEADERS, missions),
+    ):
+        with open(data_dir / SHEET_FILES[sheet], "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=headers, lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(rows)
+    return data_dir
+
+
+def read_sheet(data_dir: Path, sheet: str):
+    with open(data_dir / SHEET_FILES[sheet], newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def sheets_dir(tmp_path):
+    return tmp_path
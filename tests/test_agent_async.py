@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app.agent import CoordinatorAgent
+from app.async_sheets_client import AsyncSheetsClient
+from app.local_sheets_client import LocalSheetsClient
+from app.mock_script_server import MockScriptServer
+from app.sheets_client import SheetsClient
+
+from conftest import DRONE_HEADERS, MISSION_HEADERS, PILOT_HEADERS, drone, mission, pilot, write_sheets
+
+
+def test_sync_client_queries_run_off_the_event_loop(sheets_dir):
+    write_sheets(sheets_dir, [pilot("Arjun")], [drone("D1")], [mission("M1", "2026-02-10", "2026-02-12")])
+    agent = CoordinatorAgent(LocalSheetsClient(sheets_dir))
+    threads = []
+    run_intent = agent.run_intent
+
+    def record_thread(*args):
+        threads.append(threading.get_ident())
+        return run_intent(*args)
+
+    agent.run_intent = record_thread
+
+    async def main():
+        loop_thread = threading.get_ident()
+        response = await agent.ahandle_query("show available pilots")
+        batch = [item async for item in agent.arun_batch(["show available drones", "update pilot Arjun to On Leave"])]
+        return loop_thread, response, batch
+
+    loop_thread, response, batch = asyncio.run(main())
+
+    assert response["status"] == "success"
+    assert threads and loop_thread not in threads
+    assert [item.get("index") for item in batch] == [0, 1, None]
+    assert batch[-1]["flush"]["updates"] == 1
+
+
+def sheet_rows(headers, rows):
+    return [headers] + [[row[h] for h in headers] for row in rows]
+
+
+def mock_sheets():
+    return {
+        "Pilots": sheet_rows(PILOT_HEADERS, [pilot("Arjun")]),
+        "Drones": sheet_rows(DRONE_HEADERS, [drone("D1")]),
+        "missions": sheet_rows(MISSION_HEADERS, [mission("M1", "2026-02-10", "2026-02-12")]),
+    }
+
+
+def test_async_client_runs_handlers_and_parsing_off_the_event_loop():
+    with MockScriptServer(mock_sheets()) as server:
+        async def main():
+            async with AsyncSheetsClient(server.url) as client:
+                agent = CoordinatorAgent(client)
+                threads = []
+                cached_route, parse = agent._cached_route, client._parse_fetched
+                agent._cached_route = lambda *a: threads.append(threading.get_ident()) or cached_route(*a)
+                client._parse_fetched = lambda *a: threads.append(threading.get_ident()) or parse(*a)
+
+                response = await agent.ahandle_query("show available pilots")
+                batch = [item async for item in agent.arun_batch(["show available drones"])]
+                return threading.get_ident(), threads, response, batch
+
+        loop_thread, threads, response, batch = asyncio.run(main())
+
+    assert response["status"] == "success"
+    assert batch[0]["response"]["status"] == "success"
+    assert len(threads) >= 4 and loop_thread not in threads
+
+
+def test_concurrent_async_reads_of_one_sheet_share_one_fetch():
+    with MockScriptServer(mock_sheets()) as server:
+        async def main():
+            async with AsyncSheetsClient(server.url) as client:
+                return await asyncio.gather(*(client.get_pilot_data() for _ in range(5)))
+
+        tables = asyncio.run(main())
+
+    assert server.request_counts["GET"] == 1
+    assert all(table is tables[0] for table in tables)
+
+
+class SlowSession(requests.Session):
+    def get(self, *args, **kwargs):
+        time.sleep(0.1)
+        return super().get(*args, **kwargs)
+
+
+def test_concurrent_sync_reads_of_one_sheet_share_one_fetch():
+    with MockScriptServer(mock_sheets()) as server:
+        client = SheetsClient(server.url, session=SlowSession())
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            tables = list(pool.map(lambda _: client.get_pilot_data(), range(5)))
+        client.close()
+
+    assert server.request_counts["GET"] == 1
+    assert all(table is tables[0] for table in tables)
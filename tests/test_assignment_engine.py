@@ -0,0 +1,105 @@
+from app.assignment_engine import AssignmentEngine
+from app.booking_index import booking_index
+
+from conftest import drone, mission, pilot
+
+
+def match(pilots, drones, missions, target, urgent=True):
+    m = next(m for m in missions if m["mission_id"] == target)
+    return AssignmentEngine().find_best_match(
+        pilots,
+        drones,
+        location=m["location"],
+        urgent=urgent,
+        required_certs=["DGCA"],
+        required_capability=m["required_capability"],
+        mission=m,
+        bookings=booking_index(missions),
+    )
+
+
+def test_urgent_prefers_unbooked_candidate():
+    missions = [
+        mission("M1", "2026-02-10", "2026-02-12"),
+        mission("M2", "2026-02-11", "2026-02-11", status="assigned", assigned_pilot="Arjun", assigned_drone="D1"),
+    ]
+    result = match([pilot("Arjun"), pilot("Neha")], [drone("D1"), drone("D2")], missions, "M1")
+
+    assert result["pilot"]["name"] == "Neha"
+    assert result["drone"]["drone_id"] == "D2"
+    assert result["reason"] == "Best available pilot and drone found"
+
+
+def test_urgent_falls_back_to_least_disruptive_busy_drone():
+    # both thermal drones are booked; D2's RGB mission can go to the free D3,
+    # D1's thermal mission could only be covered by pulling D2 as well
+    missions = [
+        mission("M1", "2026-02-10", "2026-02-12", capability="Thermal"),
+        mission("M2", "2026-02-11", "2026-02-11", capability="Thermal", status="assigned", assigned_drone="D1"),
+        mission("M3", "2026-02-11", "2026-02-11", status="assigned", assigned_drone="D2"),
+    ]
+    drones = [drone("D1", capabilities="Thermal"), drone("D2", capabilities="Thermal, RGB"), drone("D3")]
+    result = match([pilot("Arjun")], drones, missions, "M1")
+
+    assert result["pilot"]["name"] == "Arjun"
+    assert result["drone"]["drone_id"] == "D2"
+    assert result["reason"] == "Reassigned drone D2 (least disruption)"
+
+
+def test_urgent_never_picks_drone_due_for_maintenance():
+    missions = [mission("M1", "2026-02-10", "2026-02-12")]
+    drones = [drone("D1", maintenance_due="2026-02-11")]
+
+    assert match([pilot("Arjun")], drones, missions, "M1") is None
+
+
+def search(pilots, drones, engine=None, **kwargs):
+    return (engine or AssignmentEngine()).search_match(pilots, drones, required_certs=["DGCA"], **kwargs)
+
+
+def test_search_finds_a_valid_pair_beyond_the_pair_cap():
+    pilots = [pilot(f"P{i}") for i in range(20)]
+    drones = [drone(f"D{i}") for i in range(20)]
+    # only the worst-ranked pilot and drone work together
+    result = search(
+        pilots, drones, engine=AssignmentEngine(max_pairs=10),
+        pair_check=lambda p, d: [] if (p["name"], d["drone_id"]) == ("P19", "D19") else ["clash"],
+    )
+
+    assert (result["match"]["pilot"]["name"], result["match"]["drone"]["drone_id"]) == ("P19", "D19")
+
+
+def test_failing_drones_are_pruned_from_the_pair_walk():
+    pilots = [pilot(f"P{i}") for i in range(10)]
+    drones = [drone("D0"), drone("D1")]
+    engine = AssignmentEngine()
+    walked = []
+    ranked_pairs = engine._ranked_pairs
+
+    def record(*args):
+        for pair in ranked_pairs(*args):
+            walked.append(pair)
+            yield pair
+
+    engine._ranked_pairs = record
+    result = search(
+        pilots, drones, engine=engine,
+        drone_check=lambda d: ["in maintenance"] if d["drone_id"] == "D0" else [],
+        pair_check=lambda p, d: [] if p["name"] == "P9" else ["clash"],
+    )
+
+    assert result["match"]["pilot"]["name"] == "P9"
+    assert sum(1 for _, j in walked if j == 0) == 1
+    assert len(walked) == 11
+
+
+def test_search_past_the_cap_checks_every_candidate_and_keeps_near_misses():
+    checked = []
+    result = search(
+        [pilot("Arjun")], [drone("D1"), drone("D2"), drone("D3")], engine=AssignmentEngine(max_pairs=1),
+        drone_check=lambda d: checked.append(d["drone_id"]) or ["in maintenance"],
+    )
+
+    assert result["match"] is None
+    assert checked == ["D1", "D2", "D3"]
+    assert [n["drone"]["drone_id"] for n in result["near_misses"]] == ["D1"]
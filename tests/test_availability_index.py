@@ -0,0 +1,33 @@
+from datetime import date
+
+from app.availability_index import pilot_availability
+from app.snapshot_cache import SheetTable
+from conftest import pilot
+
+WINDOW = (date(2026, 2, 10), date(2026, 2, 12))
+
+
+def test_pilot_set_on_leave_is_not_free():
+    for available_from in ("", "2026-01-05", "2026-02-10", "2026-03-01"):
+        table = SheetTable([pilot("Arjun", available_from=available_from), pilot("Neha")])
+        availability = pilot_availability(table)
+        if available_from in ("", "2026-01-05", "2026-02-10"):
+            assert availability.free([0, 1], *WINDOW) == [0, 1]
+
+        table.patch("name", "Arjun", "status", "On Leave")
+
+        assert availability.free([0, 1], *WINDOW) == [1], available_from
+        assert availability.busy_reasons(0, *WINDOW)
+
+
+def test_leave_with_a_future_return_date_explains_the_date():
+    availability = pilot_availability([pilot("Arjun", status="On Leave", available_from="2026-03-01")])
+
+    assert availability.busy_reasons(0, *WINDOW) == ["on leave until 2026-03-01"]
+
+
+def test_available_from_without_leave_only_blocks_until_that_day():
+    availability = pilot_availability([pilot("Arjun", available_from="2026-02-11")])
+
+    assert availability.free([0], *WINDOW) == []
+    assert availability.free([0], date(2026, 2, 11), date(2026, 2, 12)) == [0]
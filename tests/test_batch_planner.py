@@ -0,0 +1,121 @@
+import random
+
+import app.batch_planner as batch_planner
+from app.batch_planner import BatchPlanner, solve_sparse_assignment
+from conftest import drone, mission, pilot
+
+
+def picks(plan):
+    return {a["mission_id"]: (a["pilot"]["name"], a["drone"]["drone_id"]) for a in plan["assignments"]}
+
+
+def test_pilot_not_available_until_after_the_mission_is_skipped():
+    pilots = [pilot("Arjun", available_from="2026-03-01"), pilot("Neha")]
+    drones = [drone("D1")]
+    missions = [mission("M1", "2026-02-10", "2026-02-12")]
+
+    plan = BatchPlanner().plan(pilots, drones, missions)
+
+    assert picks(plan) == {"M1": ("Neha", "D1")}
+
+
+def test_drone_with_maintenance_due_in_the_window_is_skipped():
+    pilots = [pilot("Arjun")]
+    drones = [drone("D1", maintenance_due="2026-02-11"), drone("D2")]
+    missions = [mission("M1", "2026-02-10", "2026-02-12")]
+
+    plan = BatchPlanner().plan(pilots, drones, missions)
+
+    assert picks(plan) == {"M1": ("Arjun", "D2")}
+
+
+def test_mission_left_unassigned_when_only_blocked_candidates_exist():
+    pilots = [pilot("Arjun", available_from="2026-03-01")]
+    drones = [drone("D1")]
+    missions = [mission("M1", "2026-02-10", "2026-02-12")]
+
+    plan = BatchPlanner().plan(pilots, drones, missions)
+
+    assert plan["assignments"] == []
+    assert plan["unassigned"] == [{"mission_id": "M1", "reason": "No compatible pilot"}]
+
+
+def test_groups_and_rounds_cover_several_cities_and_dates():
+    pilots = [pilot("Arjun"), pilot("Ravi", location="Mumbai")]
+    drones = [drone("D1"), drone("D2", location="Mumbai")]
+    missions = [
+        mission("M1", "2026-02-10", "2026-02-10"),
+        mission("M2", "2026-02-12", "2026-02-12"),
+        mission("M3", "2026-02-10", "2026-02-10", location="Mumbai"),
+    ]
+
+    plan = BatchPlanner().plan(pilots, drones, missions)
+
+    assert picks(plan) == {"M1": ("Arjun", "D1"), "M2": ("Arjun", "D1"), "M3": ("Ravi", "D2")}
+
+
+def test_sparse_solver_matches_the_dense_fallback(monkeypatch):
+    rng = random.Random(7)
+    n_rows, n_cols = 12, 9
+    edges = [(r, c, float(rng.randint(0, 5))) for r in range(n_rows) for c in range(n_cols) if rng.random() < 0.3]
+
+    sparse = solve_sparse_assignment(n_rows, n_cols, edges)
+    monkeypatch.setattr(batch_planner, "min_weight_full_bipartite_matching", None)
+    dense = solve_sparse_assignment(n_rows, n_cols, edges)
+
+    costs = {(r, c): w for r, c, w in edges}
+    assert len(sparse) == len(dense)
+    assert sum(costs[pair] for pair in sparse) == sum(costs[pair] for pair in dense)
+    assert len({c for _, c in sparse}) == len(sparse)
+
+
+def test_pilot_is_not_spent_on_a_mission_no_drone_can_fly():
+    pilots = [pilot("Arjun")]
+    drones = [drone("D1", capabilities="Thermal")]
+    missions = [
+        mission("M1", "2026-02-10", "2026-02-12", capability="LiDAR"),
+        mission("M2", "2026-02-10", "2026-02-12", capability="Thermal"),
+    ]
+
+    plan = BatchPlanner().plan(pilots, drones, missions)
+
+    assert picks(plan) == {"M2": ("Arjun", "D1")}
+    assert plan["unassigned"] == [{"mission_id": "M1", "reason": "No compatible drone"}]
+
+
+def test_only_one_of_two_overlapping_missions_gets_the_single_pair():
+    pilots = [pilot("Arjun")]
+    drones = [drone("D1", capabilities="RGB, Thermal")]
+    missions = [
+        mission("M1", "2026-02-10", "2026-02-12", capability="RGB"),
+        mission("M2", "2026-02-10", "2026-02-12", capability="Thermal"),
+    ]
+
+    plan = BatchPlanner().plan(pilots, drones, missions)
+
+    assert len(plan["assignments"]) == 1
+    assert [u["reason"] for u in plan["unassigned"]] == ["No free pilot (compatible ones are booked on these dates)"]
+
+
+def test_pilots_are_re_solved_when_no_drone_is_left_for_their_mission():
+    # pilots prefer M1 and M3 (M2 needs a skill they lack), but one RGB drone
+    # can't fly both; re-solving moves a pilot to M2, which the thermal drone covers
+    pilots = [pilot("Arjun"), pilot("Neha")]
+    drones = [drone("D1"), drone("D2", capabilities="Thermal")]
+    missions = [
+        mission("M1", "2026-02-10", "2026-02-12"),
+        mission("M2", "2026-02-10", "2026-02-12", capability="Thermal"),
+        mission("M3", "2026-02-10", "2026-02-12"),
+    ]
+    missions[1]["required_skills"] = "Night Ops"
+
+    plan = BatchPlanner().plan(pilots, drones, missions)
+
+    assert {m: d for m, (_, d) in picks(plan).items()} in ({"M1": "D1", "M2": "D2"}, {"M3": "D1", "M2": "D2"})
+    assert [u["reason"] for u in plan["unassigned"]] == ["No free drone (compatible ones are booked on these dates)"]
+
+
+def test_placeholder_assignee_counts_as_open():
+    plan = BatchPlanner().plan([pilot("Arjun")], [drone("D1")], [mission("M1", "2026-02-10", "2026-02-12", assigned_pilot="–")])
+
+    assert picks(plan) == {"M1": ("Arjun", "D1")}
@@ -0,0 +1,74 @@
+import pytest
+
+import app.fleet_index as fleet_index
+from app.fleet_index import FleetIndex, build_index
+from app.records import Drone, Pilot, build_records
+from app.vector_index import VectorIndex
+from conftest import DRONE_HEADERS, PILOT_HEADERS, drone, pilot
+
+BACKENDS = [FleetIndex, VectorIndex]
+
+
+def records(record_type, headers, rows):
+    return build_records(record_type, headers, [[row[h] for h in headers] for row in rows])
+
+
+PILOTS = [
+    pilot("Arjun", certs="DGCA"),
+    pilot("Neha", location="Mumbai", certs="DGCA, Night Ops"),
+    pilot("Ravi", location="Navi Mumbai", certs="BVLOS", status="On Leave"),
+    pilot("Sara", location="Mumbai", certs="DGCA", status="Free"),
+]
+DRONES = [
+    drone("D1", capabilities="RGB, LiDAR"),
+    drone("D2", location="Mumbai", capabilities="Thermal"),
+    drone("D3", location="Mumbai", capabilities="Thermal, RGB", status="Under Maintenance"),
+]
+PILOT_QUERIES = [
+    {},
+    {"statuses": ["available", "free"]},
+    {"location": "mumbai"},
+    {"tags": ["dgca"]},
+    {"tags": ["DGCA", "Night Ops"]},
+    {"tags": ["unknown cert"]},
+    {"statuses": ["available", "free"], "location": "Mumbai", "tags": ["DGCA"]},
+    {"exclude_status": "leave"},
+]
+DRONE_QUERIES = [
+    {"tag_substring": "therm"},
+    {"exclude_status": "maintenance", "tag_substring": "thermal"},
+    {"statuses": ["available"], "location": "Bangalore", "tag_substring": "lidar"},
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_answer_the_same_queries(backend):
+    pilots = backend(records(Pilot, PILOT_HEADERS, PILOTS), "certifications")
+    drones = backend(records(Drone, DRONE_HEADERS, DRONES), "capabilities")
+
+    assert [pilots.match(**q) for q in PILOT_QUERIES] == [
+        [0, 1, 2, 3], [0, 1, 3], [1, 2, 3], [0, 1, 3], [1], [], [1, 3], [0, 1, 3],
+    ]
+    assert [drones.match(**q) for q in DRONE_QUERIES] == [[1, 2], [1], [0]]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_apply_patches_the_same_way(backend):
+    rows = [dict(row) for row in PILOTS]
+    index = backend(rows, "certifications")
+
+    rows[0]["status"] = "On Leave"
+    index.on_patch(0, "status", "Available", "On Leave")
+    index.on_patch(2, "certifications", "BVLOS", "BVLOS, DGCA")
+    index.on_patch(3, "location", "Mumbai", "Pune")
+
+    assert index.match(statuses=["available", "free"]) == [1, 3]
+    assert index.match(tags=["DGCA"]) == [0, 1, 2, 3]
+    assert index.match(location="mumbai") == [1, 2]
+
+
+def test_build_index_picks_the_backend_by_row_count(monkeypatch):
+    monkeypatch.setattr(fleet_index, "VECTOR_MIN_ROWS", 3)
+
+    assert isinstance(build_index(PILOTS[:2], "certifications"), FleetIndex)
+    assert isinstance(build_index(PILOTS, "certifications"), VectorIndex)
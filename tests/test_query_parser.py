@@ -0,0 +1,93 @@
+from app.query_parser import QueryParser
+from app.snapshot_cache import SheetTable
+
+
+def test_drone_followed_by_capability_is_not_a_drone_id():
+    parsed = QueryParser().parse("show available drone thermal")
+
+    assert parsed.intent == "show_available_drones"
+    assert parsed.drone_id is None
+    assert parsed.capability == "thermal"
+
+
+def test_pilot_followed_by_in_is_not_a_pilot_name():
+    parsed = QueryParser().parse("show pilot in Mumbai")
+
+    assert parsed.intent == "show_available_pilots"
+    assert parsed.pilot_name is None
+    assert parsed.location == "Mumbai"
+
+
+def test_pilot_followed_by_keyword_is_not_a_pilot_name():
+    parsed = QueryParser().parse("show pilot available in Pune")
+
+    assert parsed.pilot_name is None
+    assert parsed.location == "Pune"
+
+
+def test_learned_city_is_not_a_drone_id():
+    parser = QueryParser()
+    parser.learn({"drones": [{"drone_id": "D1", "location": "Nagpur", "capabilities": "RGB", "status": "Available"}]})
+
+    parsed = parser.parse("show drone Nagpur")
+
+    assert parsed.drone_id is None
+    assert parsed.location == "Nagpur"
+
+
+def test_names_and_ids_still_parse():
+    parser = QueryParser()
+
+    pilot = parser.parse("update pilot Arjun to On Leave")
+    assert (pilot.intent, pilot.pilot_name, pilot.status) == ("update_pilot_status", "Arjun", "On Leave")
+
+    drone = parser.parse("update drone D7 to Maintenance")
+    assert (drone.intent, drone.drone_id, drone.status) == ("update_drone_status", "D7", "Maintenance")
+
+
+def test_learn_rescans_only_when_vocabulary_columns_change():
+    parser = QueryParser()
+    scans = []
+    collect = parser._collect
+    parser._collect = lambda rows, columns: scans.append(len(rows)) or collect(rows, columns)
+
+    table = SheetTable([{"drone_id": "D1", "location": "Pune", "capabilities": "RGB", "status": "Available", "current_assignment": "–"}])
+    parser.learn({"drones": table})
+    assert len(scans) == 1
+
+    table.patch("drone_id", "D1", "current_assignment", "M7")
+    table.patch("drone_id", "D1", "status", "Assigned(M7)")
+    parser.learn({"drones": table})
+    assert len(scans) == 1
+
+    table.patch("drone_id", "D1", "location", "Nagpur")
+    parser.learn({"drones": table})
+    assert len(scans) == 2
+    assert "Nagpur" in parser.vocabulary()["cities"]
+
+
+def test_multi_word_location_after_in():
+    parser = QueryParser()
+
+    assert parser.parse("show pilots in New Delhi").location == "New Delhi"
+    assert parser.parse("pilots free in New Delhi from 2026-02-10 to 2026-02-12 with DGCA").location == "New Delhi"
+    # the place stops at the next keyword / vocabulary term
+    parsed = parser.parse("show drones in Navi Mumbai Thermal")
+    assert (parsed.location, parsed.capability) == ("Navi Mumbai", "thermal")
+
+
+def test_learned_multi_word_city_matches_in_any_case():
+    parser = QueryParser()
+    parser.learn({"pilots": [{"location": "New Delhi", "certifications": "DGCA", "status": "Available"}]})
+
+    assert parser.parse("show pilots in new delhi").location == "New Delhi"
+
+
+def test_top_n_ranking_form():
+    parser = QueryParser()
+
+    pilots = parser.parse("top 2 pilots in Mumbai")
+    assert (pilots.intent, pilots.top_k, pilots.location) == ("show_available_pilots", 2, "Mumbai")
+
+    drones = parser.parse("top 3 drones with thermal")
+    assert (drones.intent, drones.top_k, drones.capability) == ("show_available_drones", 3, "thermal")
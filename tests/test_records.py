@@ -0,0 +1,26 @@
+from app.records import Pilot, build_records
+from app.snapshot_cache import SheetTable
+
+HEADERS = ["pilot_id", "name", "status"]
+
+
+def test_new_column_on_a_copy_leaves_the_original_and_other_rows_alone():
+    arjun, neha = build_records(Pilot, HEADERS, [["P1", "Arjun", "Available"], ["P2", "Neha", "Available"]])
+
+    copy = arjun.copy()
+    copy["current_assignment"] = "M7"
+
+    assert copy["current_assignment"] == "M7"
+    assert "current_assignment" not in arjun and "current_assignment" not in neha
+    assert list(arjun) == HEADERS
+
+
+def test_patch_adding_a_column_keeps_old_snapshot_rows_unchanged():
+    table = SheetTable(build_records(Pilot, HEADERS, [["P1", "Arjun", "Available"], ["P2", "Neha", "Available"]]))
+    old = list(table)
+
+    table.patch("name", "Arjun", "current_assignment", "M7")
+
+    assert table[0]["current_assignment"] == "M7"
+    assert all(list(row) == HEADERS for row in old)
+    assert list(table[1]) == HEADERS
@@ -0,0 +1,34 @@
+from datetime import date
+
+from app.records import as_mission
+from app.scoring import MAINTENANCE_CLASH_DAYS, ScoringModel
+from conftest import drone, mission
+
+MISSION = as_mission(mission("M1", "2026-02-10", "2026-02-12"))
+
+
+def test_maintenance_due_inside_the_window_is_a_clash():
+    features = ScoringModel().drone_features(drone("D1", maintenance_due="2026-02-11"), MISSION)
+
+    assert features["maintenance_headroom"] == MAINTENANCE_CLASH_DAYS
+    assert "maintenance_overdue" not in features
+
+
+def test_overdue_maintenance_is_its_own_penalty_not_a_clash():
+    model = ScoringModel()
+    overdue = model.drone_features(drone("D1", maintenance_due="2026-01-05"), MISSION)
+
+    assert overdue["maintenance_overdue"] == 1.0
+    assert "maintenance_headroom" not in overdue
+    # overdue ranks below plenty of headroom but well above a clash
+    clash = model.score_drone(drone("D2", maintenance_due="2026-02-11"), MISSION)
+    later = model.score_drone(drone("D3", maintenance_due="2026-03-15"), MISSION)
+    assert clash < model.score(overdue) < later
+
+
+def test_overdue_drones_still_rank_by_their_other_features():
+    model = ScoringModel(today=lambda: date(2026, 10, 17))
+    available = model.score_drone(drone("D1", maintenance_due="2026-03-01"))
+    busy = model.score_drone(drone("D2", status="Busy", maintenance_due="2026-03-01"))
+
+    assert available > busy
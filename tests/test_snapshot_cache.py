@@ -0,0 +1,131 @@
+import threading
+import time
+
+from app.mock_script_server import MockScriptServer
+from app.records import Pilot, build_records, norm
+from app.sheets_client import SheetsClient
+from app.snapshot_cache import SheetDelta, SheetTable, SnapshotCache
+
+HEADERS = ["pilot_id", "name", "status"]
+
+
+def rows(*names):
+    return [{"pilot_id": f"P{i + 1}", "name": name, "status": "Available"} for i, name in enumerate(names)]
+
+
+class StatusIndex:
+    """Derived structure that records the patches it is told about."""
+
+    def __init__(self, table):
+        self.patches = []
+
+    def on_patch(self, pos, column, old_value, new_value):
+        self.patches.append((pos, column, old_value, new_value))
+
+
+def test_merge_patches_changed_cells_and_appends_rows():
+    table = SheetTable(rows("Arjun", "Neha"))
+    index = table.derived("status", StatusIndex)
+
+    changed = table.merge({
+        1: {"pilot_id": "P2", "name": "Neha", "status": "On Leave"},
+        2: {"pilot_id": "P3", "name": "Ravi", "status": "Available"},
+    })
+
+    assert changed == 2
+    assert [r["status"] for r in table] == ["Available", "On Leave", "Available"]
+    assert index.patches == [(1, "status", "Available", "On Leave")]
+    assert table.find("name", "ravi") == 2
+
+
+def test_merge_without_differences_keeps_the_version():
+    table = SheetTable(rows("Arjun"), version=3)
+
+    assert table.merge({0: dict(rows("Arjun")[0])}) == 0
+    assert table.version == 3
+
+
+def synced_cache():
+    cache = SnapshotCache(ttl=60)
+    cache.sync("Pilots", SheetDelta(5, rows("Arjun", "Neha", "Ravi")))
+    return cache
+
+
+def test_delta_with_matching_count_and_ids_is_merged():
+    cache = synced_cache()
+    changed = {1: {"pilot_id": "P2", "name": "Neha", "status": "On Leave"}}
+
+    table = cache.sync("Pilots", SheetDelta(6, changed, base=5, headers=HEADERS, count=3))
+
+    assert table is not None and table.revision == 6
+    assert table[1]["status"] == "On Leave"
+
+
+def test_delta_with_a_different_row_count_forces_a_reload():
+    cache = synced_cache()
+    # Neha's row was deleted: Ravi moved up to position 1 and the sheet has 2 rows
+    changed = {1: {"pilot_id": "P3", "name": "Ravi", "status": "On Leave"}}
+
+    assert cache.sync("Pilots", SheetDelta(7, changed, base=5, headers=HEADERS, count=2)) is None
+    assert cache.stats()["revision_gaps"] == 1
+
+
+def test_delta_whose_row_moved_forces_a_reload():
+    cache = synced_cache()
+    # same row count (one deleted, one appended) but position 1 now holds another pilot
+    changed = {1: {"pilot_id": "P3", "name": "Ravi", "status": "On Leave"}}
+
+    assert cache.sync("Pilots", SheetDelta(7, changed, base=5, headers=HEADERS, count=3)) is None
+
+
+def test_client_reloads_after_a_row_is_deleted_on_the_backend():
+    sheets = {"Pilots": [HEADERS, ["P1", "Arjun", "Available"], ["P2", "Neha", "Available"], ["P3", "Ravi", "Available"]]}
+    with MockScriptServer(sheets) as server:
+        client = SheetsClient(server.url, cache_ttl=0.01, cache_stale_ttl=0)
+        assert [p["name"] for p in client.get_pilot_data()] == ["Arjun", "Neha", "Ravi"]
+
+        server.delete_row("Pilots", 1)
+        server.apply_update({"sheet": "Pilots", "keyColumn": "name", "keyValue": "Ravi", "updateColumn": "status", "updateValue": "On Leave"})
+        time.sleep(0.02)
+
+        pilots = client.get_pilot_data()
+        assert [(p["name"], p["status"]) for p in pilots] == [("Arjun", "Available"), ("Ravi", "On Leave")]
+        client.close()
+
+
+def test_patch_and_merge_swap_in_new_rows_instead_of_mutating():
+    pilots = build_records(Pilot, HEADERS, [["P1", "Arjun", "Available"], ["P2", "Neha", "Available"]])
+    table = SheetTable(pilots)
+    arjun, neha = table[0], table[1]
+
+    table.patch("name", "Arjun", "status", "On Leave")
+    table.merge({1: {"pilot_id": "P2", "name": "Neha", "status": "Assigned"}})
+
+    # readers holding the old rows see them unchanged, parsed fields included
+    assert (arjun["status"], arjun.status_key) == ("Available", "available")
+    assert (neha["status"], neha.status_key) == ("Available", "available")
+    assert (table[0]["status"], table[0].status_key) == ("On Leave", "on leave")
+    assert (table[1]["status"], table[1].status_key) == ("Assigned", "assigned")
+
+
+def test_readers_iterating_during_merges_never_see_half_updated_rows():
+    pilots = build_records(Pilot, HEADERS, [[f"P{i}", f"Pilot{i}", "Available"] for i in range(200)])
+    table = SheetTable(pilots)
+    torn = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            for row in table:
+                if row.status_key != norm(row["status"]):
+                    torn.append(row)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for n in range(200):
+        status = "On Leave" if n % 2 else "Available"
+        table.merge({pos: {"pilot_id": f"P{pos}", "name": f"Pilot{pos}", "status": status} for pos in range(200)})
+    stop.set()
+    reader.join()
+
+    assert torn == []
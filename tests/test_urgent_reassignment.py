@@ -0,0 +1,86 @@
+from app.agent import CoordinatorAgent
+from app.local_sheets_client import LocalSheetsClient
+from app.urgent_reassignment import UrgentReassigner
+
+from conftest import drone, mission, pilot, read_sheet, write_sheets
+
+
+def run(data_dir, query):
+    with LocalSheetsClient(data_dir) as client:
+        return CoordinatorAgent(client).handle_query(query)
+
+
+def assigned(data_dir, mission_id):
+    row = next(m for m in read_sheet(data_dir, "missions") if m["mission_id"] == mission_id)
+    return row["assigned_pilot"], row["assigned_drone"]
+
+
+def test_urgent_skips_drone_with_maintenance_due_in_window(sheets_dir):
+    write_sheets(
+        sheets_dir,
+        [pilot("Arjun")],
+        [drone("D1", maintenance_due="2026-02-11")],
+        [mission("M1", "2026-02-10", "2026-02-12")],
+    )
+
+    response = run(sheets_dir, "urgent assign mission M1")
+
+    assert response["status"] != "success"
+    assert assigned(sheets_dir, "M1") == ("", "")
+
+
+def test_urgent_skips_pilot_before_available_from(sheets_dir):
+    write_sheets(
+        sheets_dir,
+        [pilot("Arjun", available_from="2026-02-20")],
+        [drone("D1")],
+        [mission("M1", "2026-02-10", "2026-02-12")],
+    )
+
+    response = run(sheets_dir, "urgent assign mission M1")
+
+    assert response["status"] != "success"
+    assert assigned(sheets_dir, "M1") == ("", "")
+
+
+def test_urgent_pulls_booked_drone_and_backfills(sheets_dir):
+    # only D1 has thermal; it is booked on M2, which the RGB-only D2 can cover
+    write_sheets(
+        sheets_dir,
+        [pilot("Arjun"), pilot("Neha")],
+        [drone("D1", capabilities="Thermal, RGB", status="Assigned"), drone("D2")],
+        [
+            mission("M1", "2026-02-10", "2026-02-12", capability="Thermal"),
+            mission("M2", "2026-02-11", "2026-02-13", status="assigned", assigned_pilot="Neha", assigned_drone="D1"),
+        ],
+    )
+
+    response = run(sheets_dir, "urgent assign mission M1")
+
+    assert response["status"] == "success"
+    assert "by reassignment" in response["message"]
+    assert response["data"]["moves"] == ["Drone D2 covers M2 (was D1)"]
+    assert assigned(sheets_dir, "M1") == ("Arjun", "D1")
+    assert assigned(sheets_dir, "M2") == ("Neha", "D2")
+
+
+def test_urgent_reports_near_misses_for_non_booking_conflicts(sheets_dir):
+    # the only pilot is free by dates but lacks BVLOS: nothing to reassign
+    write_sheets(
+        sheets_dir,
+        [pilot("Arjun")],
+        [drone("D1")],
+        [mission("M1", "2026-02-10", "2026-02-12", certs="DGCA, BVLOS")],
+    )
+
+    response = run(sheets_dir, "urgent assign mission M1")
+
+    assert response["status"] != "success"
+    assert "reassignment" not in response["message"]
+
+
+def test_reassigner_never_offers_blocked_candidates():
+    drones = [drone("D1", maintenance_due="2026-02-11"), drone("D2", status="Maintenance")]
+    missions = [mission("M1", "2026-02-10", "2026-02-12")]
+
+    assert UrgentReassigner().plan("drone", drones, missions, missions[0]) is None
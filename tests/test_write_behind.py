@@ -0,0 +1,117 @@
+import json
+
+from app.sheets_client import SheetsClient
+from app.write_behind import PermanentWriteError, WriteBehindQueue
+
+
+def update(key, value, sheet="Pilots"):
+    return {"sheet": sheet, "keyColumn": "name", "keyValue": key, "updateColumn": "status", "updateValue": value}
+
+
+def queue(send, **kwargs):
+    kwargs.setdefault("flush_interval", 0.01)
+    kwargs.setdefault("backoff", 0.001)
+    return WriteBehindQueue(send, **kwargs)
+
+
+def test_rejected_batch_is_dead_lettered_without_retrying():
+    calls, dead = [], []
+
+    def send(batch):
+        calls.append(batch)
+        raise PermanentWriteError("Update rejected (Pilots): unknown column")
+
+    q = queue(send, on_dead_letter=lambda batch, error: dead.append((batch, error)))
+    q.enqueue([update("Arjun", "On Leave")])
+    assert q.flush(timeout=5)
+
+    stats = q.stats()
+    assert len(calls) == 1
+    assert stats["retries"] == 0
+    assert stats["dead_lettered"] == 1 and stats["dead_letters"] == 1
+    assert "unknown column" in stats["last_dead_letter"]
+    assert dead == [([update("Arjun", "On Leave")], "Update rejected (Pilots): unknown column")]
+    q.close()
+
+
+def test_transient_failures_are_retried_up_to_the_cap():
+    calls = []
+
+    def send(batch):
+        calls.append(batch)
+        raise ConnectionError("backend down")
+
+    q = queue(send, max_retries=2)
+    q.enqueue([update("Arjun", "On Leave")])
+    assert q.flush(timeout=5)
+
+    assert len(calls) == 3
+    assert q.stats()["retries"] == 2
+    assert q.dead_letters()[0]["error"] == "gave up after 3 attempts: backend down"
+    q.close()
+
+
+def test_transient_failure_then_success_is_sent():
+    calls = []
+
+    def send(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise ConnectionError("blip")
+        return {"status": "success"}
+
+    q = queue(send)
+    q.enqueue([update("Arjun", "On Leave")])
+    assert q.flush(timeout=5)
+
+    stats = q.stats()
+    assert (stats["sent"], stats["retries"], stats["dead_letters"]) == (1, 1, 0)
+    q.close()
+
+
+def test_journal_is_compacted_after_each_flush(tmp_path):
+    journal = tmp_path / "writes.jsonl"
+    seen = []
+
+    def send(batch):
+        seen.append([json.loads(line)["keyValue"] for line in journal.read_text().splitlines()])
+        return {"status": "success"}
+
+    q = queue(send, max_batch=1, journal_path=str(journal))
+    q.enqueue([update("Arjun", "On Leave"), update("Neha", "Available")])
+    assert q.flush(timeout=5)
+
+    # the second send happens after the first flush rewrote the journal
+    assert seen == [["Arjun", "Neha"], ["Neha"]]
+    assert journal.read_text() == ""
+    q.close()
+
+
+class RejectingSession:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+        self.posts = 0
+
+    def post(self, *args, **kwargs):
+        self.posts += 1
+        return self
+
+    def close(self):
+        pass
+
+
+def test_client_dead_letters_4xx_and_reloads_the_sheet():
+    session = RejectingSession(400, "no such column")
+    client = SheetsClient("http://sheets.invalid", write_behind=True, write_flush_interval=0.01, session=session)
+    client.cache.sync("Pilots", [{"name": "Arjun", "status": "Available"}])
+
+    client.update_pilot_status("Arjun", "On Leave")
+    assert client.flush_writes(timeout=5)
+
+    stats = client.write_stats()
+    assert session.posts == 1
+    assert stats["dead_letters"] == 1
+    assert "HTTP 400" in stats["last_dead_letter"]
+    assert client.cache.lookup("Pilots")[0] is None
+    client.close()
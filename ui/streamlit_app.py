@@ -1,9 +1,12 @@
+import math
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import streamlit as st
 
 _PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -44,35 +47,112 @@ except ModuleNotFoundError:
 
 
 from app.agent import CoordinatorAgent  # noqa: E402
-from app.sheets_client import SheetsClient  # noqa: E402
+from app.local_sheets_client import DATA_DIR, LocalSheetsClient  # noqa: E402
+from app.sheets_client import BaseSheetsClient, SheetsClient  # noqa: E402
+from app.snapshot_cache import SheetTable  # noqa: E402
 
+PAGE_SIZES = [25, 50, 100, 250]
+FILTER_COLUMNS = ["status", "location"]
 
-def _as_df(data: Any) -> pd.DataFrame:
-    if isinstance(data, list):
-        return pd.DataFrame(data)
-    if isinstance(data, dict):
-        return pd.DataFrame([data])
-    return pd.DataFrame()
 
+class TableView:
+    """
+    Columnar (Arrow) copy of one sheet snapshot for the dashboard, plus what
+    the page needs from it every rerun: distinct filter values and metrics.
+
+    Built once per snapshot version (cached on the SheetTable, dropped when a
+    write patches it), so reruns only filter / slice Arrow columns instead of
+    rebuilding DataFrames from row dicts.
+    """
 
-def _count_available(rows: List[Dict[str, Any]], key: str = "status") -> int:
-    return sum(1 for r in rows if str(r.get(key, "")).strip().lower() == "available")
+    def __init__(self, rows: List[Dict[str, Any]]):
+        columns: Dict[str, None] = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        self.table = pa.table({
+            c: pa.array(["" if row.get(c) is None else str(row.get(c)) for row in rows], type=pa.string())
+            for c in columns
+        })
+        self.choices = {
+            c: sorted(v for v in pc.unique(self.table[c]).to_pylist() if v)
+            for c in FILTER_COLUMNS
+            if c in self.table.column_names
+        }
+        self.total = self.table.num_rows
+        self.available = self._count_status("available")
+
+    def filter(self, search: str = "", equals: Optional[Dict[str, str]] = None) -> pa.Table:
+        """
+        Rows whose columns equal every non-empty equals value and (if given)
+        contain search in any column, case-insensitive.
+        """
+        mask = None
+        for column, value in (equals or {}).items():
+            if value and column in self.table.column_names:
+                mask = self._and(mask, pc.equal(self.table[column], value))
+
+        search = search.strip()
+        if search:
+            hit = None
+            for column in self.table.column_names:
+                m = pc.match_substring(self.table[column], search, ignore_case=True)
+                hit = m if hit is None else pc.or_(hit, m)
+            mask = self._and(mask, hit)
+
+        return self.table if mask is None else self.table.filter(mask)
+
+    def _count_status(self, status: str) -> int:
+        if "status" not in self.table.column_names or not self.total:
+            return 0
+        normalized = pc.utf8_lower(pc.utf8_trim_whitespace(self.table["status"]))
+        return pc.sum(pc.equal(normalized, status)).as_py() or 0
+
+    def _and(self, mask, other):
+        return other if mask is None else pc.and_(mask, other)
+
+
+def _table_view(rows: List[Dict[str, Any]]) -> TableView:
+    if isinstance(rows, SheetTable):
+        return rows.derived("dashboard_view", TableView)
+    return TableView(rows)
+
+
+def _make_client(script_url: str, write_behind: bool = False) -> BaseSheetsClient:
+    # Empty script_url -> local CSV backend (DATA_DIR or ./data)
+    if script_url:
+        if write_behind:
+            return SheetsClient(
+                script_url,
+                write_behind=True,
+                write_journal=os.getenv("SHEETS_WRITE_JOURNAL") or None,
+            )
+        return SheetsClient(script_url)
+    return LocalSheetsClient(os.getenv("DATA_DIR") or DATA_DIR)
 
 
 @st.cache_resource
-def _get_client_and_agent(script_url: str) -> Tuple[SheetsClient, CoordinatorAgent]:
-    client = SheetsClient(script_url)
+def _get_client_and_agent(script_url: str) -> Tuple[BaseSheetsClient, CoordinatorAgent]:
+    # SHEETS_WRITE_BEHIND=1 -> status updates return at once and are sent in the background
+    client = _make_client(script_url, write_behind=os.getenv("SHEETS_WRITE_BEHIND", "") == "1")
     agent = CoordinatorAgent(client)
     return client, agent
 
 
-@st.cache_data(ttl=30)
-def _fetch_tables(script_url: str):
-    # Cache by script_url (hashable), not by client (unhashable).
-    client = SheetsClient(script_url)
-    pilots = client.get_pilot_data()
-    drones = client.get_drone_data()
-    return pilots, drones
+def _load_snapshot(client: BaseSheetsClient) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Pilots / drones from the same client (and snapshot cache) the agent uses:
+    no second download, and the agent's writes patch these rows in place.
+    """
+    tables = client.load_tables(["pilots", "drones"])
+    pilots, drones = tables["pilots"], tables["drones"]
+    return (pilots if isinstance(pilots, list) else []), (drones if isinstance(drones, list) else [])
+
+
+def _snapshot_label(pilots: List[Dict[str, Any]], drones: List[Dict[str, Any]]) -> str:
+    versions = [getattr(rows, "version", None) for rows in (pilots, drones)]
+    if None in versions:
+        return ""
+    return f"Snapshot: pilots v{versions[0]} · drones v{versions[1]}"
 
 
 def _init_state() -> None:
@@ -102,6 +182,35 @@ def _get_script_url() -> str:
     return script_url.strip()
 
 
+def _render_table(title: str, view: TableView, key: str) -> None:
+    """
+    Filter + paginate on the server; only the visible page is sent to the browser.
+    """
+    st.markdown(f"### {title}")
+    if not view.total:
+        st.info(f"No {title.lower()} rows available.")
+        return
+
+    search_col, *filter_cols, size_col = st.columns([0.4] + [0.2] * len(view.choices) + [0.2])
+    search = search_col.text_input("Search", key=f"{key}_search", placeholder="name, id, cert...")
+    equals = {}
+    for col, (column, values) in zip(filter_cols, view.choices.items()):
+        choice = col.selectbox(column.title(), ["All"] + values, key=f"{key}_{column}")
+        equals[column] = "" if choice == "All" else choice
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    filtered = view.filter(search, equals)
+    pages = max(1, math.ceil(filtered.num_rows / page_size))
+    page_key = f"{key}_page"
+    # filters may shrink the result below the page the user was on
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = int(st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key))
+
+    st.dataframe(filtered.slice((page - 1) * page_size, page_size), use_container_width=True, hide_index=True)
+    st.caption(f"{filtered.num_rows} of {view.total} rows · page {page} of {pages}")
+
+
 def main() -> None:
     st.set_page_config(
         page_title="Skylark Drones — Ops Coordinator",
@@ -123,28 +232,29 @@ def main() -> None:
     # Load Script URL from .env OR Streamlit secrets
     script_url = _get_script_url()
 
-    if not script_url:
-        st.error("Missing `GOOGLE_SCRIPT_URL`.")
-        st.info("✅ Local Run: Add it to `.env` in the project root.")
-        st.info("✅ Streamlit Cloud: Add it in App Settings → Secrets.")
-        st.code('GOOGLE_SCRIPT_URL = "https://script.google.com/macros/s/XXXX/exec"')
-        st.stop()
-
     client, agent = _get_client_and_agent(script_url)
 
     with st.sidebar:
         st.markdown("## Ops Console")
-        st.markdown(
-            '<div class="small-muted">Live data via Google Apps Script</div>',
-            unsafe_allow_html=True,
-        )
-        st.markdown(" ")
-        st.text_input("Google Script URL", value=script_url, disabled=True)
+        if script_url:
+            st.markdown(
+                '<div class="small-muted">Live data via Google Apps Script</div>',
+                unsafe_allow_html=True,
+            )
+            st.markdown(" ")
+            st.text_input("Google Script URL", value=script_url, disabled=True)
+        else:
+            st.markdown(
+                '<div class="small-muted">Offline mode: local CSV data (set GOOGLE_SCRIPT_URL for live sheets)</div>',
+                unsafe_allow_html=True,
+            )
+            st.markdown(" ")
+            st.text_input("Data directory", value=str(getattr(client, "data_dir", "")), disabled=True)
 
         col_a, col_b = st.columns(2)
         with col_a:
             if st.button("Refresh data", use_container_width=True):
-                _fetch_tables.clear()
+                client.invalidate()
         with col_b:
             if st.button("Clear chat", use_container_width=True):
                 st.session_state.messages = [
@@ -180,17 +290,9 @@ def main() -> None:
             unsafe_allow_html=True,
         )
 
-    # Data snapshot + metrics
-    pilots, drones = _fetch_tables(script_url)
-    pilots_rows: List[Dict[str, Any]] = pilots if isinstance(pilots, list) else []
-    drones_rows: List[Dict[str, Any]] = drones if isinstance(drones, list) else []
-
+    # Metrics are filled in after the chat so they include this run's writes
     with right:
-        c1, c2, c3, c4 = st.columns(4)
-        c1.metric("Pilots", len(pilots_rows))
-        c2.metric("Available", _count_available(pilots_rows))
-        c3.metric("Drones", len(drones_rows))
-        c4.metric("Available", _count_available(drones_rows))
+        metrics_slot = st.container()
 
     st.markdown("---")
 
@@ -225,22 +327,35 @@ def main() -> None:
                     st.markdown("#### Match details")
                     st.json(result["match"])
 
+                # Ranked candidates (score + per-feature breakdown) so the dispatcher can pick another
+                if isinstance(result, dict):
+                    ranked = {"Top candidates": result.get("top_k")}
+                    ranked.update({f"Top {k}": v for k, v in (result.get("candidates") or {}).items()})
+                    for title, rows in ranked.items():
+                        if rows:
+                            st.markdown(f"#### {title}")
+                            st.dataframe(pd.json_normalize(rows), use_container_width=True, hide_index=True)
+
             st.session_state.messages.append({"role": "assistant", "content": message})
 
-    with tab_tables:
-        st.markdown("### Pilots")
-        df_p = _as_df(pilots_rows)
-        if not df_p.empty:
-            st.dataframe(df_p, use_container_width=True, hide_index=True)
-        else:
-            st.info("No pilot rows available.")
+    # Shared snapshot, read after the agent ran: its writes are already patched in
+    pilots_rows, drones_rows = _load_snapshot(client)
 
-        st.markdown("### Drones")
-        df_d = _as_df(drones_rows)
-        if not df_d.empty:
-            st.dataframe(df_d, use_container_width=True, hide_index=True)
-        else:
-            st.info("No drone rows available.")
+    pilots_view, drones_view = _table_view(pilots_rows), _table_view(drones_rows)
+
+    with metrics_slot:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Pilots", pilots_view.total)
+        c2.metric("Available", pilots_view.available)
+        c3.metric("Drones", drones_view.total)
+        c4.metric("Available", drones_view.available)
+        label = _snapshot_label(pilots_rows, drones_rows)
+        if label:
+            st.caption(label)
+
+    with tab_tables:
+        _render_table("Pilots", pilots_view, "pilots")
+        _render_table("Drones", drones_view, "drones")
 
 
 if __name__ == "__main__":